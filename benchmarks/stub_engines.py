@@ -0,0 +1,213 @@
+"""
+Deterministic stand-ins for the TTS engines
+Installed into sys.modules only for engines that are not importable (or when forced),
+so the benchmark measures each service's own overhead (queueing, conditioning lookup,
+resampling, encoding, framing) with a fixed, known generation cost.
+
+Every stub produces speech-length audio for its text (~15 characters per second of
+audio, like conversational speech) and takes STUB_RTF seconds per second of audio to
+"generate" it, sleeping the way a real model releases the GIL inside its kernels.
+Output depends only on the text, so runs are reproducible.
+"""
+
+import os
+import sys
+import time
+import types
+import wave
+import zlib
+import importlib.util
+
+import numpy as np
+
+STUB_RTF = float(os.getenv("STUB_RTF", "0.1"))
+CHARS_PER_SECOND = 15.0
+
+
+def stub_waveform(text: str, sample_rate: int) -> np.ndarray:
+    """Speech-length, text-seeded tone + noise, float32 in [-1, 1]"""
+    seconds = max(len(text), 1) / CHARS_PER_SECOND
+    rng = np.random.default_rng(zlib.crc32(text.encode("utf-8")))
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    pitch = 110 + rng.integers(0, 80)
+    audio = 0.3 * np.sin(2 * np.pi * pitch * t) * (0.6 + 0.4 * np.sin(2 * np.pi * 3 * t))
+    return (audio + 0.01 * rng.standard_normal(len(t))).astype(np.float32)
+
+
+def _simulate_generation(audio: np.ndarray, sample_rate: int) -> None:
+    time.sleep(STUB_RTF * len(audio) / sample_rate)
+
+
+# --- chatterbox.tts ---
+
+def _chatterbox_module() -> types.ModuleType:
+    import torch
+
+    class Conditionals:
+        def __init__(self, speaker_emb):
+            self.speaker_emb = speaker_emb
+
+        def to(self, device):
+            return self
+
+        def save(self, fpath):
+            torch.save({"speaker_emb": self.speaker_emb}, fpath)
+
+        @classmethod
+        def load(cls, fpath, map_location="cpu"):
+            return cls(torch.load(fpath, map_location=map_location, weights_only=True)["speaker_emb"])
+
+    class ChatterboxTTS:
+        sr = 24000
+
+        def __init__(self):
+            self.conds = Conditionals(torch.zeros(256))
+
+        @classmethod
+        def from_pretrained(cls, device):
+            return cls()
+
+        def prepare_conditionals(self, wav_fpath, exaggeration=0.5):
+            time.sleep(0.05)  # load + embed the reference clip
+            self.conds = Conditionals(torch.full((256,), float(zlib.crc32(wav_fpath.encode()) % 97)))
+
+        def generate(self, text, audio_prompt_path=None, exaggeration=0.5, cfg_weight=0.5, **kwargs):
+            if audio_prompt_path:
+                self.prepare_conditionals(audio_prompt_path, exaggeration)
+            audio = stub_waveform(text, self.sr)
+            _simulate_generation(audio, self.sr)
+            return torch.from_numpy(audio).unsqueeze(0)
+
+    module = types.ModuleType("chatterbox.tts")
+    module.ChatterboxTTS = ChatterboxTTS
+    module.Conditionals = Conditionals
+    return module
+
+
+# --- TTS.api (coqui XTTS) ---
+
+def _coqui_module() -> types.ModuleType:
+    sample_rate = 24000
+    tokens_per_second = 21.5  # XTTS GPT audio tokens per second of speech
+
+    class XttsConfig:
+        gpt_cond_len = 30
+        gpt_cond_chunk_len = 4
+        max_ref_len = 30
+        sound_norm_refs = False
+
+    class Xtts:
+        """synthesizer.tts_model: conditioning + incremental inference, like XTTS-v2"""
+        config = XttsConfig()
+
+        def get_conditioning_latents(self, audio_path, **kwargs):
+            import torch
+
+            time.sleep(0.05)  # load + embed the reference clip
+            seed = float(zlib.crc32(audio_path[0].encode()) % 97)
+            return torch.full((1, 32, 1024), seed), torch.full((1, 512, 1), seed)
+
+        def inference_stream(self, text, language, gpt_cond_latent, speaker_embedding,
+                             stream_chunk_size=20, **kwargs):
+            import torch
+
+            audio = stub_waveform(text, sample_rate)
+            step = max(1, int(stream_chunk_size / tokens_per_second * sample_rate))
+            for start in range(0, len(audio), step):
+                chunk = audio[start:start + step]
+                _simulate_generation(chunk, sample_rate)
+                yield torch.from_numpy(chunk)
+
+    class Synthesizer:
+        def __init__(self):
+            self.tts_model = Xtts()
+
+    class TTS:
+        output_sample_rate = sample_rate
+
+        def __init__(self, model_name=None, *args, **kwargs):
+            self.model_name = model_name
+            self.synthesizer = Synthesizer()
+
+        def to(self, device):
+            return self
+
+        def tts(self, text, speaker_wav=None, language=None, **kwargs):
+            audio = stub_waveform(text, self.output_sample_rate)
+            _simulate_generation(audio, self.output_sample_rate)
+            return list(audio)
+
+    module = types.ModuleType("TTS.api")
+    module.TTS = TTS
+    return module
+
+
+# --- pyttsx3 ---
+
+def _pyttsx3_module() -> types.ModuleType:
+    sample_rate = 22050  # espeak / SAPI default
+
+    class Engine:
+        def __init__(self):
+            self._properties = {"voices": [], "rate": 200, "volume": 1.0}
+            self._queue = []
+
+        def getProperty(self, name):
+            return self._properties.get(name)
+
+        def setProperty(self, name, value):
+            self._properties[name] = value
+
+        def save_to_file(self, text, filename):
+            self._queue.append((text, filename))
+
+        def runAndWait(self):
+            # Same fixture format as create_dummy_wav.py: 16-bit mono WAV
+            for text, filename in self._queue:
+                audio = stub_waveform(text, sample_rate)
+                _simulate_generation(audio, sample_rate)
+                with wave.open(filename, "w") as wav_file:
+                    wav_file.setnchannels(1)
+                    wav_file.setsampwidth(2)
+                    wav_file.setframerate(sample_rate)
+                    wav_file.writeframes((audio * 32767).astype("<i2").tobytes())
+            self._queue.clear()
+
+    module = types.ModuleType("pyttsx3")
+    module.init = lambda *args, **kwargs: Engine()
+    return module
+
+
+STUBS = {
+    "chatterbox.tts": _chatterbox_module,
+    "TTS.api": _coqui_module,
+    "pyttsx3": _pyttsx3_module,
+}
+
+
+def _importable(name: str) -> bool:
+    try:
+        return importlib.util.find_spec(name) is not None
+    except ModuleNotFoundError:
+        return False
+
+
+def install(force: bool = False) -> dict:
+    """Stub every engine that is missing (or all of them with force); returns {module: "real" | "stub"}"""
+    engines = {}
+    for name, build in STUBS.items():
+        if not force and _importable(name):
+            engines[name] = "real"
+            continue
+        module = build()
+        parent_name = name.split(".")[0]
+        if "." in name:
+            parent = sys.modules.get(parent_name) if force else None
+            if parent is None:
+                parent = types.ModuleType(parent_name)
+                parent.__path__ = []
+                sys.modules[parent_name] = parent
+            setattr(parent, name.split(".", 1)[1], module)
+        sys.modules[name] = module
+        engines[name] = "stub"
+    return engines
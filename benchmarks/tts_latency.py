@@ -0,0 +1,402 @@
+"""
+Cross-service TTS latency benchmark
+  python -m benchmarks.tts_latency [--services chatterbox,xtts,local] [--requests 20]
+                                   [--concurrency 1,4,8] [--json results.json]
+                                   [--baseline previous.json] [--stub]
+
+Each service's FastAPI app is loaded in-process and driven over ASGI directly (no
+sockets), so the numbers are the service's own: queueing, conditioning lookup,
+generation, resampling, encoding. Engines that are not installed are replaced by the
+deterministic stubs in benchmarks/stub_engines.py (--stub forces them everywhere), which
+"generate" at a fixed STUB_RTF; the real model is used wherever it imports.
+
+Per endpoint, all requesting 8 kHz μ-law (what a phone call consumes):
+  - TTFB and total latency, sequential requests (p50 / p95 / p99)
+  - real-time factor: wall time / seconds of audio returned
+  - throughput at each concurrency level: utterances/s and audio seconds/s
+  - memory: Python heap peak for one request (tracemalloc), process RSS, CUDA peak
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import asyncio
+import platform
+import argparse
+import tempfile
+import tracemalloc
+import importlib.util
+from contextlib import contextmanager, redirect_stdout
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from benchmarks import stub_engines
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ULAW_BYTES_PER_SECOND = 8000
+
+# Typical call turns: opener, filler, objection handling, voicemail drop
+TEXTS = [
+    "Hi, this is Alex from the sales team.",
+    "Got it, thanks.",
+    "That makes sense. A lot of teams we talk to were in the same spot before switching over.",
+    "Would Tuesday or Thursday afternoon work better for a quick fifteen minute call?",
+    "Sorry I missed you! I'll send a short email with the details, and you can reply whenever it suits you.",
+    "Totally understand. Just so I know, is it the timing, or is it that the current tool is working well enough?",
+]
+
+
+@dataclass
+class Endpoint:
+    path: str
+    body: dict
+
+
+@dataclass
+class Service:
+    name: str
+    directory: str
+    module: str
+    engine: str
+    endpoints: List[Endpoint] = field(default_factory=list)
+    ready_path: Optional[str] = None  # Polled after startup when the model loads in the background
+
+
+SERVICES: Dict[str, Service] = {
+    "chatterbox": Service("chatterbox", "chatterbox-tts-service", "app", "chatterbox.tts", [
+        Endpoint("/synthesize", {"output_format": "ulaw"}),
+        Endpoint("/synthesize/stream", {"output_format": "ulaw"}),
+    ]),
+    "xtts": Service("xtts", "voice-service", "main", "TTS.api", [
+        Endpoint("/tts", {"output_format": "ulaw"}),
+    ], ready_path="/ready"),
+    "local": Service("local", "local-tts-service", "app", "pyttsx3", [
+        Endpoint("/synthesize", {"output_format": "ulaw"}),
+    ]),
+}
+
+
+# --- In-process ASGI client ---
+
+@dataclass
+class Result:
+    status: int
+    ttfb_s: float
+    total_s: float
+    body_bytes: int
+
+    @property
+    def audio_s(self) -> float:
+        return self.body_bytes / ULAW_BYTES_PER_SECOND
+
+
+async def asgi_post(app, path: str, payload: Optional[dict] = None, method: str = "POST") -> Result:
+    """
+    POST JSON straight into the ASGI app, timing the first non-empty body chunk.
+    (httpx's ASGITransport buffers the whole body, which would hide streaming TTFB.)
+    """
+    body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": method, "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": b"", "root_path": "",
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        "client": ("benchmark", 0), "server": ("benchmark", 80),
+    }
+    request_sent = False
+    response_done = asyncio.Event()
+    status, first_byte_at, received = 0, None, 0
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await response_done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status, first_byte_at, received
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            chunk = message.get("body", b"")
+            if chunk and first_byte_at is None:
+                first_byte_at = time.perf_counter()
+            received += len(chunk)
+            if not message.get("more_body", False):
+                response_done.set()
+
+    started = time.perf_counter()
+    await app(scope, receive, send)
+    finished = time.perf_counter()
+    return Result(status, (first_byte_at or finished) - started, finished - started, received)
+
+
+async def wait_ready(app, path: str, timeout_s: float = 600.0) -> None:
+    """Poll a readiness endpoint until it answers 200"""
+    deadline = time.perf_counter() + timeout_s
+    while (await asgi_post(app, path, method="GET")).status != 200:
+        if time.perf_counter() > deadline:
+            raise TimeoutError(f"{path} not ready after {timeout_s:.0f}s")
+        await asyncio.sleep(0.05)
+
+
+# --- Loading services ---
+
+@contextmanager
+def service_context(service: Service, workdir: str, max_concurrency: int):
+    """cwd, import path and env a service expects; caches pointed at scratch dirs and disabled"""
+    service_dir = os.path.join(REPO_ROOT, service.directory)
+    previous_cwd, previous_env = os.getcwd(), dict(os.environ)
+    os.environ.update({
+        "VOICES_DIR": os.path.join(workdir, "voices"),
+        "AUDIO_CACHE_DIR": "",
+        "AUDIO_CACHE_MEMORY_MB": "0",
+        "AUDIO_PACKS_DIR": os.path.join(workdir, "packs"),
+        "TTS_MAX_QUEUE": str(max(8, max_concurrency * 2)),
+    })
+    sys.path.insert(0, service_dir)
+    os.chdir(service_dir)  # voice-service resolves speakers/ relative to the cwd
+    try:
+        yield service_dir
+    finally:
+        os.chdir(previous_cwd)
+        sys.path.remove(service_dir)
+        os.environ.clear()
+        os.environ.update(previous_env)
+
+
+def load_app(service: Service, service_dir: str):
+    path = os.path.join(service_dir, f"{service.module}.py")
+    spec = importlib.util.spec_from_file_location(f"benchmark_{service.name}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.app
+
+
+# --- Measurements ---
+
+def percentiles(values: List[float]) -> Optional[dict]:
+    if not values:
+        return None
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {"p50": round(float(p50), 4), "p95": round(float(p95), 4), "p99": round(float(p99), 4)}
+
+
+def rss_mib() -> Optional[float]:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+def cuda_peak_mib() -> Optional[float]:
+    torch = sys.modules.get("torch")
+    if torch is None or not torch.cuda.is_available():
+        return None
+    return round(torch.cuda.max_memory_allocated() / 2 ** 20, 1)
+
+
+def payload_for(endpoint: Endpoint, i: int) -> dict:
+    return {**endpoint.body, "text": TEXTS[i % len(TEXTS)]}
+
+
+async def measure_sequential(app, endpoint: Endpoint, requests: int) -> dict:
+    results = [await asgi_post(app, endpoint.path, payload_for(endpoint, i)) for i in range(requests)]
+    ok = [r for r in results if r.status == 200 and r.body_bytes]
+    return {
+        "requests": requests,
+        "errors": len(results) - len(ok),
+        "ttfb_s": percentiles([r.ttfb_s for r in ok]),
+        "total_s": percentiles([r.total_s for r in ok]),
+        "rtf": percentiles([r.total_s / r.audio_s for r in ok]),
+        "audio_s_mean": round(float(np.mean([r.audio_s for r in ok])), 3) if ok else None,
+        "chars_per_s": round(sum(len(payload_for(endpoint, i)["text"]) for i in range(requests))
+                             / sum(r.total_s for r in results), 1),
+    }
+
+
+async def measure_concurrent(app, endpoint: Endpoint, concurrency: int, requests: int) -> dict:
+    counter = iter(range(requests))
+    results: List[Result] = []
+
+    async def worker():
+        for i in counter:
+            results.append(await asgi_post(app, endpoint.path, payload_for(endpoint, i)))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    ok = [r for r in results if r.status == 200 and r.body_bytes]
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "rejected": sum(r.status == 429 for r in results),
+        "errors": sum(r.status not in (200, 429) for r in results),
+        "utterances_per_s": round(len(ok) / elapsed, 2),
+        "audio_s_per_s": round(sum(r.audio_s for r in ok) / elapsed, 2),
+        "ttfb_s": percentiles([r.ttfb_s for r in ok]),
+        "total_s": percentiles([r.total_s for r in ok]),
+    }
+
+
+async def measure_memory(app, endpoint: Endpoint) -> dict:
+    tracemalloc.start()
+    try:
+        await asgi_post(app, endpoint.path, payload_for(endpoint, 4))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"python_peak_kib": round(peak / 1024, 1), "rss_mib": rss_mib(), "cuda_peak_mib": cuda_peak_mib()}
+
+
+async def benchmark_service(service: Service, args, engines: dict) -> List[dict]:
+    rows = []
+    service_log = sys.stdout if args.verbose else io.StringIO()
+    with redirect_stdout(service_log), tempfile.TemporaryDirectory() as workdir, service_context(service, workdir, max(args.concurrency)) as service_dir:
+        rss_before = rss_mib()
+        load_started = time.perf_counter()
+        try:
+            app = load_app(service, service_dir)
+        except Exception as e:
+            print(f"⚠️  {service.name}: skipped ({e})", file=sys.stderr)
+            return [{"service": service.name, "skipped": str(e)}]
+        async with app.router.lifespan_context(app):
+            if service.ready_path:
+                await wait_ready(app, service.ready_path)
+            load_s = time.perf_counter() - load_started
+            for endpoint in service.endpoints:
+                print(f"⏱️  {service.name} {endpoint.path} ...", file=sys.stderr)
+                for i in range(args.warmup):
+                    await asgi_post(app, endpoint.path, payload_for(endpoint, i))
+                row = {
+                    "service": service.name,
+                    "endpoint": endpoint.path,
+                    "engine": engines.get(service.engine, "real"),
+                    "load_s": round(load_s, 3),
+                    "rss_before_load_mib": rss_before,
+                    "sequential": await measure_sequential(app, endpoint, args.requests),
+                    "concurrent": [
+                        await measure_concurrent(app, endpoint, n, max(args.requests, n * 2))
+                        for n in args.concurrency
+                    ],
+                    "memory": await measure_memory(app, endpoint),
+                }
+                rows.append(row)
+    return rows
+
+
+# --- Reporting ---
+
+def _ms(stats: Optional[dict], key: str) -> str:
+    return f"{stats[key] * 1000:.1f}" if stats else "-"
+
+
+def print_tables(rows: List[dict]) -> None:
+    measured = [r for r in rows if "skipped" not in r]
+    print(f"\n{'service':<32}{'engine':>7}{'ttfb p50':>10}{'p95':>9}{'p99':>9}"
+          f"{'total p50':>11}{'p95':>9}{'rtf p50':>9}{'rtf p95':>9}{'chars/s':>9}{'heap KiB':>10}")
+    for r in measured:
+        s = r["sequential"]
+        rtf = s["rtf"] or {"p50": float("nan"), "p95": float("nan")}
+        print(f"{r['service'] + ' ' + r['endpoint']:<32}{r['engine']:>7}"
+              f"{_ms(s['ttfb_s'], 'p50'):>10}{_ms(s['ttfb_s'], 'p95'):>9}{_ms(s['ttfb_s'], 'p99'):>9}"
+              f"{_ms(s['total_s'], 'p50'):>11}{_ms(s['total_s'], 'p95'):>9}"
+              f"{rtf['p50']:>9.3f}{rtf['p95']:>9.3f}{s['chars_per_s']:>9}{r['memory']['python_peak_kib']:>10}")
+    print("  (latencies in ms)")
+
+    print(f"\n{'service':<32}{'conc':>5}{'utt/s':>8}{'audio s/s':>11}{'ttfb p50':>10}{'p95':>9}"
+          f"{'total p95':>11}{'429s':>6}{'errors':>8}")
+    for r in measured:
+        for c in r["concurrent"]:
+            print(f"{r['service'] + ' ' + r['endpoint']:<32}{c['concurrency']:>5}{c['utterances_per_s']:>8}"
+                  f"{c['audio_s_per_s']:>11}{_ms(c['ttfb_s'], 'p50'):>10}{_ms(c['ttfb_s'], 'p95'):>9}"
+                  f"{_ms(c['total_s'], 'p95'):>11}{c['rejected']:>6}{c['errors']:>8}")
+    for r in rows:
+        if "skipped" in r:
+            print(f"\n{r['service']}: skipped ({r['skipped']})")
+
+
+def compare_to_baseline(rows: List[dict], baseline_path: str, tolerance: float) -> List[str]:
+    """Regressions beyond `tolerance` (fractional) in TTFB p50 or peak throughput"""
+    with open(baseline_path) as f:
+        baseline = {(r["service"], r.get("endpoint")): r for r in json.load(f)["results"] if "skipped" not in r}
+    regressions = []
+    for r in rows:
+        old = baseline.get((r["service"], r.get("endpoint")))
+        if "skipped" in r or old is None or not (r["sequential"]["ttfb_s"] and old["sequential"]["ttfb_s"]):
+            continue
+        name = f"{r['service']} {r['endpoint']}"
+        new_ttfb, old_ttfb = r["sequential"]["ttfb_s"]["p50"], old["sequential"]["ttfb_s"]["p50"]
+        if new_ttfb > old_ttfb * (1 + tolerance):
+            regressions.append(f"{name}: TTFB p50 {old_ttfb * 1000:.1f} -> {new_ttfb * 1000:.1f} ms")
+        new_tput = max(c["utterances_per_s"] for c in r["concurrent"])
+        old_tput = max(c["utterances_per_s"] for c in old["concurrent"])
+        if new_tput < old_tput * (1 - tolerance):
+            regressions.append(f"{name}: peak throughput {old_tput} -> {new_tput} utt/s")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="TTS service latency benchmark")
+    parser.add_argument("--services", default=",".join(SERVICES), help="Comma-separated: " + ", ".join(SERVICES))
+    parser.add_argument("--requests", type=int, default=20, help="Sequential requests per endpoint")
+    parser.add_argument("--concurrency", default="1,4,8", help="Comma-separated concurrency levels")
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--verbose", action="store_true", help="Show the services' own log output")
+    parser.add_argument("--stub", action="store_true", help="Use stub engines even where real ones are installed")
+    parser.add_argument("--json", dest="json_path", help="Write machine-readable results here")
+    parser.add_argument("--baseline", help="Previous --json output to compare against (exit 1 on regression)")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed regression vs. baseline")
+    args = parser.parse_args(argv)
+    args.concurrency = [int(n) for n in args.concurrency.split(",")]
+
+    engines = stub_engines.install(force=args.stub)
+    print(f"Engines: {', '.join(f'{k}={v}' for k, v in engines.items())} (stub RTF {stub_engines.STUB_RTF})")
+
+    rows = []
+    for name in args.services.split(","):
+        rows.extend(asyncio.run(benchmark_service(SERVICES[name.strip()], args, engines)))
+    print_tables(rows)
+
+    if args.json_path:
+        report = {
+            "meta": {
+                "timestamp": datetime.utcnow().isoformat(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+                "engines": engines,
+                "stub_rtf": stub_engines.STUB_RTF,
+                "requests": args.requests,
+                "concurrency": args.concurrency,
+            },
+            "results": rows,
+        }
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Results written to {args.json_path}")
+
+    if args.baseline:
+        regressions = compare_to_baseline(rows, args.baseline, args.tolerance)
+        for line in regressions:
+            print(f"❌ Regression: {line}")
+        if regressions:
+            return 1
+        print("✅ No regressions vs. baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
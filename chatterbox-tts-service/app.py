@@ -2,53 +2,314 @@
 Chatterbox TTS Microservice
 Provides fast, high-quality text-to-speech with voice cloning
 Compatible with Twilio Media Streams (μ-law audio format)
+
+Synthesis is served by the shared core (tts_common/serving.py): /synthesize,
+/synthesize/stream, /ws/synthesize, /ready, /cancel/{request_id}, /metrics.
+ChatterboxEngine plugs this service's inference pool and campaign packs into it;
+ the endpoints below are Chatterbox's own (voices, pre-render, cache stats).
 """
 
 import os
-import io
-import base64
+import sys
 import asyncio
-from typing import Optional
-from fastapi import FastAPI, HTTPException, File, UploadFile
-from fastapi.responses import StreamingResponse, Response
+import threading
+from contextlib import ExitStack, contextmanager
+from datetime import datetime
+from importlib import metadata
+from typing import AsyncIterator, List, Optional
+from fastapi import FastAPI, HTTPException, File, UploadFile, BackgroundTasks
 from pydantic import BaseModel
-import torchaudio as ta
 import torch
 import numpy as np
-from scipy.io import wavfile
 
 # Import Chatterbox
 from chatterbox.tts import ChatterboxTTS
 
+# Shared TTS helpers: ../tts_common in the repo, /app/tts_common in the Docker image
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tts_common.cancellation import CancellationRegistry, Cancelled, install_step_hooks, run_until_cancelled
+from tts_common.metrics import TTSMetrics
+from tts_common.segmenter import segment_text
+from tts_common.audio_cache import RenderedAudioCache
+from tts_common.engine import TTSEngine
+from tts_common.serving import SynthesisRequest, TTSServer
+
+from voice_conditioning import VoiceConditioningCache
+from inference_pool import InferencePool, PoolSaturated
+from audio_pack import AudioPackStore
+from cpu_profile import CPUProfile, self_benchmark
+
 # Initialize FastAPI
 app = FastAPI(title="Chatterbox TTS Service", version="1.0.0")
 
 # Global model instance
 model = None
-DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
+DEVICE = os.getenv("DEVICE") or ("cuda" if torch.cuda.is_available() else "cpu")
+if DEVICE == "cuda" and not torch.cuda.is_available():
+    print("⚠️ DEVICE=cuda but CUDA is not available, falling back to CPU")
+    DEVICE = "cpu"
+
+# CPU nodes: threading/pinning, int8 dynamic quantization, optional torch.compile (see cpu_profile.py)
+cpu_profile = CPUProfile.from_env() if DEVICE == "cpu" else None
+# Startup self-benchmark (real-time factor actually achieved), reported in /health
+SELF_BENCHMARK = os.getenv("SELF_BENCHMARK", "1" if DEVICE == "cpu" else "0") == "1"
+SELF_BENCHMARK_TEXT = os.getenv(
+    "SELF_BENCHMARK_TEXT",
+    "Hi, this is Alex. I was hoping to grab two minutes to see if this is a good time to talk."
+)
+self_benchmark_report = None
+
+# Voice samples directory
+VOICES_DIR = os.getenv("VOICES_DIR", "/app/voices")
+
+# model.generate is not re-entrant: serialize access between the request loop and stream workers
+MODEL_LOCK = threading.RLock()
+
+# Generation runs off the event loop, with a bounded number of admitted requests (429 beyond that)
+inference_pool = InferencePool(
+    workers=int(os.getenv("TTS_WORKERS", "1")),
+    max_queue=int(os.getenv("TTS_MAX_QUEUE", "8")),
+    retry_after_s=int(os.getenv("TTS_RETRY_AFTER_S", "2"))
+)
+
+# Per-stage latency, RTF and queue depth on /metrics (Prometheus)
+metrics = TTSMetrics("chatterbox")
+
+# In-flight requests by X-Request-ID: POST /cancel/{request_id} or a client disconnect
+# stops generation at the next segment / decoding step (see tts_common/cancellation.py)
+cancellations = CancellationRegistry()
+
+# Precomputed voice conditioning per voice_id (disk + in-memory LRU), set up at startup
+voice_cache: Optional[VoiceConditioningCache] = None
+# Built-in voice conditioning shipped with the model (voice_id "default")
+default_conds = None
 
-# Voice cache for different personas
-VOICE_CACHE = {}
+# Rendered-audio cache: final encoded bytes keyed by content (memory LRU + disk tier)
+audio_cache = RenderedAudioCache(
+    cache_dir=os.getenv("AUDIO_CACHE_DIR", os.path.join(os.getenv("CACHE_DIR", "/root/.cache"), "rendered-audio")) or None,
+    memory_bytes=int(os.getenv("AUDIO_CACHE_MEMORY_MB", "64")) * 1024 * 1024,
+    max_disk_bytes=int(os.getenv("AUDIO_CACHE_DISK_MB", "2048")) * 1024 * 1024
+)
 
-class TTSRequest(BaseModel):
-    text: str
-    voice_id: Optional[str] = "default"
-    audio_prompt_path: Optional[str] = None
+# Campaign pre-render packs: memory-mapped μ-law, served without generation or file reads
+audio_packs = AudioPackStore(
+    os.getenv("AUDIO_PACKS_DIR", os.path.join(os.getenv("CACHE_DIR", "/root/.cache"), "audio-packs"))
+)
+# Pre-render progress per campaign_id
+prerender_jobs = {}
+
+def _model_version() -> str:
+    """Part of the cache key, so upgrading Chatterbox never serves audio from the old model"""
+    if os.getenv("CHATTERBOX_MODEL_VERSION"):
+        return os.getenv("CHATTERBOX_MODEL_VERSION")
+    try:
+        return metadata.version("chatterbox-tts")
+    except metadata.PackageNotFoundError:
+        return "unknown"
+
+MODEL_VERSION = _model_version()
+
+class ChatterboxRequest(SynthesisRequest):
+    """The shared synthesis request plus Chatterbox's own settings"""
+    audio_prompt_path: Optional[str] = None  # Reference clip on this host, instead of a cloned voice_id
+    exaggeration: Optional[float] = 0.5
+    cfg_weight: Optional[float] = 0.5
+
+class PrerenderRequest(BaseModel):
+    phrases: List[str]
+    voices: List[str] = ["default"]
     exaggeration: Optional[float] = 0.5
     cfg_weight: Optional[float] = 0.5
-    output_format: Optional[str] = "mp3"  # mp3, wav, ulaw (for Twilio)
 
 class VoiceCloneRequest(BaseModel):
     voice_id: str
     description: Optional[str] = None
 
+def resolve_conditionals(voice_id: str, audio_prompt_path: Optional[str] = None):
+    """Precomputed voice conditioning for a request (falls back to the built-in voice)"""
+    if audio_prompt_path:
+        return voice_cache.for_prompt_path(audio_prompt_path)
+    if voice_id and voice_id != "default":
+        conds = voice_cache.get(voice_id)
+        if conds is not None:
+            return conds
+    return default_conds
+
+def generate_wav(text: str, conds, exaggeration: float, cfg_weight: float):
+    """Run the model for one piece of text with the given conditioning (blocking)"""
+    with MODEL_LOCK:
+        model.conds = conds
+        return model.generate(
+            text,
+            exaggeration=exaggeration,
+            cfg_weight=cfg_weight
+        )
+
+async def generate_segments(segments, voice_id: str, job, audio_prompt_path: Optional[str] = None,
+                            exaggeration: float = 0.5, cfg_weight: float = 0.5) -> AsyncIterator[np.ndarray]:
+    """
+    Generate segments in order on the inference pool, yielding each waveform as soon as it is ready.
+    The producer runs ahead by one segment, so segment N+1 is generated while N is being sent.
+    A cancelled job.token raises Cancelled without waiting for the segment in progress.
+    """
+    ready: asyncio.Queue = asyncio.Queue(maxsize=1)
+
+    async def produce():
+        try:
+            conds = await job.run(resolve_conditionals, voice_id, audio_prompt_path, stage="conditioning")
+            for segment in segments:
+                if job.token is not None:
+                    job.token.raise_if_cancelled()
+                wav = await job.run(generate_wav, segment, conds, exaggeration, cfg_weight)
+                await ready.put(wav)
+            await ready.put(None)
+        except Exception as e:
+            await ready.put(e)
+
+    producer = asyncio.create_task(produce())
+    try:
+        while True:
+            if job.token is not None:
+                item = await run_until_cancelled(ready.get(), job.token)
+            else:
+                item = await ready.get()
+            if item is None:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield to_mono_numpy(item)
+    finally:
+        # Client went away (or finished): stop generating further segments
+        producer.cancel()
+
+def to_mono_numpy(wav_tensor) -> np.ndarray:
+    """Model output tensor (channels, samples) -> mono float32 numpy array"""
+    if wav_tensor.shape[0] > 1:
+        wav_tensor = torch.mean(wav_tensor, dim=0, keepdim=True)
+    return wav_tensor.squeeze(0).detach().cpu().numpy()
+
+class ChatterboxEngine(TTSEngine):
+    """
+    Chatterbox behind the shared serving core. Each request is admitted to the inference
+    pool (429 when it is full) and generated on its workers; campaign packs answer
+    before the rendered-audio cache is looked at.
+    """
+    name = "chatterbox"
+    version = MODEL_VERSION
+
+    def __init__(self):
+        self._jobs = {}  # CancellationToken -> the InferenceJob it was admitted with
+
+    @property
+    def sample_rate(self) -> int:
+        return model.sr
+
+    def load(self) -> None:
+        """Model, voice conditioning, packs and the self-benchmark"""
+        global model, voice_cache, default_conds, self_benchmark_report
+        if cpu_profile:
+            cpu_profile.configure_runtime()
+        print(f"🚀 Loading Chatterbox TTS model on {DEVICE}...")
+        model = ChatterboxTTS.from_pretrained(device=DEVICE)
+        if cpu_profile:
+            cpu_profile.apply(model)
+            print(f"🧮 CPU profile: {cpu_profile.summary()}")
+        # T3's transformer runs once per generated speech token; S3Gen once per utterance
+        hooked = install_step_hooks(model, "t3.tfmr", "s3gen")
+        print(f"✋ Cancellation checked at each step of: {', '.join(hooked) or 'segments only'}")
+        default_conds = model.conds
+
+        voice_cache = VoiceConditioningCache(
+            model, VOICES_DIR, DEVICE, MODEL_LOCK,
+            capacity=int(os.getenv("VOICE_CACHE_SIZE", "32")),
+            exaggeration=float(os.getenv("DEFAULT_EXAGGERATION", "0.5"))
+        )
+        voice_count = voice_cache.warm()
+        print(f"🎙️ Voice conditioning ready for {voice_count} cloned voices")
+        print(f"📼 Loaded {audio_packs.load_all()} pre-rendered campaign packs")
+
+        if SELF_BENCHMARK:
+            self_benchmark_report = self_benchmark(
+                lambda text: self.generate(text, "default"),
+                model.sr,
+                SELF_BENCHMARK_TEXT,
+                runs=int(os.getenv("SELF_BENCHMARK_RUNS", "2"))
+            )
+            metrics.last_real_time_factor.set(self_benchmark_report["rtf"] or 0)
+            status = "real-time capable" if self_benchmark_report["realtime_capable"] else "SLOWER than real time"
+            print(f"⏱️ Self-benchmark: RTF {self_benchmark_report['rtf']} ({status})")
+
+    def voices(self) -> List[str]:
+        return ["default"] + (voice_cache.voice_ids() if voice_cache else [])
+
+    def voice_revision(self, voice_id: str) -> str:
+        return "default" if voice_id == "default" else f"{voice_id}:{voice_cache.revision(voice_id)}"
+
+    def request_options(self, request: ChatterboxRequest) -> dict:
+        options = {"exaggeration": request.exaggeration, "cfg_weight": request.cfg_weight}
+        if request.audio_prompt_path:
+            path = os.path.abspath(request.audio_prompt_path)
+            if not os.path.exists(path):
+                raise HTTPException(status_code=404, detail=f"audio_prompt_path not found: {request.audio_prompt_path}")
+            # The mtime is only there for the cache key: replacing the clip renders afresh
+            options.update(audio_prompt_path=path, audio_prompt_mtime=os.path.getmtime(path))
+        return options
+
+    def conditioning(self, voice_id: str) -> str:
+        """The voice id: conditioning is resolved on the inference pool (building it runs the model)"""
+        return voice_id
+
+    def generate(self, text: str, voice_id: str, exaggeration: float = 0.5, cfg_weight: float = 0.5,
+                 audio_prompt_path: Optional[str] = None, audio_prompt_mtime: Optional[float] = None) -> np.ndarray:
+        """Blocking, outside the inference pool (startup self-benchmark)"""
+        conds = resolve_conditionals(voice_id, audio_prompt_path)
+        return to_mono_numpy(generate_wav(text, conds, exaggeration, cfg_weight))
+
+    def precomputed(self, key: str):
+        return audio_packs.get(key)
+
+    @contextmanager
+    def admit(self, token, timer=None):
+        """An inference pool slot for the request (PoolSaturated when the queue is full)"""
+        with inference_pool.admit(timer, token) as job:
+            self._jobs[token] = job
+            try:
+                yield job
+            finally:
+                del self._jobs[token]
+
+    async def agenerate(self, text: str, voice_id: str, token, timer=None, audio_prompt_mtime=None,
+                        **options) -> np.ndarray:
+        return np.concatenate([wav async for wav in generate_segments([text], voice_id, self._jobs[token], **options)])
+
+    def astream(self, text: str, voice_id: str, token, timer=None, audio_prompt_mtime=None,
+                **options) -> AsyncIterator[np.ndarray]:
+        return generate_segments(segment_text(text), voice_id, self._jobs[token], **options)
+
+engine = ChatterboxEngine()
+
+server = TTSServer(
+    engine,
+    metrics=metrics,
+    cancellations=cancellations,
+    cache=audio_cache,
+    default_format="mp3",
+    request_model=ChatterboxRequest
+)
+app.include_router(server.router())
+
 @app.on_event("startup")
 async def startup_event():
     """Load Chatterbox model on startup"""
-    global model
-    print(f"🚀 Loading Chatterbox TTS model on {DEVICE}...")
-    model = ChatterboxTTS.from_pretrained(device=DEVICE)
-    print("✅ Chatterbox TTS ready!")
+    server.start(wait=True)
+    metrics.track(
+        in_flight=lambda: inference_pool.in_flight,
+        queued=lambda: inference_pool.waiting
+    )
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    inference_pool.shutdown()
 
 @app.get("/health")
 async def health_check():
@@ -57,81 +318,66 @@ async def health_check():
         "status": "healthy",
         "model_loaded": model is not None,
         "device": DEVICE,
-        "cuda_available": torch.cuda.is_available()
+        "cuda_available": torch.cuda.is_available(),
+        "cpu_profile": cpu_profile.summary() if cpu_profile else None,
+        "self_benchmark": self_benchmark_report,
+        "inference": inference_pool.summary(),
+        "serving": server.summary()
     }
 
-@app.post("/synthesize")
-async def synthesize_speech(request: TTSRequest):
+@app.get("/cache/stats")
+async def cache_stats():
+    """Rendered-audio cache hit rate and usage"""
+    return {**audio_cache.summary(), "packs": audio_packs.summary(), "model_version": MODEL_VERSION}
+
+@app.post("/campaigns/{campaign_id}/prerender", status_code=202)
+async def prerender_campaign(campaign_id: str, request: PrerenderRequest, background_tasks: BackgroundTasks):
     """
-    Synthesize speech from text
-    Returns audio in requested format (mp3, wav, or ulaw for Twilio)
+    Render every phrase × voice for a campaign in the background into one μ-law pack
+    At call time /synthesize (output_format=ulaw) and /ws/synthesize serve matching phrases
+    from the pack. POST /cancel/prerender-{campaign_id} stops a running pre-render.
     """
     if model is None:
         raise HTTPException(status_code=503, detail="Model not loaded")
+    if not campaign_id.replace("-", "").replace("_", "").isalnum():
+        raise HTTPException(status_code=400, detail="campaign_id may only contain letters, digits, - and _")
+    phrases = [p.strip() for p in request.phrases if p.strip()]
+    if not phrases:
+        raise HTTPException(status_code=400, detail="phrases is required")
+    unknown = [v for v in request.voices if v != "default" and v not in voice_cache.voice_ids()]
+    if unknown:
+        raise HTTPException(status_code=404, detail=f"Unknown voices: {', '.join(unknown)}")
+    if prerender_jobs.get(campaign_id, {}).get("status") == "rendering":
+        raise HTTPException(status_code=409, detail="Pre-render already in progress for this campaign")
     
+    # Holds one inference slot for the whole job, so live calls keep the rest
+    token = cancellations.register(f"prerender-{campaign_id}")
+    admission = ExitStack()
     try:
-        print(f"[TTS] Synthesizing: {request.text[:50]}...")
-        
-        # Get audio prompt path if voice_id is specified
-        audio_prompt_path = None
-        if request.audio_prompt_path:
-            audio_prompt_path = request.audio_prompt_path
-        elif request.voice_id != "default" and request.voice_id in VOICE_CACHE:
-            audio_prompt_path = VOICE_CACHE[request.voice_id]
-        
-        # Generate speech
-        wav = model.generate(
-            request.text,
-            audio_prompt_path=audio_prompt_path,
-            exaggeration=request.exaggeration,
-            cfg_weight=request.cfg_weight
-        )
-        
-        # Convert to requested format
-        if request.output_format == "ulaw":
-            # Convert to μ-law for Twilio (8kHz, mono)
-            audio_data = convert_to_ulaw(wav, model.sr)
-            return Response(
-                content=audio_data,
-                media_type="audio/basic",
-                headers={"Content-Disposition": "inline; filename=speech.ulaw"}
-            )
-        
-        elif request.output_format == "wav":
-            # Convert to WAV
-            buffer = io.BytesIO()
-            ta.save(buffer, wav, model.sr, format="wav")
-            buffer.seek(0)
-            return Response(
-                content=buffer.read(),
-                media_type="audio/wav",
-                headers={"Content-Disposition": "inline; filename=speech.wav"}
-            )
-        
-        else:  # mp3 (default)
-            # Convert to MP3
-            buffer = io.BytesIO()
-            ta.save(buffer, wav, model.sr, format="mp3")
-            buffer.seek(0)
-            return Response(
-                content=buffer.read(),
-                media_type="audio/mpeg",
-                headers={"Content-Disposition": "inline; filename=speech.mp3"}
-            )
+        admission.enter_context(engine.admit(token))
+    except PoolSaturated as e:
+        cancellations.release(token)
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after_s)})
     
-    except Exception as e:
-        print(f"[TTS] Error: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"TTS generation failed: {str(e)}")
+    prerender_jobs[campaign_id] = {
+        "status": "rendering",
+        "total": len(phrases) * len(request.voices),
+        "rendered": 0,
+        "failed": 0,
+        "started_at": datetime.utcnow().isoformat()
+    }
+    background_tasks.add_task(render_campaign_pack, campaign_id, phrases, request, token, admission)
+    print(f"[TTS] Pre-rendering {prerender_jobs[campaign_id]['total']} phrases for campaign {campaign_id}")
+    return {"campaign_id": campaign_id, **prerender_jobs[campaign_id]}
 
-@app.post("/synthesize/stream")
-async def synthesize_speech_stream(request: TTSRequest):
-    """
-    Stream synthesized speech (for future real-time streaming support)
-    Currently returns full audio but can be extended for chunk streaming
-    """
-    # For now, return the full audio
-    # Future: implement chunk-by-chunk streaming
-    return await synthesize_speech(request)
+@app.get("/campaigns/{campaign_id}/prerender")
+async def prerender_status(campaign_id: str):
+    """Pre-render progress and the loaded pack for a campaign"""
+    status = prerender_jobs.get(campaign_id)
+    pack = audio_packs.info(campaign_id)
+    if status is None and pack is None:
+        raise HTTPException(status_code=404, detail="No pre-render for this campaign")
+    return {"campaign_id": campaign_id, **(status or {"status": "completed"}), "pack": pack}
 
 @app.post("/clone-voice")
 async def clone_voice(
@@ -145,18 +391,17 @@ async def clone_voice(
     """
     try:
         # Create voices directory if it doesn't exist
-        voices_dir = "/app/voices"
-        os.makedirs(voices_dir, exist_ok=True)
+        os.makedirs(VOICES_DIR, exist_ok=True)
         
         # Save the uploaded file
-        file_path = os.path.join(voices_dir, f"{voice_id}.wav")
+        file_path = voice_cache.wav_path(voice_id)
         
         content = await audio_file.read()
         with open(file_path, "wb") as f:
             f.write(content)
         
-        # Cache the voice
-        VOICE_CACHE[voice_id] = file_path
+        # Compute the voice conditioning once; synthesis reuses it from now on
+        await asyncio.get_running_loop().run_in_executor(None, voice_cache.register, voice_id)
         
         print(f"✅ Voice cloned: {voice_id} -> {file_path}")
         
@@ -174,50 +419,55 @@ async def clone_voice(
 async def list_voices():
     """List all available cloned voices"""
     return {
-        "voices": list(VOICE_CACHE.keys()),
+        "voices": voice_cache.voice_ids() if voice_cache else [],
         "default_voice": "default"
     }
 
 @app.delete("/voices/{voice_id}")
 async def delete_voice(voice_id: str):
     """Delete a cloned voice"""
-    if voice_id not in VOICE_CACHE:
+    if voice_id not in voice_cache.voice_ids():
         raise HTTPException(status_code=404, detail="Voice not found")
     
-    file_path = VOICE_CACHE[voice_id]
-    if os.path.exists(file_path):
-        os.remove(file_path)
-    
-    del VOICE_CACHE[voice_id]
+    voice_cache.remove(voice_id)
     
     return {"status": "success", "message": f"Voice {voice_id} deleted"}
 
-def convert_to_ulaw(wav_tensor, sample_rate):
-    """
-    Convert audio tensor to μ-law format for Twilio
-    Twilio expects: 8kHz, mono, μ-law encoded
-    """
-    # Resample to 8kHz if needed
-    if sample_rate != 8000:
-        resampler = ta.transforms.Resample(sample_rate, 8000)
-        wav_tensor = resampler(wav_tensor)
-    
-    # Convert to mono if stereo
-    if wav_tensor.shape[0] > 1:
-        wav_tensor = torch.mean(wav_tensor, dim=0, keepdim=True)
-    
-    # Convert to numpy and normalize to int16 range
-    audio_np = wav_tensor.squeeze().numpy()
-    audio_np = np.clip(audio_np, -1.0, 1.0)
-    audio_int16 = (audio_np * 32767).astype(np.int16)
-    
-    # Encode to μ-law
-    # Python doesn't have native μ-law, so we'll use a simple conversion
-    # For production, consider using audioop or a dedicated library
-    import audioop
-    ulaw_data = audioop.lin2ulaw(audio_int16.tobytes(), 2)
-    
-    return ulaw_data
+async def render_campaign_pack(campaign_id: str, phrases: List[str], request: PrerenderRequest, token,
+                               admission: ExitStack) -> None:
+    """Background task: render (or reuse cached) μ-law for every phrase × voice, then write the pack"""
+    status = prerender_jobs[campaign_id]
+    entries = []
+    # Keyed exactly like a /synthesize request with these settings and the service's postprocessing
+    options = engine.request_options(
+        ChatterboxRequest(text="", exaggeration=request.exaggeration, cfg_weight=request.cfg_weight)
+    )
+    with admission:
+        try:
+            for voice_id in request.voices:
+                for phrase in phrases:
+                    try:
+                        entries.append(await server.render_cached(phrase, voice_id, "ulaw", options, token))
+                        status["rendered"] += 1
+                    except Cancelled:
+                        raise
+                    except Exception as e:
+                        print(f"[TTS] Pre-render failed ({voice_id}): {phrase[:50]}... {e}")
+                        status["failed"] += 1
+            
+            meta = {
+                "voices": request.voices,
+                "model_version": MODEL_VERSION,
+                "created_at": datetime.utcnow().isoformat()
+            }
+            await asyncio.get_running_loop().run_in_executor(None, audio_packs.write, campaign_id, entries, meta)
+            status.update(status="completed", completed_at=meta["created_at"])
+            print(f"✅ Campaign {campaign_id}: {status['rendered']} phrases packed ({status['failed']} failed)")
+        except Exception as e:
+            status.update(status="failed", error=str(e))
+            print(f"[TTS] Pre-render error for campaign {campaign_id}: {e}")
+        finally:
+            cancellations.release(token)
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,142 @@
+"""
+Pre-rendered audio packs
+A campaign's scripted lines (opener, voicemail drop, fillers) are known before the first
+call, so they are rendered ahead of time into one pack file per campaign:
+
+    b"TTSPACK1" | uint32 index length | JSON index | μ-law data ...
+
+The index maps a rendered-audio cache key to (offset, length) within the data section.
+Packs are memory-mapped at load time, so serving a phrase is a dict lookup plus a
+memoryview slice of the mapping: no generation, no per-file open/read, no copy.
+"""
+
+import os
+import json
+import mmap
+import struct
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+
+PACK_MAGIC = b"TTSPACK1"
+PACK_SUFFIX = ".pack"
+_HEADER = struct.Struct("<8sI")
+
+
+def write_pack(path: str, entries: Iterable[Tuple[str, bytes]], meta: Optional[dict] = None) -> int:
+    """Write (key, audio) entries as a pack (atomically); returns the data size in bytes"""
+    index, offset, chunks = {}, 0, []
+    for key, data in entries:
+        if key in index:
+            continue
+        index[key] = [offset, len(data)]
+        chunks.append(data)
+        offset += len(data)
+
+    index_bytes = json.dumps({"meta": meta or {}, "entries": index}, separators=(",", ":")).encode("utf-8")
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(PACK_MAGIC, len(index_bytes)))
+        f.write(index_bytes)
+        for data in chunks:
+            f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return offset
+
+
+class AudioPack:
+    """One memory-mapped pack file (read-only)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            magic, index_length = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != PACK_MAGIC:
+                raise ValueError(f"{path} is not an audio pack")
+            index = json.loads(f.read(index_length))
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.meta: dict = index["meta"]
+        self.entries: Dict[str, list] = index["entries"]
+        self._data_start = _HEADER.size + index_length
+        if any(offset + length > self.data_bytes for offset, length in self.entries.values()):
+            self._mmap.close()
+            raise ValueError(f"{path} is truncated")
+        self._view = memoryview(self._mmap)
+
+    def get(self, key: str) -> Optional[memoryview]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        start = self._data_start + entry[0]
+        return self._view[start:start + entry[1]]
+
+    @property
+    def data_bytes(self) -> int:
+        return len(self._mmap) - self._data_start
+
+
+class AudioPackStore:
+    """All loaded packs, one per campaign, searched on every μ-law request"""
+
+    def __init__(self, packs_dir: str):
+        self.packs_dir = packs_dir
+        self._packs: Dict[str, AudioPack] = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+
+    def pack_path(self, campaign_id: str) -> str:
+        return os.path.join(self.packs_dir, f"{campaign_id}{PACK_SUFFIX}")
+
+    def load(self, campaign_id: str) -> AudioPack:
+        # A replaced pack is not closed explicitly: responses may still hold views into it,
+        # and the mapping is released once the last of them is gone
+        pack = AudioPack(self.pack_path(campaign_id))
+        with self._lock:
+            self._packs[campaign_id] = pack
+        return pack
+
+    def load_all(self) -> int:
+        """Load every pack in packs_dir; a corrupt or truncated one is skipped, not fatal"""
+        if not os.path.isdir(self.packs_dir):
+            return 0
+        for name in sorted(os.listdir(self.packs_dir)):
+            if name.endswith(PACK_SUFFIX):
+                try:
+                    self.load(name[: -len(PACK_SUFFIX)])
+                except (OSError, ValueError, KeyError, TypeError, struct.error) as e:
+                    print(f"⚠️ Skipping unreadable audio pack {name}: {e}")
+        return len(self._packs)
+
+    def write(self, campaign_id: str, entries: Iterable[Tuple[str, bytes]], meta: Optional[dict] = None) -> AudioPack:
+        os.makedirs(self.packs_dir, exist_ok=True)
+        write_pack(self.pack_path(campaign_id), entries, meta)
+        return self.load(campaign_id)
+
+    def get(self, key: str) -> Optional[memoryview]:
+        with self._lock:
+            packs = list(self._packs.values())
+        for pack in packs:
+            data = pack.get(key)
+            if data is not None:
+                with self._lock:
+                    self.stats["hits"] += 1
+                return data
+        with self._lock:
+            self.stats["misses"] += 1
+        return None
+
+    def info(self, campaign_id: str) -> Optional[dict]:
+        pack = self._packs.get(campaign_id)
+        if pack is None:
+            return None
+        return {"path": pack.path, "phrases": len(pack.entries), "bytes": pack.data_bytes, **pack.meta}
+
+    def summary(self) -> dict:
+        with self._lock:
+            return {
+                **self.stats,
+                "packs": len(self._packs),
+                "phrases": sum(len(p.entries) for p in self._packs.values()),
+                "bytes": sum(p.data_bytes for p in self._packs.values()),
+            }
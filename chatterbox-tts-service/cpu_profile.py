@@ -0,0 +1,149 @@
+"""
+CPU inference profile
+On CPU-only nodes Chatterbox otherwise runs in fp32 with torch's default threading.
+This profile, applied at startup:
+  - sets intra-op / inter-op thread counts and pins the process to a CPU set
+  - dynamically quantizes the Linear layers of the heavy submodules to int8
+    (T3, the autoregressive token model, is where almost all CPU time goes)
+  - optionally wraps submodules in torch.compile
+A self-benchmark then measures the real-time factor actually achieved, so a node
+can be checked against call traffic before it is put behind the load balancer.
+
+Environment:
+  CPU_THREADS=8               intra-op threads (default: size of CPU_AFFINITY, else torch default)
+  CPU_INTEROP_THREADS=1       inter-op threads
+  CPU_AFFINITY=0-7            CPUs to pin the process to (e.g. "0-7" or "0,2,4,6")
+  CPU_QUANTIZE=1              int8 dynamic quantization of Linear layers
+  CPU_QUANTIZE_MODULES=t3     model attributes to quantize (comma-separated)
+  CPU_COMPILE_MODULES=        dotted model attributes to torch.compile, e.g. "t3.tfmr"
+"""
+
+import os
+import time
+from typing import List, Optional, Set
+
+import torch
+import torch.nn as nn
+
+
+def parse_cpu_list(value: str) -> Set[int]:
+    """'0-3,6' -> {0, 1, 2, 3, 6}"""
+    cpus = set()
+    for part in value.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            start, end = part.split("-", 1)
+            cpus.update(range(int(start), int(end) + 1))
+        else:
+            cpus.add(int(part))
+    return cpus
+
+
+def _resolve(root: nn.Module, dotted: str):
+    """'t3.tfmr' -> (parent module, attribute name, submodule or None)"""
+    parent, _, name = dotted.rpartition(".")
+    owner = root
+    for attr in filter(None, parent.split(".")):
+        owner = getattr(owner, attr, None)
+        if owner is None:
+            return None, name, None
+    return owner, name, getattr(owner, name, None)
+
+
+class CPUProfile:
+    def __init__(self, threads: Optional[int] = None, interop_threads: Optional[int] = None,
+                 affinity: Optional[Set[int]] = None, quantize: bool = True,
+                 quantize_modules: List[str] = ("t3",), compile_modules: List[str] = ()):
+        self.affinity = affinity
+        self.threads = threads or (len(affinity) if affinity else None)
+        self.interop_threads = interop_threads
+        self.quantize = quantize
+        self.quantize_modules = list(quantize_modules)
+        self.compile_modules = list(compile_modules)
+        self.report = {}
+
+    @classmethod
+    def from_env(cls) -> "CPUProfile":
+        split = lambda value: [item.strip() for item in value.split(",") if item.strip()]
+        return cls(
+            threads=int(os.getenv("CPU_THREADS", "0")) or None,
+            interop_threads=int(os.getenv("CPU_INTEROP_THREADS", "0")) or None,
+            affinity=parse_cpu_list(os.getenv("CPU_AFFINITY", "")) or None,
+            quantize=os.getenv("CPU_QUANTIZE", "1") == "1",
+            quantize_modules=split(os.getenv("CPU_QUANTIZE_MODULES", "t3")),
+            compile_modules=split(os.getenv("CPU_COMPILE_MODULES", "")),
+        )
+
+    def configure_runtime(self) -> None:
+        """Threads and pinning; call before the model is loaded (inter-op threads can only be set once)"""
+        if self.affinity and hasattr(os, "sched_setaffinity"):
+            try:
+                os.sched_setaffinity(0, self.affinity)
+            except OSError as e:
+                print(f"⚠️ Could not pin to CPUs {sorted(self.affinity)}: {e}")
+        if self.threads:
+            torch.set_num_threads(self.threads)
+        if self.interop_threads:
+            try:
+                torch.set_num_interop_threads(self.interop_threads)
+            except RuntimeError as e:
+                print(f"⚠️ Inter-op threads already fixed: {e}")
+
+        self.report.update({
+            "threads": torch.get_num_threads(),
+            "interop_threads": torch.get_num_interop_threads(),
+            "affinity": sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else None,
+        })
+
+    def apply(self, model) -> None:
+        """Quantize and compile the configured submodules of a loaded model, in place"""
+        quantized = {}
+        if self.quantize:
+            for dotted in self.quantize_modules:
+                owner, name, module = _resolve(model, dotted)
+                if not isinstance(module, nn.Module):
+                    continue
+                linear_layers = sum(isinstance(m, nn.Linear) for m in module.modules())
+                setattr(owner, name, torch.ao.quantization.quantize_dynamic(module, {nn.Linear}, dtype=torch.qint8))
+                quantized[dotted] = linear_layers
+
+        compiled = []
+        for dotted in self.compile_modules:
+            owner, name, module = _resolve(model, dotted)
+            if not isinstance(module, nn.Module):
+                continue
+            try:
+                setattr(owner, name, torch.compile(module, dynamic=True))
+                compiled.append(dotted)
+            except Exception as e:
+                print(f"⚠️ torch.compile failed for {dotted}, running eagerly: {e}")
+
+        self.report.update({"quantized_linear_layers": quantized, "compiled": compiled})
+
+    def summary(self) -> dict:
+        return dict(self.report)
+
+
+def self_benchmark(generate, sample_rate: int, text: str, runs: int = 2) -> dict:
+    """
+    Real-time factor of generate(text) -> waveform tensor: wall time / seconds of audio.
+    The first run is a warm-up (lazy init, compilation) and is reported separately.
+    """
+    timings, audio_seconds = [], 0.0
+    for _ in range(runs + 1):
+        started = time.perf_counter()
+        wav = generate(text)
+        timings.append(time.perf_counter() - started)
+        audio_seconds = wav.shape[-1] / sample_rate
+    measured = timings[1:] or timings
+    rtf = sum(measured) / (len(measured) * audio_seconds) if audio_seconds else None
+    return {
+        "text_chars": len(text),
+        "audio_seconds": round(audio_seconds, 3),
+        "warmup_seconds": round(timings[0], 3),
+        "generation_seconds": round(sum(measured) / len(measured), 3),
+        "rtf": round(rtf, 3) if rtf is not None else None,
+        "realtime_capable": rtf is not None and rtf < 1.0,
+    }
@@ -0,0 +1,158 @@
+"""
+Inference worker pool with admission control
+model.generate is blocking; running it on the event loop stalls every other request
+(/health included). Generation runs on a dedicated thread pool instead, and the
+number of admitted requests is bounded: workers + TTS_MAX_QUEUE. Past that, callers
+get PoolSaturated immediately (an EngineBusy: 429 + Retry-After from the serving core)
+rather than waiting until their HTTP client times out. Each job records how long it
+waited for a worker vs. how long the model actually ran.
+
+A job may carry a CancellationToken: calls still waiting for a worker are dropped
+once the awaiting request is cancelled, and a running call is bound to the token so
+the model's step hooks can stop it (see tts_common/cancellation.py).
+
+Threads rather than processes: the model lives in (GPU) memory once, and torch
+releases the GIL inside its kernels.
+"""
+
+import time
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+from tts_common.cancellation import bind
+from tts_common.engine import EngineBusy
+
+
+class PoolSaturated(EngineBusy):
+    """Raised by InferencePool.admit when every worker and queue slot is taken"""
+
+    def __init__(self, retry_after_s: int):
+        super().__init__(f"TTS queue is full, retry in {retry_after_s}s", retry_after_s)
+
+
+class InferenceJob:
+    """One admitted request; may run several blocking calls (e.g. one per stream segment)"""
+
+    def __init__(self, pool: "InferencePool", timer=None, token=None):
+        self.pool = pool
+        self.timer = timer  # Optional StageTimer: per-stage breakdown for Server-Timing / metrics
+        self.token = token  # Optional CancellationToken of the request
+        self.queue_wait_s = 0.0
+        self.generation_s = 0.0
+        self._closed = False
+
+    async def run(self, fn: Callable, *args, stage: str = "generate"):
+        """Run fn(*args) on a pool worker, timing the wait for the worker and the call itself"""
+        submitted = time.perf_counter()
+        self.pool._update(waiting=1)
+
+        def timed_call():
+            started = time.perf_counter()
+            self.pool._update(waiting=-1, running=1)
+            try:
+                with bind(self.token):
+                    return fn(*args)
+            finally:
+                self.pool._update(running=-1)
+                self.record(started - submitted, time.perf_counter() - started, stage)
+
+        future = self.pool.executor.submit(timed_call)
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            if future.cancel():  # Never reached a worker
+                self.pool._update(waiting=-1)
+            raise
+
+    def record(self, queue_wait_s: float, generation_s: float, stage: str = "generate") -> None:
+        """Account for one call"""
+        self.queue_wait_s += queue_wait_s
+        self.generation_s += generation_s
+        if self.timer is not None:
+            self.timer.add("queue", queue_wait_s)
+            self.timer.add(stage, generation_s)
+
+    def close(self) -> None:
+        """Give the admission slot back (idempotent)"""
+        if not self._closed:
+            self._closed = True
+            self.pool._release(self)
+
+    def __enter__(self) -> "InferenceJob":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class InferencePool:
+    def __init__(self, workers: int = 1, max_queue: int = 8, retry_after_s: int = 2, window: int = 256):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.retry_after_s = retry_after_s
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tts-inference")
+        self._lock = threading.Lock()
+        self._admitted = 0
+        self.waiting = 0   # Calls submitted and waiting for a worker
+        self.running = 0   # Calls executing on a worker
+        self.stats = {"admitted": 0, "rejected": 0, "completed": 0}
+        # Recent per-request timings, for /health percentiles
+        self._queue_waits: deque = deque(maxlen=window)
+        self._generations: deque = deque(maxlen=window)
+
+    @property
+    def capacity(self) -> int:
+        return self.workers + self.max_queue
+
+    @property
+    def in_flight(self) -> int:
+        return self._admitted
+
+    def _update(self, waiting: int = 0, running: int = 0) -> None:
+        with self._lock:
+            self.waiting += waiting
+            self.running += running
+
+    def admit(self, timer=None, token=None) -> InferenceJob:
+        """Reserve a slot or fail fast with PoolSaturated"""
+        with self._lock:
+            if self._admitted >= self.capacity:
+                self.stats["rejected"] += 1
+                raise PoolSaturated(self.retry_after_s)
+            self._admitted += 1
+            self.stats["admitted"] += 1
+        return InferenceJob(self, timer, token)
+
+    def _release(self, job: InferenceJob) -> None:
+        with self._lock:
+            self._admitted -= 1
+            self.stats["completed"] += 1
+            self._queue_waits.append(job.queue_wait_s)
+            self._generations.append(job.generation_s)
+
+    @staticmethod
+    def _percentiles_ms(samples) -> Optional[dict]:
+        if not samples:
+            return None
+        ordered = sorted(samples)
+        pick = lambda q: round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 1)
+        return {"p50": pick(0.5), "p95": pick(0.95), "max": round(ordered[-1] * 1000, 1)}
+
+    def summary(self) -> dict:
+        with self._lock:
+            return {
+                **self.stats,
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "in_flight": self._admitted,
+                "waiting": self.waiting,
+                "running": self.running,
+                "queue_wait_ms": self._percentiles_ms(self._queue_waits),
+                "generation_ms": self._percentiles_ms(self._generations),
+            }
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
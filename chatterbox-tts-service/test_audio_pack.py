@@ -0,0 +1,40 @@
+import os
+import tempfile
+import unittest
+
+from audio_pack import AudioPackStore
+
+
+class TestAudioPackStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = AudioPackStore(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_served_from_the_mapping(self):
+        self.store.write("spring", [("hello", b"\x01\x02\x03"), ("bye", b"\x04")])
+        self.assertEqual(bytes(self.store.get("hello")), b"\x01\x02\x03")
+        self.assertIsNone(self.store.get("unknown"))
+        self.assertEqual((self.store.stats["hits"], self.store.stats["misses"]), (1, 1))
+
+    def test_unreadable_packs_are_skipped_at_startup(self):
+        self.store.write("good", [("hello", b"\x01" * 100)])
+        self.store.write("cut", [("bye", b"\x02" * 100)])
+        path = self.store.pack_path("cut")
+        with open(path, "r+b") as f:
+            f.truncate(os.path.getsize(path) - 10)
+        with open(self.store.pack_path("garbage"), "wb") as f:
+            f.write(b"TTS")
+        open(self.store.pack_path("empty"), "wb").close()
+
+        fresh = AudioPackStore(self.tmp.name)
+        self.assertEqual(fresh.load_all(), 1)
+        self.assertEqual(bytes(fresh.get("hello")), b"\x01" * 100)
+        self.assertIsNone(fresh.info("cut"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import os
+import sys
+import asyncio
+import threading
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from inference_pool import InferencePool, PoolSaturated
+
+
+class TestInferencePool(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = InferencePool(workers=1, max_queue=1, retry_after_s=3)
+
+    def tearDown(self):
+        self.pool.shutdown()
+
+    def test_admission_is_bounded_by_workers_plus_queue(self):
+        first, second = self.pool.admit(), self.pool.admit()
+
+        with self.assertRaises(PoolSaturated) as ctx:
+            self.pool.admit()
+        self.assertEqual(ctx.exception.retry_after_s, 3)
+
+        first.close()
+        first.close()  # Idempotent: the slot is only given back once
+        with self.pool.admit():
+            pass
+        second.close()
+
+        summary = self.pool.summary()
+        self.assertEqual((summary["admitted"], summary["rejected"], summary["completed"]), (3, 1, 3))
+        self.assertEqual(summary["in_flight"], 0)
+
+    def test_queued_call_waits_for_the_worker(self):
+        release = threading.Event()
+
+        async def scenario():
+            with self.pool.admit() as busy, self.pool.admit() as queued:
+                running = asyncio.ensure_future(busy.run(release.wait))
+                waiting = asyncio.ensure_future(queued.run(lambda: "done"))
+                await asyncio.sleep(0.05)
+                self.assertEqual((self.pool.running, self.pool.waiting), (1, 1))
+                with self.assertRaises(PoolSaturated):
+                    self.pool.admit()
+                release.set()
+                return await running, await waiting, queued.queue_wait_s
+
+        started, result, queue_wait_s = asyncio.run(scenario())
+        self.assertEqual((started, result), (True, "done"))
+        self.assertGreater(queue_wait_s, 0.04)  # Time spent behind the busy worker is accounted as queue wait
+        self.assertEqual((self.pool.running, self.pool.waiting, self.pool.in_flight), (0, 0, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
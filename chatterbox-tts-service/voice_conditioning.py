@@ -0,0 +1,136 @@
+"""
+Voice conditioning cache
+Chatterbox conditions every utterance on a reference clip (speaker embedding, prompt
+speech tokens, vocoder reference). Building that means loading, resampling and
+embedding the WAV, so it is done once per voice: at /clone-voice time (or at startup
+for WAVs already in the voices directory), serialized next to the WAV as
+<voice_id>.conds.pt, and kept in an in-memory LRU for synthesis.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+
+from chatterbox.tts import Conditionals
+
+CONDS_SUFFIX = ".conds.pt"
+
+
+class VoiceConditioningCache:
+    def __init__(self, model, voices_dir: str, device: str, lock: threading.RLock,
+                 capacity: int = 32, exaggeration: float = 0.5):
+        self.model = model
+        self.voices_dir = voices_dir
+        self.device = device
+        self.lock = lock                  # Same lock that guards model.generate (prepare_conditionals only)
+        self.capacity = capacity
+        self.exaggeration = exaggeration  # Emotion used when building; generate() adjusts per request
+        self._lru: "OrderedDict[str, Conditionals]" = OrderedDict()
+        # The LRU has its own lock: a lookup never waits for a generation holding the model lock
+        self._lru_lock = threading.Lock()
+
+    # --- Paths ---
+
+    def wav_path(self, voice_id: str) -> str:
+        return os.path.join(self.voices_dir, f"{voice_id}.wav")
+
+    def conds_path(self, voice_id: str) -> str:
+        return os.path.join(self.voices_dir, f"{voice_id}{CONDS_SUFFIX}")
+
+    def voice_ids(self) -> List[str]:
+        """Voices with a reference WAV or precomputed conditioning on disk"""
+        if not os.path.isdir(self.voices_dir):
+            return []
+        ids = set()
+        for name in os.listdir(self.voices_dir):
+            if name.endswith(CONDS_SUFFIX):
+                ids.add(name[: -len(CONDS_SUFFIX)])
+            elif name.endswith(".wav"):
+                ids.add(name[: -len(".wav")])
+        return sorted(ids)
+
+    # --- LRU ---
+
+    def _remember(self, key: str, conds: Conditionals) -> Conditionals:
+        with self._lru_lock:
+            self._lru[key] = conds
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.capacity:
+                self._lru.popitem(last=False)
+        return conds
+
+    def _lookup(self, key: str) -> Optional[Conditionals]:
+        with self._lru_lock:
+            conds = self._lru.get(key)
+            if conds is not None:
+                self._lru.move_to_end(key)
+            return conds
+
+    # --- Building ---
+
+    def _compute(self, wav_path: str) -> Conditionals:
+        """Embed a reference WAV without disturbing the conditioning the model is using"""
+        with self.lock:
+            previous = self.model.conds
+            try:
+                self.model.prepare_conditionals(wav_path, exaggeration=self.exaggeration)
+                return self.model.conds
+            finally:
+                self.model.conds = previous
+
+    def register(self, voice_id: str) -> Conditionals:
+        """Compute and persist conditioning for <voices_dir>/<voice_id>.wav"""
+        conds = self._compute(self.wav_path(voice_id))
+        tmp_path = self.conds_path(voice_id) + ".tmp"
+        conds.save(tmp_path)
+        os.replace(tmp_path, self.conds_path(voice_id))
+        return self._remember(voice_id, conds)
+
+    def _is_stale(self, voice_id: str) -> bool:
+        conds_path, wav_path = self.conds_path(voice_id), self.wav_path(voice_id)
+        if not os.path.exists(conds_path):
+            return True
+        return os.path.exists(wav_path) and os.path.getmtime(wav_path) > os.path.getmtime(conds_path)
+
+    def get(self, voice_id: str) -> Optional[Conditionals]:
+        """LRU -> serialized tensors on disk -> compute from WAV; None if the voice is unknown"""
+        conds = self._lookup(voice_id)
+        if conds is not None:
+            return conds
+        if not self._is_stale(voice_id):
+            conds = Conditionals.load(self.conds_path(voice_id), map_location=self.device).to(self.device)
+            return self._remember(voice_id, conds)
+        if os.path.exists(self.wav_path(voice_id)):
+            return self.register(voice_id)
+        return None
+
+    def for_prompt_path(self, audio_prompt_path: str) -> Conditionals:
+        """Ad-hoc reference clips (request.audio_prompt_path): memory-only, keyed by path + mtime"""
+        key = f"path:{os.path.abspath(audio_prompt_path)}:{os.path.getmtime(audio_prompt_path)}"
+        conds = self._lookup(key)
+        if conds is None:
+            conds = self._remember(key, self._compute(audio_prompt_path))
+        return conds
+
+    def revision(self, voice_id: str) -> int:
+        """Changes whenever the voice is re-cloned (0 if there is nothing on disk)"""
+        path = self.conds_path(voice_id)
+        return os.stat(path).st_mtime_ns if os.path.exists(path) else 0
+
+    def remove(self, voice_id: str) -> None:
+        with self._lru_lock:
+            self._lru.pop(voice_id, None)
+        for path in (self.wav_path(voice_id), self.conds_path(voice_id)):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def warm(self) -> int:
+        """Startup: build missing/stale conditioning files and preload up to `capacity` voices"""
+        voice_ids = self.voice_ids()
+        for voice_id in voice_ids:
+            if self._is_stale(voice_id) and os.path.exists(self.wav_path(voice_id)):
+                self.register(voice_id)
+        for voice_id in voice_ids[: self.capacity]:
+            self.get(voice_id)
+        return len(voice_ids)
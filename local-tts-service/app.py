@@ -2,109 +2,84 @@
 Local TTS Service for Testing
 Uses pyttsx3 (offline TTS) for quick local testing
 For production, deploy to AWS with XTTS-v2 or Chatterbox
+
+Served by the shared core (tts_common/serving.py): /synthesize, /synthesize/stream,
+/ws/synthesize, /ready, /cancel/{request_id}, /metrics
 """
 
 import os
-import io
-import base64
-from typing import Optional
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import Response
-from pydantic import BaseModel
-import pyttsx3
-from pydub import AudioSegment
-import tempfile
+import asyncio
+from fastapi import FastAPI
+import numpy as np
+import sys
+
+# Shared TTS helpers live in ../tts_common
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tts_common.audio_cache import RenderedAudioCache
+from tts_common.codec import pcm_bytes_to_float, resample
+from tts_common.engine import TTSEngine
+from tts_common.serving import TTSServer
+
+from speech_engine import SpeechEngine
 
 app = FastAPI(title="Local TTS Service", version="1.0.0")
 
-# Initialize TTS engine
-engine = None
+class Pyttsx3Engine(TTSEngine):
+    """System voices through pyttsx3; every render runs on the engine thread (see speech_engine.py)"""
+    name = "pyttsx3"
+    version = "pyttsx3"
+    sample_rate = 22050  # Replaced by the driver's actual rate once loaded
+
+    def __init__(self):
+        self.speech = SpeechEngine(rate=175, volume=0.9)
+
+    def load(self) -> None:
+        self.speech.start()
+        # The output rate depends on the platform driver (espeak, SAPI5, NSSpeechSynthesizer)
+        self.sample_rate = self.speech.render("Ready.").sample_rate
+
+    def generate(self, text: str, conditioning, **options) -> np.ndarray:
+        audio = self.speech.render(text)
+        samples = pcm_bytes_to_float(audio.frames, audio.sample_width, audio.channels)
+        return resample(samples, audio.sample_rate, self.sample_rate)
 
-class TTSRequest(BaseModel):
-    text: str
-    voice_id: Optional[str] = "default"
-    output_format: Optional[str] = "mp3"
+engine = Pyttsx3Engine()
+
+# Local testing replays the same lines a lot: memory tier only unless AUDIO_CACHE_DIR is set
+server = TTSServer(
+    engine,
+    cache=RenderedAudioCache(
+        cache_dir=os.getenv("AUDIO_CACHE_DIR") or None,
+        memory_bytes=int(os.getenv("AUDIO_CACHE_MEMORY_MB", "16")) * 1024 * 1024,
+        max_disk_bytes=int(os.getenv("AUDIO_CACHE_DISK_MB", "512")) * 1024 * 1024
+    ),
+    default_format="mp3"
+)
+app.include_router(server.router())
 
 @app.on_event("startup")
 async def startup_event():
     """Initialize TTS engine on startup"""
-    global engine
     print("🚀 Loading Local TTS engine...")
-    engine = pyttsx3.init()
-    
-    # Set voice properties
-    voices = engine.getProperty('voices')
-    if len(voices) > 0:
-        engine.setProperty('voice', voices[0].id)  # Default voice
-    engine.setProperty('rate', 175)  # Speed
-    engine.setProperty('volume', 0.9)  # Volume
-    
-    print("✅ Local TTS ready!")
+    await asyncio.to_thread(server.start, True)
+    print(f"✅ Local TTS ready! (scratch file: {engine.speech.scratch_path})")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    engine.speech.stop()
 
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
     return {
         "status": "healthy",
-        "model_loaded": engine is not None,
+        "model_loaded": server.state["status"] == "ready",
         "device": "cpu",
+        "queued": engine.speech.queued,
+        "serving": server.summary(),
         "note": "Local testing TTS - deploy to AWS for production quality"
     }
 
-@app.post("/synthesize")
-async def synthesize_speech(request: TTSRequest):
-    """
-    Synthesize speech from text
-    Returns audio in requested format
-    """
-    if engine is None:
-        raise HTTPException(status_code=503, detail="TTS engine not loaded")
-    
-    try:
-        print(f"[TTS] Synthesizing: {request.text[:50]}...")
-        
-        # Create temporary WAV file
-        with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as tmp_file:
-            tmp_path = tmp_file.name
-        
-        # Synthesize to WAV
-        engine.save_to_file(request.text, tmp_path)
-        engine.runAndWait()
-        
-        # Read WAV file
-        audio = AudioSegment.from_wav(tmp_path)
-        
-        # Convert to requested format
-        buffer = io.BytesIO()
-        if request.output_format == "mp3":
-            audio.export(buffer, format="mp3", bitrate="128k")
-            media_type = "audio/mpeg"
-            filename = "speech.mp3"
-        elif request.output_format == "wav":
-            audio.export(buffer, format="wav")
-            media_type = "audio/wav"
-            filename = "speech.wav"
-        else:  # ulaw for Twilio
-            audio = audio.set_frame_rate(8000).set_channels(1)
-            audio.export(buffer, format="wav", codec="pcm_mulaw")
-            media_type = "audio/basic"
-            filename = "speech.ulaw"
-        
-        buffer.seek(0)
-        
-        # Clean up temp file
-        os.unlink(tmp_path)
-        
-        return Response(
-            content=buffer.read(),
-            media_type=media_type,
-            headers={"Content-Disposition": f"inline; filename={filename}"}
-        )
-    
-    except Exception as e:
-        print(f"[TTS] Error: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"TTS generation failed: {str(e)}")
-
 @app.post("/clone-voice")
 async def clone_voice(voice_id: str):
     """
@@ -120,7 +95,8 @@ async def clone_voice(voice_id: str):
 @app.get("/voices")
 async def list_voices():
     """List available voices"""
-    voices = engine.getProperty('voices') if engine else []
+    loaded = server.state["status"] == "ready"
+    voices = await engine.speech.call(lambda e: e.getProperty('voices')) if loaded else []
     return {
         "voices": [{"id": v.id, "name": v.name} for v in voices],
         "note": "Local system voices - limited quality. Deploy to AWS for custom voice cloning."
@@ -1,29 +1,66 @@
 """
 Simple Local TTS Service for Mac Studio Testing
 Uses gTTS (Google Text-to-Speech) - works offline after first download
+
+Served by the shared core (tts_common/serving.py): /synthesize, /synthesize/stream,
+/ws/synthesize, /ready, /cancel/{request_id}, /metrics
 """
 
 import os
 import io
 from typing import Optional
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import Response
-from pydantic import BaseModel
+from fastapi import FastAPI
 from gtts import gTTS
 from pydub import AudioSegment
-import tempfile
+import numpy as np
+import sys
+
+# Shared TTS helpers live in ../tts_common
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tts_common.audio_cache import RenderedAudioCache
+from tts_common.codec import pcm_bytes_to_float, resample
+from tts_common.engine import TTSEngine
+from tts_common.serving import TTSServer
 
 app = FastAPI(title="Local TTS Testing Service", version="1.0.0")
 
-class TTSRequest(BaseModel):
-    text: str
-    voice_id: Optional[str] = "default"
-    output_format: Optional[str] = "mp3"
+class GTTSEngine(TTSEngine):
+    """Google TTS: mp3 is served exactly as gTTS returns it unless a request asks for trimming / normalization"""
+    name = "gtts"
+    version = "gtts"
+    sample_rate = 24000  # gTTS mp3 is 24 kHz mono
+    native_formats = ("mp3",)
+
+    def _mp3(self, text: str, language: Optional[str] = None) -> bytes:
+        buffer = io.BytesIO()
+        gTTS(text=text, lang=language or 'en', slow=False).write_to_fp(buffer)
+        return buffer.getvalue()
+
+    def native_audio(self, text: str, conditioning, output_format: str, language: Optional[str] = None) -> Optional[bytes]:
+        return self._mp3(text, language) if output_format == "mp3" else None
+
+    def generate(self, text: str, conditioning, language: Optional[str] = None) -> np.ndarray:
+        audio = AudioSegment.from_file(io.BytesIO(self._mp3(text, language)), format="mp3")
+        samples = pcm_bytes_to_float(audio.raw_data, audio.sample_width, audio.channels)
+        return resample(samples, audio.frame_rate, self.sample_rate)
+
+# Every cache hit is a Google round trip saved: memory tier only unless AUDIO_CACHE_DIR is set
+server = TTSServer(
+    GTTSEngine(),
+    cache=RenderedAudioCache(
+        cache_dir=os.getenv("AUDIO_CACHE_DIR") or None,
+        memory_bytes=int(os.getenv("AUDIO_CACHE_MEMORY_MB", "16")) * 1024 * 1024,
+        max_disk_bytes=int(os.getenv("AUDIO_CACHE_DISK_MB", "512")) * 1024 * 1024
+    ),
+    default_format="mp3"
+)
+app.include_router(server.router())
 
 @app.on_event("startup")
 async def startup_event():
     """Startup message"""
     print("🚀 Local TTS Testing Service starting...")
+    server.start(wait=True)  # Nothing to load for gTTS
     print("✅ Ready to synthesize speech!")
     print("📝 Note: This uses gTTS for testing. Deploy to AWS for production quality.")
 
@@ -35,63 +72,10 @@ async def health_check():
         "model_loaded": True,
         "device": "cpu",
         "engine": "gTTS",
+        "serving": server.summary(),
         "note": "Local testing service - works on Mac Studio"
     }
 
-@app.post("/synthesize")
-async def synthesize_speech(request: TTSRequest):
-    """
-    Synthesize speech from text using gTTS
-    Returns audio in requested format
-    """
-    try:
-        print(f"[TTS] Synthesizing: {request.text[:50]}...")
-        
-        # Use gTTS to generate speech
-        tts = gTTS(text=request.text, lang='en', slow=False)
-        
-        # Save to temporary file
-        with tempfile.NamedTemporaryFile(suffix='.mp3', delete=False) as tmp_file:
-            tmp_path = tmp_file.name
-        
-        tts.save(tmp_path)
-        
-        # Read the MP3 file
-        audio = AudioSegment.from_mp3(tmp_path)
-        
-        # Convert to requested format
-        buffer = io.BytesIO()
-        if request.output_format == "mp3":
-            audio.export(buffer, format="mp3", bitrate="128k")
-            media_type = "audio/mpeg"
-            filename = "speech.mp3"
-        elif request.output_format == "wav":
-            audio.export(buffer, format="wav")
-            media_type = "audio/wav"
-            filename = "speech.wav"
-        else:  # ulaw for Twilio
-            audio = audio.set_frame_rate(8000).set_channels(1)
-            audio.export(buffer, format="wav", codec="pcm_mulaw")
-            media_type = "audio/basic"
-            filename = "speech.ulaw"
-        
-        buffer.seek(0)
-        
-        # Clean up temp file
-        os.unlink(tmp_path)
-        
-        print(f"[TTS] ✅ Synthesis complete ({len(buffer.getvalue())} bytes)")
-        
-        return Response(
-            content=buffer.read(),
-            media_type=media_type,
-            headers={"Content-Disposition": f"inline; filename={filename}"}
-        )
-    
-    except Exception as e:
-        print(f"[TTS] ❌ Error: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"TTS generation failed: {str(e)}")
-
 @app.post("/clone-voice")
 async def clone_voice(voice_id: str):
     """
@@ -0,0 +1,113 @@
+"""
+pyttsx3 engine thread
+A pyttsx3 engine is not thread-safe: concurrent requests calling runAndWait on one shared
+engine interleave their utterances or stall the driver loop. One thread owns the engine
+and serves a queue of calls, so requests line up instead of colliding, and the event
+loop never blocks on synthesis.
+
+Synthesis is not file-free: pyttsx3 has no in-memory capture (save_to_file is its only
+way to get audio back; the espeak, SAPI5 and NSSpeechSynthesizer drivers all write a
+file), so every utterance is still written and read back. What is avoided is a new temp
+file per request and a pydub/ffmpeg decode: utterances go to one reusable scratch WAV per
+process, read straight back with `wave`. The scratch file lives in SCRATCH_DIR: /dev/shm
+(tmpfs, so RAM-backed) on Linux, the regular temp directory - real disk I/O - elsewhere,
+e.g. macOS. Encoding happens in-process too, mp3 included (lameenc, see
+tts_common/serving.py Mp3Encoder), so the scratch WAV is the only file an utterance touches.
+"""
+
+import os
+import queue
+import wave
+import asyncio
+import tempfile
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, NamedTuple
+
+import pyttsx3
+
+# Where the per-process scratch WAV is written (LOCAL_TTS_SCRATCH_DIR overrides)
+SCRATCH_DIR = os.getenv("LOCAL_TTS_SCRATCH_DIR") or (
+    "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+)
+
+
+class Utterance(NamedTuple):
+    frames: bytes       # Interleaved PCM, as pyttsx3 wrote it
+    sample_rate: int
+    sample_width: int   # Bytes per sample
+    channels: int
+
+
+class SpeechEngine:
+    def __init__(self, rate: int = 175, volume: float = 0.9):
+        self.rate = rate
+        self.volume = volume
+        self.scratch_path = os.path.join(SCRATCH_DIR, f"local-tts-{os.getpid()}.wav")
+        self._calls: queue.Queue = queue.Queue()
+        self._started: Future = Future()
+        self._thread = threading.Thread(target=self._run, name="pyttsx3-engine", daemon=True)
+
+    def start(self, timeout_s: float = 30.0) -> None:
+        """Create the engine on its own thread (drivers are bound to it); raises if init fails"""
+        self._thread.start()
+        self._started.result(timeout_s)
+
+    def stop(self) -> None:
+        self._calls.put(None)
+
+    @property
+    def queued(self) -> int:
+        return self._calls.qsize()
+
+    def _run(self) -> None:
+        try:
+            engine = pyttsx3.init()
+            voices = engine.getProperty('voices')
+            if voices:
+                engine.setProperty('voice', voices[0].id)  # Default voice
+            engine.setProperty('rate', self.rate)  # Speed
+            engine.setProperty('volume', self.volume)  # Volume
+        except Exception as e:
+            self._started.set_exception(e)
+            return
+        self._started.set_result(True)
+
+        while True:
+            call = self._calls.get()
+            if call is None:
+                break
+            fn, future = call
+            if not future.set_running_or_notify_cancel():
+                continue  # Caller went away while queued
+            try:
+                future.set_result(fn(engine))
+            except Exception as e:
+                future.set_exception(e)
+
+        if os.path.exists(self.scratch_path):
+            os.remove(self.scratch_path)
+
+    def submit(self, fn: Callable[[Any], Any]) -> Future:
+        """Queue fn(engine) for the engine thread, after the calls queued before it"""
+        future: Future = Future()
+        self._calls.put((fn, future))
+        return future
+
+    async def call(self, fn: Callable[[Any], Any]) -> Any:
+        return await asyncio.wrap_future(self.submit(fn))
+
+    def _render(self, engine, text: str) -> Utterance:
+        engine.save_to_file(text, self.scratch_path)
+        engine.runAndWait()
+        with wave.open(self.scratch_path, "rb") as wav_file:
+            return Utterance(
+                wav_file.readframes(wav_file.getnframes()),
+                wav_file.getframerate(),
+                wav_file.getsampwidth(),
+                wav_file.getnchannels(),
+            )
+
+    def render(self, text: str) -> Utterance:
+        """Blocking: waits for the engine thread (called from generation worker threads)"""
+        return self.submit(lambda engine: self._render(engine, text)).result()
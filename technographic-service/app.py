@@ -2,13 +2,16 @@ import os
 import logging
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from typing import Optional, List, Dict, Any
 
 # Internal imports
 from hunter_logic import TechnographicHunter
 # We import the waterfall logic here to inject it into the hunter or use it directly
-from search_utils import waterfall_search 
+from search_utils import SearchAborted, waterfall_search 
+from signal_map import get_signed_dorks_for_domain
+from dork_stats import DorkStats
 
 # LOGGING SETUP
 logging.basicConfig(level=logging.INFO)
@@ -23,6 +26,16 @@ GOOGLE_CSE_ID = os.getenv("GOOGLE_CSE_ID", "")
 # We use a global variable to keep the 4GB model in memory across requests
 hunter_instance: Optional[TechnographicHunter] = None
 
+# Per-dork yield statistics (persisted to DORK_STATS_PATH, drives query ordering/pruning)
+dork_stats = DorkStats.from_env()
+# Written every DORK_STATS_SAVE_EVERY enrichments (and at shutdown), off the event loop
+DORK_STATS_SAVE_EVERY = int(os.getenv("DORK_STATS_SAVE_EVERY", "20"))
+
+async def record_dork_stats(executed, sources, verified_snippets) -> None:
+    dork_stats.record(executed, sources, verified_snippets)
+    if dork_stats.unsaved >= DORK_STATS_SAVE_EVERY:
+        await run_in_threadpool(dork_stats.save)
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
@@ -53,6 +66,7 @@ async def lifespan(app: FastAPI):
     yield
     
     logger.info("🛑 SHUTDOWN: Unloading resources...")
+    dork_stats.save()
     hunter_instance = None
 
 # INITIALIZE APP
@@ -69,6 +83,11 @@ def health_check():
         return {"status": "healthy", "model": "loaded"}
     return {"status": "degraded", "model": "not_loaded"}
 
+@app.get("/dork-stats")
+def get_dork_stats():
+    """Hit / verified-yield statistics per dork signature, best first."""
+    return {"signatures": dork_stats.summary()}
+
 @app.post("/enrich")
 async def enrich_company(request: EnrichmentRequest):
     """
@@ -87,18 +106,33 @@ async def enrich_company(request: EnrichmentRequest):
         # STEP 1: Execute Waterfall Search
         # We pass the waterfall function so the Hunter logic focuses on "Extraction" 
         # while this layer handles "Data Retrieval Strategy".
+        # Queries are ordered by expected yield, and proven low-yield dorks are pruned.
+        plan = dork_stats.plan(get_signed_dorks_for_domain(company))
+        sources = {}
+        executed = []
         raw_evidence = waterfall_search(
             company_domain=company, 
             api_key=GOOGLE_API_KEY, 
-            cse_id=GOOGLE_CSE_ID
+            cse_id=GOOGLE_CSE_ID,
+            queries=plan,
+            sources=sources,
+            executed=executed
         )
 
         if not raw_evidence:
+            await record_dork_stats(executed, sources, [])
             return {"status": "completed", "data": {}, "message": "No evidence found via Search."}
 
         # STEP 2: AI Extraction (Using the loaded model)
         # The hunter processes the text snippets we just found
-        structured_data = hunter_instance.process_evidence(company, raw_evidence)
+        verified_snippets = []
+        structured_data = hunter_instance.process_evidence(
+            company, raw_evidence,
+            on_verified=lambda snippet, tools: verified_snippets.append(snippet)
+        )
+
+        # STEP 3: Credit the dorks whose snippets survived verification
+        await record_dork_stats(executed, sources, verified_snippets)
         
         return {
             "status": "success", 
@@ -106,6 +140,10 @@ async def enrich_company(request: EnrichmentRequest):
             "technographics": structured_data
         }
 
+    except SearchAborted as e:
+        # Rate limited / no fallback: "no technographics" would be a wrong answer, not an empty one
+        logger.error(f"⚠️ Search Aborted for {company}: {str(e)}")
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "60"})
     except Exception as e:
         logger.error(f"⚠️ Enrichment Failed for {company}: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,317 @@
+"""
+OFFLINE BULK ENRICHMENT CLI
+---------------------------
+Quarterly refresh path for tens of thousands of domains, without going through HTTP.
+
+Usage:
+  python bulk_enrich.py domains.csv -o results.jsonl --workers 8
+  python bulk_enrich.py domains.jsonl -o results.parquet
+
+Architecture:
+1. SEARCH is network bound, so it is sharded across worker processes.
+2. EXTRACTION runs in this process only: the NuExtract model is loaded exactly once
+   and every worker funnels its evidence back to it.
+3. DORK STATS: queries are ordered/pruned by DorkStats, re-planned every PLAN_BATCH_SIZE
+   domains so yields learned early in the run steer the rest of it.
+4. CHECKPOINT: every finished domain is appended (and fsynced) to a JSONL journal.
+   Re-running the same command after a crash skips domains the journal has as
+   success / completed; failed ones (search aborted, e.g. CSE quota) are retried.
+5. OUTPUT: the journal *is* the JSONL output (a retried domain appears once per attempt,
+   the last record wins). For Parquet, the journal is converted once all domains are
+   done (one row per domain, ready for bulk COPY into Postgres).
+"""
+
+import os
+import csv
+import json
+import time
+import logging
+import argparse
+import multiprocessing
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from dork_stats import DorkStats
+
+# LOGGING SETUP
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("BulkEnrichment")
+
+# CONFIGURATION (same variables as the HTTP service)
+GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY", "")
+GOOGLE_CSE_ID = os.getenv("GOOGLE_CSE_ID", "")
+
+# Column names we accept as the domain column in CSV / keys in JSONL objects
+DOMAIN_FIELDS = ("company_domain", "domain", "website")
+
+# Domains planned (and dispatched to the search workers) per batch
+PLAN_BATCH_SIZE = 200
+
+# Journal statuses that are final; "failed" domains are enriched again on the next run
+DONE_STATUSES = ("success", "completed")
+
+
+# --- INPUT ---
+
+def normalize_domain(value: str) -> str:
+    """'https://www.Acme.com/' -> 'acme.com'"""
+    domain = (value or "").strip().lower()
+    for prefix in ("https://", "http://", "www."):
+        if domain.startswith(prefix):
+            domain = domain[len(prefix):]
+    return domain.split("/")[0]
+
+
+def _read_csv_domains(path: str) -> Iterable[str]:
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        lowered = [h.strip().lower() for h in header]
+        column = next((lowered.index(c) for c in DOMAIN_FIELDS if c in lowered), None)
+        if column is None:
+            # No recognised header: treat the first column of every row as a domain
+            column = 0
+            yield header[0]
+        for row in reader:
+            if len(row) > column:
+                yield row[column]
+
+
+def _read_jsonl_domains(path: str) -> Iterable[str]:
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            item = json.loads(line)
+            if isinstance(item, str):
+                yield item
+            else:
+                yield next((item[k] for k in DOMAIN_FIELDS if item.get(k)), "")
+
+
+def read_domains(path: str) -> List[str]:
+    """Reads domains from CSV or JSONL, normalized and deduplicated (input order kept)."""
+    reader = _read_jsonl_domains if path.endswith((".jsonl", ".ndjson")) else _read_csv_domains
+    seen: Set[str] = set()
+    domains = []
+    for raw in reader(path):
+        domain = normalize_domain(raw)
+        if domain and domain not in seen:
+            seen.add(domain)
+            domains.append(domain)
+    return domains
+
+
+# --- CHECKPOINT JOURNAL ---
+
+def load_journal(path: str) -> Set[str]:
+    """
+    Returns the domains the journal has as done (DONE_STATUSES; the last record per domain wins).
+    A crash can leave a half-written last line; it is cut off so appends stay valid JSONL.
+    Any other unreadable line is skipped, never truncated: later checkpoints stay valid.
+    """
+    status: Dict[str, str] = {}
+    if not os.path.exists(path):
+        return set()
+
+    valid_bytes = 0
+    with open(path, "rb") as f:
+        for number, line in enumerate(f, start=1):
+            if not line.endswith(b"\n"):
+                break  # Only the final line can be incomplete
+            valid_bytes += len(line)
+            try:
+                record = json.loads(line)
+            except ValueError:
+                logger.warning(f"⚠️ Skipping unreadable journal line {number} in {path}")
+                continue
+            domain = record.get("company_domain") if isinstance(record, dict) else None
+            if not domain:
+                logger.warning(f"⚠️ Skipping journal line {number} without company_domain in {path}")
+                continue
+            status[domain] = record.get("status")
+
+    if valid_bytes < os.path.getsize(path):
+        logger.warning(f"⚠️ Truncating partial journal entry in {path}")
+        with open(path, "r+b") as f:
+            f.truncate(valid_bytes)
+    return {domain for domain, state in status.items() if state in DONE_STATUSES}
+
+
+def append_record(journal, record: Dict) -> None:
+    journal.write(json.dumps(record) + "\n")
+    journal.flush()
+    os.fsync(journal.fileno())
+
+
+# --- PIPELINE STAGES ---
+
+def _search_worker(job: Tuple[str, List[Tuple[str, str]]]):
+    """
+    Runs in a worker process: Search only, never touches the model.
+    Returns (domain, executed queries, evidence, snippet_sources, error).
+    """
+    # Imported here so worker processes don't pay for torch/transformers
+    from search_utils import waterfall_search
+    domain, plan = job
+    sources: Dict[str, str] = {}
+    executed: List[Tuple[str, str]] = []
+    try:
+        evidence = waterfall_search(
+            company_domain=domain, api_key=GOOGLE_API_KEY, cse_id=GOOGLE_CSE_ID,
+            queries=plan, sources=sources, executed=executed
+        )
+        return domain, executed, evidence, sources, None
+    except Exception as e:
+        return domain, executed, [], sources, str(e)
+
+
+def build_record(hunter, domain: str, evidence: List[str], error: Optional[str], on_verified=None) -> Dict:
+    """Runs in the model owner process: Extraction + verification for one domain."""
+    record = {
+        "company_domain": domain,
+        "status": "completed",
+        "technographics": [],
+        "evidence_count": len(evidence),
+        "error": error,
+        "enriched_at": datetime.now(timezone.utc).isoformat(),
+    }
+    if error:
+        record["status"] = "failed"
+    elif evidence:
+        try:
+            record["technographics"] = hunter.process_evidence(domain, evidence, on_verified=on_verified)
+            record["status"] = "success"
+        except Exception as e:
+            record["status"] = "failed"
+            record["error"] = str(e)
+    return record
+
+
+def iter_search_results(domains: List[str], workers: int, plan_for: Callable[[str], List[Tuple[str, str]]]):
+    """Yields _search_worker results as soon as each search finishes."""
+    if workers <= 0:
+        # Inline mode (debugging / tests)
+        for domain in domains:
+            yield _search_worker((domain, plan_for(domain)))
+        return
+
+    # 'spawn' so workers never inherit a CUDA context from the model owner
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(processes=workers) as pool:
+        for start in range(0, len(domains), PLAN_BATCH_SIZE):
+            jobs = [(d, plan_for(d)) for d in domains[start:start + PLAN_BATCH_SIZE]]
+            yield from pool.imap_unordered(_search_worker, jobs)
+
+
+def write_parquet(journal_path: str, output_path: str) -> int:
+    """
+    Converts the journal into a flat Parquet file (technographics kept as a JSON string),
+    one row per domain: its last journaled attempt.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    latest: Dict[str, Dict] = {}
+    with open(journal_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # Already reported by load_journal
+            if not isinstance(record, dict) or not record.get("company_domain"):
+                continue
+            record["technographics"] = json.dumps(record.get("technographics", []))
+            latest[record["company_domain"]] = record  # A retry replaces the earlier attempt
+    rows = list(latest.values())
+
+    tmp_path = output_path + ".tmp"
+    pq.write_table(pa.Table.from_pylist(rows), tmp_path)
+    os.replace(tmp_path, output_path)
+    return len(rows)
+
+
+def run(
+    domains: List[str],
+    output_path: str,
+    output_format: str,
+    hunter_factory,
+    workers: int = 4,
+    dork_stats: Optional[DorkStats] = None,
+) -> Dict:
+    """
+    Enriches every domain not yet in the journal.
+    hunter_factory is called once, and only if there is work left, to load the model.
+    """
+    from signal_map import get_signed_dorks_for_domain
+    dork_stats = dork_stats or DorkStats()
+
+    journal_path = output_path if output_format == "jsonl" else output_path + ".journal.jsonl"
+    done = load_journal(journal_path)
+    pending = [d for d in domains if d not in done]
+    logger.info(f"📋 {len(domains)} domains, {len(done)} already done, {len(pending)} to enrich.")
+
+    stats = {"total": len(domains), "skipped": len(domains) - len(pending), "success": 0, "completed": 0, "failed": 0}
+    started = time.time()
+
+    if pending:
+        results = iter_search_results(
+            pending, workers, lambda d: dork_stats.plan(get_signed_dorks_for_domain(d))
+        )
+        hunter = hunter_factory()
+        with open(journal_path, "a", encoding="utf-8") as journal:
+            for i, (domain, executed, evidence, sources, error) in enumerate(results, start=1):
+                verified_snippets = []
+                record = build_record(
+                    hunter, domain, evidence, error,
+                    on_verified=lambda snippet, tools: verified_snippets.append(snippet)
+                )
+                append_record(journal, record)
+                stats[record["status"]] += 1
+                if record["status"] != "failed":
+                    # An aborted search or a failed extraction says nothing about the dorks' yield
+                    dork_stats.record(executed, sources, verified_snippets)
+                if i % 100 == 0 or i == len(pending):
+                    dork_stats.save()
+                    rate = i / max(time.time() - started, 1e-6)
+                    logger.info(f"⏱️ {i}/{len(pending)} domains ({rate:.2f}/s)")
+
+    if output_format == "parquet" and os.path.exists(journal_path):
+        rows = write_parquet(journal_path, output_path)
+        logger.info(f"📦 Wrote {rows} rows to {output_path}")
+
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline bulk technographic enrichment.")
+    parser.add_argument("input", help="Domains file (.csv with a domain column, or .jsonl)")
+    parser.add_argument("-o", "--output", required=True, help="Output file (.jsonl or .parquet)")
+    parser.add_argument("--format", choices=["jsonl", "parquet"], help="Defaults to the output file extension")
+    parser.add_argument("--workers", type=int, default=4, help="Search processes (0 = search inline)")
+    parser.add_argument("--no-4bit", action="store_true", help="Load the model without 4-bit quantization")
+    args = parser.parse_args(argv)
+
+    output_format = args.format or ("parquet" if args.output.endswith(".parquet") else "jsonl")
+    if output_format == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            parser.error("Parquet output requires pyarrow (pip install pyarrow)")
+
+    def hunter_factory():
+        from hunter_logic import TechnographicHunter
+        return TechnographicHunter(load_4bit=not args.no_4bit)
+
+    stats = run(
+        read_domains(args.input), args.output, output_format, hunter_factory,
+        workers=args.workers, dork_stats=DorkStats.from_env()
+    )
+    logger.info(f"✅ Bulk enrichment finished: {stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+DORK YIELD STATISTICS
+---------------------
+Tracks, per dork signature (the SIGNAL_MAP entry, not the domain-specific query):
+  runs     - how many enrichments executed the query
+  hits     - search snippets it returned
+  verified - snippets that survived the Zero Hallucination layer
+
+The statistics are used to:
+1. ORDER queries by expected verified yield per call (best first).
+2. PRUNE signatures that have proven low-yield (e.g. Ivanti / Cherwell portals),
+   while still re-testing them with probability `exploration_rate` so a signature
+   that starts paying off again is noticed.
+"""
+
+import os
+import json
+import random
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger("DorkStats")
+
+# Optimistic prior: an unseen signature behaves as if 1 of its first 2 runs was verified,
+# so new SIGNAL_MAP entries are ranked high and get tried until real data accumulates.
+PRIOR_VERIFIED = 1.0
+PRIOR_RUNS = 2.0
+
+
+class DorkStats:
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        exploration_rate: float = 0.1,
+        min_runs: int = 20,
+        min_yield: float = 0.05,
+        rng: Optional[random.Random] = None,
+    ):
+        self.path = path
+        self.exploration_rate = exploration_rate
+        self.min_runs = min_runs      # Never prune before this many runs
+        self.min_yield = min_yield    # Verified snippets per run below which we prune
+        self.rng = rng or random.Random()
+        self.signatures: Dict[str, Dict[str, int]] = {}
+        self.unsaved = 0              # Enrichments recorded since the last save
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "DorkStats":
+        stats = cls(
+            path=os.getenv("DORK_STATS_PATH", "dork_stats.json"),
+            exploration_rate=float(os.getenv("DORK_EXPLORATION_RATE", "0.1")),
+            min_runs=int(os.getenv("DORK_MIN_RUNS", "20")),
+            min_yield=float(os.getenv("DORK_MIN_YIELD", "0.05")),
+        )
+        stats.load()
+        return stats
+
+    # --- PERSISTENCE ---
+
+    def load(self) -> None:
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                self.signatures = json.load(f)
+            logger.info(f"📈 Loaded yield stats for {len(self.signatures)} dork signatures.")
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ Ignoring unreadable dork stats at {self.path}: {e}")
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        # Write + rename so a crash never leaves a half-written stats file; under the lock,
+        # as concurrent saves would share the .tmp file
+        with self._lock:
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.signatures, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+            self.unsaved = 0
+
+    # --- SCORING ---
+
+    def expected_yield(self, signature: str) -> float:
+        """Smoothed verified snippets per run."""
+        entry = self.signatures.get(signature, {})
+        return (entry.get("verified", 0) + PRIOR_VERIFIED) / (entry.get("runs", 0) + PRIOR_RUNS)
+
+    def is_low_yield(self, signature: str) -> bool:
+        runs = self.signatures.get(signature, {}).get("runs", 0)
+        return runs >= self.min_runs and self.expected_yield(signature) < self.min_yield
+
+    def plan(self, signed_dorks: Iterable[Tuple[str, str]]) -> List[Tuple[str, str]]:
+        """
+        Orders (signature, query) pairs by expected yield and drops low-yield signatures,
+        except for the ones sampled for exploration.
+        """
+        kept = [
+            (signature, query) for signature, query in signed_dorks
+            if not self.is_low_yield(signature) or self.rng.random() < self.exploration_rate
+        ]
+        return sorted(kept, key=lambda pair: self.expected_yield(pair[0]), reverse=True)
+
+    # --- RECORDING ---
+
+    def record(
+        self,
+        executed: Iterable[Tuple[str, str]],
+        snippet_sources: Dict[str, str],
+        verified_snippets: Iterable[str],
+    ) -> None:
+        """
+        executed:          the (signature, query) pairs that actually ran (filled by waterfall_search);
+                           not the plan, so queries cut short by a rate limit are never charged a run
+        snippet_sources:   snippet -> signature that found it (filled by waterfall_search)
+        verified_snippets: snippets that produced at least one verified tool
+        Only call this for a search that completed (not after SearchAborted).
+        """
+        with self._lock:
+            self.unsaved += 1
+            for signature, _ in executed:
+                self.signatures.setdefault(signature, {"runs": 0, "hits": 0, "verified": 0})["runs"] += 1
+            for signature in snippet_sources.values():
+                if signature in self.signatures:
+                    self.signatures[signature]["hits"] += 1
+            for snippet in set(verified_snippets):
+                signature = snippet_sources.get(snippet)
+                if signature in self.signatures:
+                    self.signatures[signature]["verified"] += 1
+
+    def summary(self) -> List[Dict]:
+        """Per-signature stats, best first (for the /dork-stats endpoint)."""
+        with self._lock:
+            rows = [
+                {
+                    "signature": signature,
+                    **entry,
+                    "expected_yield": round(self.expected_yield(signature), 4),
+                    "pruned": self.is_low_yield(signature),
+                }
+                for signature, entry in self.signatures.items()
+            ]
+        return sorted(rows, key=lambda row: row["expected_yield"], reverse=True)
@@ -70,9 +70,11 @@ class TechnographicHunter:
                 
         return list(set(verified)) # Deduplicate
 
-    def process_evidence(self, company_name, text_snippets):
+    def process_evidence(self, company_name, text_snippets, on_verified=None):
         """
         Takes raw text from the Search Layer and runs the Extraction Model.
+        on_verified(snippet, tools) is called for every snippet that yields verified tools
+        (used to credit the dork that found it).
         """
         evidence_locker = {}
         
@@ -83,6 +85,8 @@ class TechnographicHunter:
             
             # 2. Verify (Zero Hallucination)
             valid_tools = self._verify_evidence(candidates, snippet)
+            if valid_tools and on_verified:
+                on_verified(snippet, valid_tools)
             
             for tool in valid_tools:
                 # Deduplicate and Store
@@ -6,26 +6,48 @@ from googlesearch import search as google_scraper # pip install googlesearch-pyt
 
 logger = logging.getLogger("SearchUtils")
 
-def waterfall_search(company_domain: str, api_key: str = "", cse_id: str = ""):
+
+class SearchAborted(Exception):
+    """
+    The search could not run (rate limited, no fallback configured, API down).
+    Distinct from an empty result: callers must not treat the domain as searched.
+    """
+
+
+def waterfall_search(company_domain: str, api_key: str = "", cse_id: str = "", queries=None, sources=None,
+                     executed=None):
     """
     THE WATERFALL STRATEGY:
     1. Attempt Free Scraper (googlesearch-python).
     2. If Rate Limited (429) or Failed -> Fallback to Google Custom Search API.
     3. Return list of raw text snippets (or URLs).
+    Raises SearchAborted when neither strategy could run the queries (scraper blocked and
+    no API key, CSE rate limit / errors), instead of returning an empty list.
+
+    queries: optional [(signature, query), ...] plan (e.g. ordered/pruned by DorkStats).
+    sources: optional dict, filled with snippet -> signature of the query that found it.
+    executed: optional list, filled with the (signature, query) pairs that actually ran
+    (a query skipped by a rate limit or an error is not in it, so it is never charged a run).
     """
     
     # 1. Generate Dorks (Importing your Signal Map logic here)
-    from signal_map import get_dorks_for_domain
-    queries = get_dorks_for_domain(company_domain, category="all")
+    if queries is None:
+        from signal_map import get_signed_dorks_for_domain
+        queries = get_signed_dorks_for_domain(company_domain, category="all")
+    if sources is None:
+        sources = {}
+    if executed is None:
+        executed = []
     
     aggregated_results = []
     seen_urls = set()
+    scraper_error = None
 
     # --- STRATEGY A: FREE SCRAPER ---
     try:
         logger.info(f"🕵️ Attempting Free Scraper for {company_domain}...")
         
-        for q in queries:
+        for signature, q in queries:
             # Random delay to be polite to Google
             time.sleep(random.uniform(1.5, 3.5)) 
             
@@ -37,7 +59,9 @@ def waterfall_search(company_domain: str, api_key: str = "", cse_id: str = ""):
                 if res.url not in seen_urls:
                     # We store the snippet because that's what the AI reads
                     aggregated_results.append(res.description) 
+                    sources.setdefault(res.description, signature)
                     seen_urls.add(res.url)
+            executed.append((signature, q))
         
         if aggregated_results:
             logger.info(f"✅ Scraper Success: Found {len(aggregated_results)} snippets.")
@@ -45,17 +69,22 @@ def waterfall_search(company_domain: str, api_key: str = "", cse_id: str = ""):
 
     except Exception as e:
         logger.warning(f"⚠️ Scraper Failed (likely Rate Limit): {str(e)}")
+        scraper_error = e
         # PROCEED TO FALLBACK...
 
     # --- STRATEGY B: PAID API FALLBACK ---
     if not api_key or not cse_id:
         logger.error("❌ API Fallback Skipped: Missing GOOGLE_API_KEY or CSE_ID.")
+        if scraper_error is not None:
+            raise SearchAborted(f"Scraper failed ({scraper_error}) and no API fallback is configured")
+        # The scraper ran every query and simply found nothing
         return []
 
     try:
         logger.info(f"💳 Switching to Google Custom Search API for {company_domain}...")
         
-        for q in queries:
+        succeeded = 0
+        for signature, q in queries:
             # Google CSE API Endpoint
             url = "https://www.googleapis.com/customsearch/v1"
             params = {
@@ -68,6 +97,9 @@ def waterfall_search(company_domain: str, api_key: str = "", cse_id: str = ""):
             resp = requests.get(url, params=params)
             
             if resp.status_code == 200:
+                succeeded += 1
+                if (signature, q) not in executed:  # Already counted if the scraper ran it
+                    executed.append((signature, q))
                 data = resp.json()
                 for item in data.get('items', []):
                     link = item.get('link')
@@ -75,16 +107,21 @@ def waterfall_search(company_domain: str, api_key: str = "", cse_id: str = ""):
                     
                     if link not in seen_urls:
                         aggregated_results.append(snippet)
+                        sources.setdefault(snippet, signature)
                         seen_urls.add(link)
             elif resp.status_code == 429:
                 logger.error("❌ API Rate Limit Exceeded.")
-                break
+                raise SearchAborted(f"Custom Search API rate limit exceeded after {succeeded} queries")
             else:
                 logger.error(f"❌ API Error {resp.status_code}: {resp.text}")
 
+        if queries and not succeeded:
+            raise SearchAborted("Custom Search API failed for every query")
         logger.info(f"✅ API Search Completed: Found {len(aggregated_results)} snippets.")
         return aggregated_results
 
+    except SearchAborted:
+        raise
     except Exception as e:
         logger.error(f"❌ API Fallback Failed: {str(e)}")
-        return []
+        raise SearchAborted(f"Custom Search API fallback failed: {e}") from e
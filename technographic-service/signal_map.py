@@ -87,10 +87,12 @@ SIGNAL_MAP = {
 }
 
 # HELPER FUNCTION: Dork Generator
-def get_dorks_for_domain(company_domain, category="all"):
+def get_signed_dorks_for_domain(company_domain, category="all"):
     """
-    Constructs Google-ready query strings combined with the company domain.
-    Usage: get_dorks_for_domain("villageroadshow.com.au", category="competitors")
+    Same as get_dorks_for_domain, but each query is paired with its "signature":
+    the SIGNAL_MAP entry it was generated from (e.g. 'competitors/SysAid/inurl:sysaidit.com/Login.jsp').
+    Signatures are domain independent, so yield statistics can be aggregated across companies.
+    Returns: [(signature, query), ...]
     """
     signals = SIGNAL_MAP["Atomicwork"]
     generated_dorks = []
@@ -101,19 +103,27 @@ def get_dorks_for_domain(company_domain, category="all"):
             for dork in dork_list:
                 # If dork is a "site:" search, we combine it with the company name
                 if "site:" in dork or "inurl:" in dork:
-                    generated_dorks.append(f'"{company_domain}" {dork}')
+                    generated_dorks.append((f"competitors/{tech}/{dork}", f'"{company_domain}" {dork}'))
     
     # 2. Ecosystem Search (Integration fit)
     if category in ["all", "ecosystem"]:
         for tech, dork_list in signals["ecosystem"].items():
             for dork in dork_list:
-                generated_dorks.append(f'"{company_domain}" {dork}')
+                generated_dorks.append((f"ecosystem/{tech}/{dork}", f'"{company_domain}" {dork}'))
 
     # 3. Job Description Search (Broad Catch-all)
     # This is the single most effective query for finding what they use in text
     if category in ["all", "general"]:
-        generated_dorks.append(
+        generated_dorks.append((
+            "general/linkedin_jobs",
             f'"{company_domain}" (ServiceNow OR Freshservice OR "Jira Service Management" OR "Microsoft Teams") site:linkedin.com/jobs'
-        )
+        ))
 
     return generated_dorks
+
+def get_dorks_for_domain(company_domain, category="all"):
+    """
+    Constructs Google-ready query strings combined with the company domain.
+    Usage: get_dorks_for_domain("villageroadshow.com.au", category="competitors")
+    """
+    return [query for _, query in get_signed_dorks_for_domain(company_domain, category)]
@@ -0,0 +1,137 @@
+import os
+import json
+import shutil
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+import bulk_enrich
+
+
+class TestBulkEnrichment(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.output = os.path.join(self.tmp_dir, "results.jsonl")
+
+        # Mock hunter: one verified tool per domain, no model load
+        self.hunter = MagicMock()
+        def process_evidence(domain, evidence, on_verified=None):
+            on_verified(evidence[0], ["ServiceNow"])
+            return [{"tech_name": "ServiceNow", "evidence": evidence[0]}]
+        self.hunter.process_evidence.side_effect = process_evidence
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _write(self, name, content):
+        path = os.path.join(self.tmp_dir, name)
+        with open(path, "w") as f:
+            f.write(content)
+        return path
+
+    def _fake_search(self, job):
+        domain, plan = job
+        if domain == "empty.com":
+            return domain, plan, [], {}, None
+        snippet = f"{domain} uses ServiceNow"
+        return domain, plan, [snippet], {snippet: plan[0][0]}, None
+
+    def test_read_domains_csv_and_jsonl(self):
+        csv_path = self._write("domains.csv", "name,Domain\nAcme,https://www.Acme.com/\nDup,acme.com\nBeta,beta.io\n")
+        self.assertEqual(bulk_enrich.read_domains(csv_path), ["acme.com", "beta.io"])
+
+        jsonl_path = self._write("domains.jsonl", '{"company_domain": "acme.com"}\n\n"beta.io"\n')
+        self.assertEqual(bulk_enrich.read_domains(jsonl_path), ["acme.com", "beta.io"])
+
+    def test_resume_skips_journaled_domains(self):
+        domains = ["acme.com", "beta.io", "empty.com"]
+
+        # Simulate a crash: one complete entry and one half-written line
+        with open(self.output, "w") as f:
+            f.write(json.dumps({"company_domain": "acme.com", "status": "success"}) + "\n")
+            f.write('{"company_domain": "beta.io", "sta')
+
+        with patch.object(bulk_enrich, "_search_worker", side_effect=self._fake_search) as search:
+            stats = bulk_enrich.run(domains, self.output, "jsonl", lambda: self.hunter, workers=0)
+
+        self.assertEqual([c.args[0][0] for c in search.call_args_list], ["beta.io", "empty.com"])
+        self.assertEqual(stats["skipped"], 1)
+        self.assertEqual(stats["success"], 1)
+        self.assertEqual(stats["completed"], 1)
+
+        with open(self.output) as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual([r["company_domain"] for r in records], domains)
+        self.assertEqual(records[1]["technographics"][0]["tech_name"], "ServiceNow")
+
+    def test_resume_retries_failed_domains(self):
+        with open(self.output, "w") as f:
+            f.write(json.dumps({"company_domain": "acme.com", "status": "failed", "error": "429"}) + "\n")
+            f.write(json.dumps({"company_domain": "beta.io", "status": "completed"}) + "\n")
+
+        with patch.object(bulk_enrich, "_search_worker", side_effect=self._fake_search) as search:
+            stats = bulk_enrich.run(["acme.com", "beta.io"], self.output, "jsonl", lambda: self.hunter, workers=0)
+
+        self.assertEqual([c.args[0][0] for c in search.call_args_list], ["acme.com"])
+        self.assertEqual((stats["skipped"], stats["success"]), (1, 1))
+        self.assertEqual(bulk_enrich.load_journal(self.output), {"acme.com", "beta.io"})
+
+    def test_load_journal_skips_bad_lines_without_truncating(self):
+        lines = [
+            json.dumps({"company_domain": "acme.com", "status": "success"}),
+            '{"company_domain": "corrupt',
+            json.dumps({"status": "success"}),
+            json.dumps({"company_domain": "beta.io", "status": "completed"}),
+        ]
+        with open(self.output, "w") as f:
+            f.write("\n".join(lines) + "\n" + '{"company_domain": "gamma')
+        complete_size = sum(len(line) + 1 for line in lines)
+
+        self.assertEqual(bulk_enrich.load_journal(self.output), {"acme.com", "beta.io"})
+        # Only the incomplete final line is cut off
+        self.assertEqual(os.path.getsize(self.output), complete_size)
+
+    def test_search_abort_is_an_error_not_empty_evidence(self):
+        rate_limited = MagicMock(status_code=429, text="quota")
+        with patch("search_utils.time.sleep"), \
+                patch("search_utils.google_scraper", side_effect=Exception("429 Too Many Requests")), \
+                patch("search_utils.requests.get", return_value=rate_limited), \
+                patch.object(bulk_enrich, "GOOGLE_API_KEY", "key"), patch.object(bulk_enrich, "GOOGLE_CSE_ID", "cx"):
+            domain, _, evidence, _, error = bulk_enrich._search_worker(("acme.com", [("sig", "q")]))
+
+        self.assertEqual((domain, evidence), ("acme.com", []))
+        self.assertIn("rate limit", error)
+        record = bulk_enrich.build_record(self.hunter, domain, evidence, error)
+        self.assertEqual(record["status"], "failed")
+
+    def test_dork_stats_recorded_per_domain(self):
+        stats = bulk_enrich.DorkStats()
+        with patch.object(bulk_enrich, "_search_worker", side_effect=self._fake_search):
+            bulk_enrich.run(["acme.com", "empty.com"], self.output, "jsonl", lambda: self.hunter,
+                            workers=0, dork_stats=stats)
+
+        best = stats.summary()[0]
+        self.assertEqual((best["runs"], best["hits"], best["verified"]), (2, 1, 1))
+
+    def test_failed_extraction_does_not_charge_the_dorks(self):
+        self.hunter.process_evidence.side_effect = RuntimeError("CUDA out of memory")
+        stats = bulk_enrich.DorkStats()
+        with patch.object(bulk_enrich, "_search_worker", side_effect=self._fake_search):
+            result = bulk_enrich.run(["acme.com"], self.output, "jsonl", lambda: self.hunter,
+                                     workers=0, dork_stats=stats)
+
+        self.assertEqual(result["failed"], 1)
+        self.assertEqual(stats.summary(), [])
+
+    def test_model_not_loaded_when_nothing_pending(self):
+        with open(self.output, "w") as f:
+            f.write(json.dumps({"company_domain": "acme.com", "status": "success"}) + "\n")
+
+        factory = MagicMock()
+        bulk_enrich.run(["acme.com"], self.output, "jsonl", factory, workers=0)
+        factory.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+from dork_stats import DorkStats
+from signal_map import get_dorks_for_domain, get_signed_dorks_for_domain
+
+
+class TestDorkStats(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.plan = [("good", '"acme.com" good'), ("bad", '"acme.com" bad'), ("new", '"acme.com" new')]
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _train(self, stats, runs=30):
+        # "good" finds a verified snippet on every run, "bad" finds noise, "new" is never run
+        for i in range(runs):
+            good_snippet, bad_snippet = f"good snippet {i}", f"bad snippet {i}"
+            stats.record(
+                self.plan[:2],
+                {good_snippet: "good", bad_snippet: "bad"},
+                [good_snippet],
+            )
+
+    def test_signed_dorks_match_legacy_queries(self):
+        signed = get_signed_dorks_for_domain("acme.com")
+        self.assertEqual([q for _, q in signed], get_dorks_for_domain("acme.com"))
+        self.assertEqual(len({sig for sig, _ in signed}), len(signed))
+
+    def test_plan_orders_by_yield_and_prunes_low_yield(self):
+        stats = DorkStats(exploration_rate=0.0, min_runs=20, min_yield=0.05)
+        self._train(stats)
+
+        planned = [sig for sig, _ in stats.plan(self.plan)]
+
+        # "bad" is pruned; the unseen "new" still gets tried thanks to the optimistic prior
+        self.assertEqual(planned, ["good", "new"])
+
+    def test_exploration_retests_pruned_signatures(self):
+        stats = DorkStats(exploration_rate=0.5, rng=random.Random(7))
+        self._train(stats)
+
+        kept = sum("bad" in [sig for sig, _ in stats.plan(self.plan)] for _ in range(1000))
+        self.assertTrue(400 < kept < 600, kept)
+
+    def test_only_executed_queries_are_charged_a_run(self):
+        plan = self.plan + [("extra", '"acme.com" extra')]
+        hit = MagicMock(url="https://acme.com/jobs/1", description="acme.com uses ServiceNow")
+        responses = [
+            MagicMock(status_code=200, json=lambda: {"items": [{"link": "https://x/1", "snippet": "noise"}]}),
+            MagicMock(status_code=500, text="backend error"),
+            MagicMock(status_code=200, json=lambda: {"items": []}),
+            MagicMock(status_code=200, json=lambda: {"items": []}),
+        ]
+        sources, executed = {}, []
+        # The scraper runs "good" then gets blocked; the API fallback errors on "bad"
+        with patch("search_utils.time.sleep"), \
+                patch("search_utils.google_scraper", side_effect=[[hit], Exception("429")]), \
+                patch("search_utils.requests.get", side_effect=responses):
+            from search_utils import waterfall_search
+            waterfall_search("acme.com", "key", "cx", queries=plan, sources=sources, executed=executed)
+
+        self.assertEqual([sig for sig, _ in executed], ["good", "new", "extra"])
+        stats = DorkStats()
+        stats.record(executed, sources, [])
+        self.assertNotIn("bad", stats.signatures)
+        self.assertEqual(stats.signatures["good"]["runs"], 1)
+
+    def test_stats_persist_across_instances(self):
+        path = os.path.join(self.tmp_dir, "dork_stats.json")
+        stats = DorkStats(path=path)
+        self._train(stats, runs=3)
+        self.assertEqual(stats.unsaved, 3)
+        stats.save()
+
+        reloaded = DorkStats(path=path)
+        reloaded.load()
+        self.assertEqual(reloaded.signatures["good"], {"runs": 3, "hits": 3, "verified": 3})
+        self.assertEqual(reloaded.signatures["bad"]["verified"], 0)
+        self.assertEqual(stats.unsaved, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,4 @@
+"""
+Shared helpers for the Python TTS services
+(chatterbox-tts-service, voice-service, local-tts-service).
+"""
@@ -0,0 +1,188 @@
+"""
+Rendered audio cache
+Agents repeat the same greetings, fillers and objection-handling lines all day, so the
+final encoded bytes are cached by content: text, voice (and its revision), engine
+settings, output format and model version. Two tiers:
+  - memory: LRU bounded by total bytes
+  - disk:   one file per key under <cache_dir>/<2-char shard>/<sha256>, bounded by
+            max_disk_bytes; least recently used files (mtime, refreshed on every hit)
+            are evicted down to 90% of the bound once it is exceeded
+A hit never touches the model. Async handlers use aget / aput: a memory hit is answered
+inline, disk reads and writes run on a worker thread instead of blocking the event loop.
+"""
+
+import os
+import json
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+# Eviction stops once the disk tier is back under this fraction of max_disk_bytes
+DISK_LOW_WATERMARK = 0.9
+
+
+class RenderedAudioCache:
+    def __init__(self, cache_dir: Optional[str], memory_bytes: int = 64 * 1024 * 1024,
+                 max_disk_bytes: int = 2 * 1024 * 1024 * 1024):
+        self.cache_dir = cache_dir            # None disables the disk tier
+        self.memory_bytes = memory_bytes      # 0 disables the memory tier
+        self.max_disk_bytes = max_disk_bytes  # 0 = unbounded
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_used = 0
+        self._lock = threading.Lock()
+        self._evict_lock = threading.Lock()
+        self._disk_used: Optional[int] = None  # Scanned on first write
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "disk_evictions": 0}
+
+    @staticmethod
+    def make_key(**params) -> str:
+        """Stable content hash of every parameter that changes the rendered bytes"""
+        payload = json.dumps(params, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    # --- Memory tier ---
+
+    def _remember(self, key: str, data: bytes) -> None:
+        if len(data) > self.memory_bytes:
+            return
+        with self._lock:
+            if key in self._memory:
+                self._memory_used -= len(self._memory.pop(key))
+            self._memory[key] = data
+            self._memory_used += len(data)
+            while self._memory_used > self.memory_bytes:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_used -= len(evicted)
+
+    def _get_memory(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+            elif not self.cache_dir:
+                self.stats["misses"] += 1
+            return data
+
+    # --- Disk tier ---
+
+    def _disk_files(self):
+        """(mtime, size, path) of every cached file"""
+        for root, _, names in os.walk(self.cache_dir):
+            for name in names:
+                if name.endswith(".tmp"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                yield stat.st_mtime, stat.st_size, path
+
+    def _get_disk(self, key: str) -> Optional[bytes]:
+        path = self._disk_path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)  # Recently used: evicted last
+        except FileNotFoundError:
+            data = None
+        with self._lock:
+            self.stats["disk_hits" if data is not None else "misses"] += 1
+        if data is not None:
+            self._remember(key, data)
+        return data
+
+    def _put_disk(self, key: str, data: bytes) -> None:
+        path = self._disk_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            replaced = os.path.getsize(path)
+        except FileNotFoundError:
+            replaced = 0
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        with self._lock:
+            if self._disk_used is None:
+                self._disk_used = sum(size for _, size, _ in self._disk_files())
+            else:
+                self._disk_used += len(data) - replaced
+            over = self.max_disk_bytes and self._disk_used > self.max_disk_bytes
+        if over:
+            self._evict_disk()
+
+    def _evict_disk(self) -> None:
+        """Delete least recently used files until the disk tier is under the low watermark"""
+        if not self._evict_lock.acquire(blocking=False):
+            return  # Another writer is already evicting
+        try:
+            files = sorted(self._disk_files())
+            used = sum(size for _, size, _ in files)
+            target = self.max_disk_bytes * DISK_LOW_WATERMARK
+            evicted = 0
+            for _, size, path in files:
+                if used <= target:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                used -= size
+                evicted += 1
+            with self._lock:
+                self._disk_used = used
+                self.stats["disk_evictions"] += evicted
+        finally:
+            self._evict_lock.release()
+
+    # --- API ---
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Blocking lookup (worker threads); async handlers use aget"""
+        data = self._get_memory(key)
+        if data is None and self.cache_dir:
+            data = self._get_disk(key)
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        """Blocking store (worker threads); async handlers use aput"""
+        self._remember(key, data)
+        if self.cache_dir:
+            self._put_disk(key, data)
+        with self._lock:
+            self.stats["stores"] += 1
+
+    async def aget(self, key: str) -> Optional[bytes]:
+        data = self._get_memory(key)
+        if data is None and self.cache_dir:
+            data = await asyncio.to_thread(self._get_disk, key)
+        return data
+
+    async def aput(self, key: str, data: bytes) -> None:
+        self._remember(key, data)
+        if self.cache_dir:
+            await asyncio.to_thread(self._put_disk, key, data)
+        with self._lock:
+            self.stats["stores"] += 1
+
+    def summary(self) -> dict:
+        with self._lock:
+            lookups = self.stats["memory_hits"] + self.stats["disk_hits"] + self.stats["misses"]
+            hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+            return {
+                **self.stats,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_used,
+                "memory_limit_bytes": self.memory_bytes,
+                "disk_enabled": bool(self.cache_dir),
+                "disk_bytes": self._disk_used,
+                "disk_limit_bytes": self.max_disk_bytes,
+            }
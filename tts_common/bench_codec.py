@@ -0,0 +1,121 @@
+"""
+Benchmark: TTS waveform -> 8 kHz μ-law, per backend
+  python -m tts_common.bench_codec [--seconds 5] [--rate 24000] [--repeat 50]
+
+Backends (each skipped when not available):
+  numpy        tts_common.codec (cached polyphase resampler + table lookup)
+  audioop      audioop.ratecv + audioop.lin2ulaw (removed in Python 3.13)
+  torchaudio   new Resample per call + audioop (the old chatterbox convert_to_ulaw)
+  ffmpeg       one ffmpeg subprocess per utterance (pydub / backend audioConverter.js)
+
+Also checks that the NumPy G.711 encoder is bit-exact with audioop.
+"""
+
+import argparse
+import importlib.util
+import shutil
+import subprocess
+import time
+import warnings
+
+import numpy as np
+
+from tts_common import codec
+
+warnings.filterwarnings("ignore", category=DeprecationWarning)
+try:
+    import audioop
+except ImportError:
+    audioop = None
+
+
+def speech_like_signal(seconds: float, rate: int) -> np.ndarray:
+    """Deterministic voiced/unvoiced mix, roughly speech-shaped"""
+    rng = np.random.default_rng(0)
+    t = np.arange(int(seconds * rate)) / rate
+    envelope = 0.5 + 0.5 * np.sin(2 * np.pi * 3 * t)
+    voiced = sum(np.sin(2 * np.pi * f * t) / k for k, f in enumerate((140, 280, 420, 1100, 2400), start=1))
+    return (0.2 * envelope * voiced + 0.02 * rng.standard_normal(len(t))).astype(np.float32)
+
+
+def via_numpy(audio, rate):
+    return codec.encode_telephony(audio, rate)
+
+
+def via_audioop(audio, rate):
+    pcm = codec.float_to_pcm16(audio).tobytes()
+    pcm, _ = audioop.ratecv(pcm, 2, 1, rate, codec.TELEPHONY_RATE, None)
+    return audioop.lin2ulaw(pcm, 2)
+
+
+def via_torchaudio(audio, rate):
+    import torch
+    import torchaudio as ta
+    resampled = ta.transforms.Resample(rate, codec.TELEPHONY_RATE)(torch.from_numpy(audio).unsqueeze(0))
+    return audioop.lin2ulaw(codec.float_to_pcm16(resampled.squeeze(0).numpy()).tobytes(), 2)
+
+
+def via_ffmpeg(audio, rate):
+    pcm = codec.float_to_pcm16(audio).tobytes()
+    return subprocess.run(
+        ["ffmpeg", "-loglevel", "error", "-f", "s16le", "-ar", str(rate), "-ac", "1", "-i", "pipe:0",
+         "-ar", str(codec.TELEPHONY_RATE), "-ac", "1", "-f", "mulaw", "pipe:1"],
+        input=pcm, capture_output=True, check=True,
+    ).stdout
+
+
+def available_backends():
+    backends = {"numpy": via_numpy}
+    if audioop is not None:
+        backends["audioop"] = via_audioop
+        if importlib.util.find_spec("torchaudio") is not None:
+            backends["torchaudio"] = via_torchaudio
+    if shutil.which("ffmpeg"):
+        backends["ffmpeg"] = via_ffmpeg
+    return backends
+
+
+def time_backend(fn, audio, rate, repeat):
+    fn(audio, rate)  # warm-up (filter design, imports)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(audio, rate)
+        timings.append(time.perf_counter() - start)
+    return np.array(timings)
+
+
+def check_bit_exact():
+    if audioop is None:
+        return None
+    pcm = np.arange(-32768, 32768, dtype=np.int16)
+    return codec.ulaw_encode(pcm).tobytes() == audioop.lin2ulaw(pcm.tobytes(), 2)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="μ-law conversion benchmark")
+    parser.add_argument("--seconds", type=float, default=5.0, help="Utterance length")
+    parser.add_argument("--rate", type=int, default=24000, help="TTS output sample rate")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    audio = speech_like_signal(args.seconds, args.rate)
+    print(f"{args.seconds:.1f}s utterance at {args.rate} Hz -> 8 kHz μ-law, {args.repeat} runs\n")
+    print(f"{'backend':<12}{'p50 ms':>10}{'p95 ms':>10}{'µs / audio s':>16}")
+    for name, fn in available_backends().items():
+        timings = time_backend(fn, audio, args.rate, args.repeat)
+        p50, p95 = np.percentile(timings, [50, 95]) * 1000
+        print(f"{name:<12}{p50:>10.3f}{p95:>10.3f}{p50 * 1000 / args.seconds:>16.1f}")
+
+    # The encode step alone (already at 8 kHz)
+    pcm8k = codec.float_to_pcm16(codec.resample(audio, args.rate, codec.TELEPHONY_RATE))
+    encode = time_backend(lambda a, r: codec.ulaw_encode(a), pcm8k, None, args.repeat)
+    print(f"\nnumpy μ-law encode only: {np.median(encode) * 1e6:.1f} µs for {args.seconds:.1f}s of 8 kHz audio")
+
+    exact = check_bit_exact()
+    if exact is not None:
+        print(f"bit-exact with audioop.lin2ulaw over all int16 values: {exact}")
+
+
+if __name__ == "__main__":
+    main()
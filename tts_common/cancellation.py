@@ -0,0 +1,196 @@
+"""
+Cancellation of in-flight synthesis
+When a prospect barges in, the bridge stops listening for the rest of the utterance.
+Each synthesis request gets a CancellationToken, keyed by its request id (X-Request-ID,
+or "request_id" on a WebSocket message). The token is cancelled by:
+  - POST /cancel/{request_id}
+  - the HTTP client disconnecting (polled while the request is generating)
+  - {"event": "cancel"} or a disconnect on a WebSocket
+Generation stops at the next boundary: between segments, before a queued model call
+starts, and - via a forward pre-hook on the model's decoder - between decoding steps.
+"""
+
+import uuid
+import asyncio
+import threading
+from contextlib import contextmanager
+from typing import AsyncIterator, Dict, Optional, Tuple
+
+
+class Cancelled(Exception):
+    """Raised at a step/segment boundary once the request's token is cancelled"""
+
+
+class CancellationToken:
+    def __init__(self, request_id: str):
+        self.request_id = request_id
+        self.reason: Optional[str] = None
+        self._event = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self, reason: str = "cancelled") -> bool:
+        """False if it was already cancelled"""
+        if self._event.is_set():
+            return False
+        self.reason = reason
+        self._event.set()
+        return True
+
+    def raise_if_cancelled(self) -> None:
+        if self._event.is_set():
+            raise Cancelled(f"Request {self.request_id} {self.reason}")
+
+
+class CancellationRegistry:
+    def __init__(self):
+        self._tokens: Dict[str, CancellationToken] = {}
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {}
+
+    def register(self, request_id: Optional[str] = None) -> CancellationToken:
+        token = CancellationToken(request_id or uuid.uuid4().hex)
+        with self._lock:
+            self._tokens[token.request_id] = token
+        return token
+
+    def release(self, token: CancellationToken) -> None:
+        with self._lock:
+            if self._tokens.get(token.request_id) is token:
+                del self._tokens[token.request_id]
+            if token.cancelled:
+                self.stats[token.reason] = self.stats.get(token.reason, 0) + 1
+
+    @contextmanager
+    def track(self, request_id: Optional[str] = None):
+        token = self.register(request_id)
+        try:
+            yield token
+        finally:
+            self.release(token)
+
+    def cancel(self, request_id: str, reason: str = "cancelled") -> bool:
+        """Cancel an in-flight request; False if no such request is running"""
+        with self._lock:
+            token = self._tokens.get(request_id)
+        if token is None:
+            return False
+        token.cancel(reason)
+        return True
+
+    def summary(self) -> dict:
+        with self._lock:
+            return {"in_flight": len(self._tokens), "cancelled": dict(self.stats)}
+
+
+# --- Worker-thread side ---
+
+_current = threading.local()
+
+
+@contextmanager
+def bind(token: Optional[CancellationToken]):
+    """Make `token` the one step hooks check, for the duration of a blocking model call"""
+    previous = getattr(_current, "token", None)
+    _current.token = token
+    try:
+        if token is not None:
+            token.raise_if_cancelled()
+        yield
+    finally:
+        _current.token = previous
+
+
+def check_cancelled() -> None:
+    token = getattr(_current, "token", None)
+    if token is not None:
+        token.raise_if_cancelled()
+
+
+def install_step_hooks(root, *dotted_paths: str) -> list:
+    """
+    Forward pre-hooks on submodules that run once per decoding step (e.g. the
+    autoregressive transformer), so a cancelled request stops at the next step.
+    Paths that do not exist on this model are skipped; returns the ones hooked.
+    """
+    import torch.nn as nn
+
+    hooked = []
+    for dotted in dotted_paths:
+        module = root
+        for attr in dotted.split("."):
+            module = getattr(module, attr, None)
+            if module is None:
+                break
+        if isinstance(module, nn.Module):
+            module.register_forward_pre_hook(lambda *_: check_cancelled())
+            hooked.append(dotted)
+    return hooked
+
+
+# --- Event-loop side ---
+
+async def run_until_cancelled(coro, token: CancellationToken, http_request=None, poll_s: float = 0.1):
+    """
+    Await coro, cancelling it as soon as the token is cancelled or (if given) the HTTP
+    client disconnects. Raises Cancelled in that case.
+    """
+    task = asyncio.ensure_future(coro)
+    try:
+        while True:
+            if token.cancelled:
+                task.cancel()
+                token.raise_if_cancelled()
+            done, _ = await asyncio.wait({task}, timeout=poll_s)
+            if done:
+                return task.result()
+            if http_request is not None and await http_request.is_disconnected():
+                token.cancel("client disconnected")
+    finally:
+        if not task.done():
+            task.cancel()
+
+
+async def websocket_utterances(websocket, registry: CancellationRegistry) -> AsyncIterator[Tuple[dict, CancellationToken]]:
+    """
+    Yield (message, token) for each utterance request on a WebSocket. Messages are read
+    concurrently, so {"event": "cancel"} (barge-in) or a disconnect cancels the utterance
+    still being generated. Each token is released when the next message is requested.
+    """
+    from fastapi import WebSocketDisconnect
+
+    pending: asyncio.Queue = asyncio.Queue()
+    current: Dict[str, Optional[CancellationToken]] = {"token": None}
+
+    async def reader():
+        try:
+            while True:
+                message = await websocket.receive_json()
+                if message.get("event") == "cancel":
+                    if current["token"] is not None:
+                        current["token"].cancel("barge-in")
+                    continue
+                await pending.put(message)
+        except WebSocketDisconnect:
+            if current["token"] is not None:
+                current["token"].cancel("client disconnected")
+        finally:
+            await pending.put(None)
+
+    reader_task = asyncio.create_task(reader())
+    try:
+        while True:
+            message = await pending.get()
+            if message is None:
+                return
+            token = registry.register(message.get("request_id"))
+            current["token"] = token
+            try:
+                yield message, token
+            finally:
+                current["token"] = None
+                registry.release(token)
+    finally:
+        reader_task.cancel()
@@ -0,0 +1,247 @@
+"""
+Telephony audio codec
+NumPy-vectorized G.711 μ-law / A-law (bit-exact with the classic Sun/CCITT g711.c,
+i.e. what audioop produced) and cached polyphase resamplers.
+
+Twilio Media Streams expect 8 kHz, mono, μ-law. Encoding is a single table lookup
+over all 65536 int16 values, and each (src_rate, dst_rate) pair designs its
+anti-aliasing filter once, so converting a TTS waveform is a cheap in-process step
+(no audioop, which is gone in Python 3.13, and no ffmpeg subprocess).
+"""
+
+from functools import lru_cache
+from math import gcd
+from typing import Union
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+TELEPHONY_RATE = 8000
+
+# --- G.711 ---
+
+_ULAW_SEG_END = np.array([0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF, 0x1FFF])
+_ALAW_SEG_END = np.array([0x1F, 0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF])
+_ULAW_BIAS = 0x84
+_ULAW_CLIP = 8159
+
+
+def _build_ulaw_encode_table() -> np.ndarray:
+    """μ-law byte for every int16 sample, indexed by the sample's uint16 bit pattern"""
+    pcm = np.arange(65536, dtype=np.uint16).view(np.int16).astype(np.int32) >> 2  # 14-bit
+    mask = np.where(pcm < 0, 0x7F, 0xFF)
+    magnitude = np.minimum(np.abs(pcm), _ULAW_CLIP) + (_ULAW_BIAS >> 2)
+    seg = np.searchsorted(_ULAW_SEG_END, magnitude)
+    uval = (np.minimum(seg, 7) << 4) | ((magnitude >> (np.minimum(seg, 7) + 1)) & 0xF)
+    uval = np.where(seg >= 8, 0x7F, uval)
+    return (uval ^ mask).astype(np.uint8)
+
+
+def _build_alaw_encode_table() -> np.ndarray:
+    """A-law byte for every int16 sample, indexed by the sample's uint16 bit pattern"""
+    pcm = np.arange(65536, dtype=np.uint16).view(np.int16).astype(np.int32) >> 3  # 13-bit
+    mask = np.where(pcm >= 0, 0xD5, 0x55)
+    magnitude = np.where(pcm >= 0, pcm, -pcm - 1)
+    seg = np.searchsorted(_ALAW_SEG_END, magnitude)
+    shift = np.where(seg < 2, 1, np.minimum(seg, 7))
+    aval = (np.minimum(seg, 7) << 4) | ((magnitude >> shift) & 0xF)
+    aval = np.where(seg >= 8, 0x7F, aval)
+    return (aval ^ mask).astype(np.uint8)
+
+
+def _build_ulaw_decode_table() -> np.ndarray:
+    u_val = ~np.arange(256, dtype=np.int32) & 0xFF
+    t = (((u_val & 0x0F) << 3) + _ULAW_BIAS) << ((u_val & 0x70) >> 4)
+    return np.where(u_val & 0x80, _ULAW_BIAS - t, t - _ULAW_BIAS).astype(np.int16)
+
+
+def _build_alaw_decode_table() -> np.ndarray:
+    a_val = np.arange(256, dtype=np.int32) ^ 0x55
+    seg = (a_val & 0x70) >> 4
+    t = (a_val & 0x0F) << 4
+    t = np.where(seg == 0, t + 8, (t + 0x108) << np.maximum(seg - 1, 0))
+    return np.where(a_val & 0x80, t, -t).astype(np.int16)
+
+
+_ULAW_ENCODE = _build_ulaw_encode_table()
+_ALAW_ENCODE = _build_alaw_encode_table()
+_ULAW_DECODE = _build_ulaw_decode_table()
+_ALAW_DECODE = _build_alaw_decode_table()
+
+
+def _as_uint8(data: Union[bytes, bytearray, memoryview, np.ndarray]) -> np.ndarray:
+    if isinstance(data, np.ndarray):
+        return data.astype(np.uint8, copy=False)
+    return np.frombuffer(data, dtype=np.uint8)
+
+
+def ulaw_encode(pcm16: np.ndarray) -> np.ndarray:
+    """int16 samples -> μ-law bytes (uint8 array)"""
+    return _ULAW_ENCODE[np.asarray(pcm16, dtype=np.int16).view(np.uint16)]
+
+
+def ulaw_decode(data) -> np.ndarray:
+    """μ-law bytes -> int16 samples"""
+    return _ULAW_DECODE[_as_uint8(data)]
+
+
+def alaw_encode(pcm16: np.ndarray) -> np.ndarray:
+    """int16 samples -> A-law bytes (uint8 array)"""
+    return _ALAW_ENCODE[np.asarray(pcm16, dtype=np.int16).view(np.uint16)]
+
+
+def alaw_decode(data) -> np.ndarray:
+    """A-law bytes -> int16 samples"""
+    return _ALAW_DECODE[_as_uint8(data)]
+
+
+# --- PCM helpers ---
+
+def float_to_pcm16(audio: np.ndarray) -> np.ndarray:
+    """Float waveform in [-1, 1] -> int16 (clipped)"""
+    audio = np.clip(np.asarray(audio, dtype=np.float32), -1.0, 1.0)
+    return (audio * 32767.0).astype(np.int16)
+
+
+def pcm16_to_float(pcm16: np.ndarray) -> np.ndarray:
+    return np.asarray(pcm16, dtype=np.float32) / 32768.0
+
+
+def pcm_bytes_to_float(data: bytes, sample_width: int = 2, channels: int = 1) -> np.ndarray:
+    """Interleaved signed PCM (8/16/32-bit) -> mono float32 in [-1, 1]"""
+    if sample_width == 1:
+        # 8-bit WAV is unsigned
+        samples = (np.frombuffer(data, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    else:
+        dtype = {2: np.int16, 4: np.int32}[sample_width]
+        samples = np.frombuffer(data, dtype=dtype).astype(np.float32) / float(2 ** (8 * sample_width - 1))
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    return samples
+
+
+# --- Resampling ---
+
+class PolyphaseResampler:
+    """
+    Rational-rate resampler (up / down), Kaiser-windowed sinc anti-aliasing filter
+    split into `up` polyphase branches so only the non-zero taps are ever multiplied.
+    Stateless: each call resamples one complete buffer.
+    """
+
+    def __init__(self, src_rate: int, dst_rate: int, half_taps: int = 10, beta: float = 5.0):
+        g = gcd(src_rate, dst_rate)
+        self.src_rate, self.dst_rate = src_rate, dst_rate
+        self.up, self.down = dst_rate // g, src_rate // g
+
+        max_rate = max(self.up, self.down)
+        num_taps = 2 * half_taps * max_rate + 1
+        cutoff = 1.0 / max_rate  # relative to the Nyquist of the upsampled rate
+        n = np.arange(num_taps) - (num_taps - 1) / 2
+        h = cutoff * np.sinc(cutoff * n) * np.kaiser(num_taps, beta) * self.up
+
+        # Branch p holds taps h[p], h[p + up], ... (reversed, to dot with input windows)
+        h = np.concatenate([h, np.zeros((-num_taps) % self.up)])
+        self.phases = np.ascontiguousarray(h.reshape(-1, self.up).T[:, ::-1], dtype=np.float32)
+        self.taps_per_phase = self.phases.shape[1]
+        self.delay = (num_taps - 1) // 2  # group delay, in upsampled samples
+
+    def output_length(self, input_length: int) -> int:
+        return -(-input_length * self.up // self.down)
+
+    def __call__(self, audio: np.ndarray) -> np.ndarray:
+        audio = np.asarray(audio, dtype=np.float32)
+        if self.up == self.down:
+            return audio.copy()
+
+        n_out = self.output_length(len(audio))
+        taps = self.taps_per_phase
+        padded = np.concatenate([np.zeros(taps - 1, np.float32), audio, np.zeros(taps + 1, np.float32)])
+        windows = sliding_window_view(padded, taps)
+
+        # Output m reads upsampled position j = m*down + delay: branch j % up, last input j // up.
+        # Outputs m0, m0+up, m0+2*up, ... share a branch and step `down` inputs apart,
+        # so each branch is one strided matrix-vector product.
+        out = np.empty(n_out, dtype=np.float32)
+        for m0 in range(min(self.up, n_out)):
+            j0 = m0 * self.down + self.delay
+            count = len(range(m0, n_out, self.up))
+            base0 = j0 // self.up
+            out[m0::self.up] = windows[base0:base0 + count * self.down:self.down] @ self.phases[j0 % self.up]
+        return out
+
+
+@lru_cache(maxsize=32)
+def get_resampler(src_rate: int, dst_rate: int) -> PolyphaseResampler:
+    """Filter design is done once per (src_rate, dst_rate)"""
+    return PolyphaseResampler(src_rate, dst_rate)
+
+
+def resample(audio: np.ndarray, src_rate: int, dst_rate: int) -> np.ndarray:
+    if src_rate == dst_rate:
+        return np.asarray(audio, dtype=np.float32)
+    return get_resampler(src_rate, dst_rate)(audio)
+
+
+class StreamResampler:
+    """
+    Resamples contiguous chunks of one stream (e.g. incremental TTS output). The filter
+    history is carried across chunks, so push(a) + push(b) + flush() is sample-identical
+    to resample(concat(a, b)) - no clicks at chunk boundaries.
+    """
+
+    def __init__(self, src_rate: int, dst_rate: int):
+        self.passthrough = src_rate == dst_rate
+        self.resampler = get_resampler(src_rate, dst_rate)
+        taps = self.resampler.taps_per_phase
+        self._buffer = np.zeros(taps - 1, np.float32)  # Same leading padding as the one-shot resampler
+        self._offset = 0    # Index of _buffer[0] in the padded input stream
+        self._pushed = 0    # Input samples so far
+        self._emitted = 0   # Output samples so far
+
+    def _emit(self) -> np.ndarray:
+        r = self.resampler
+        taps = r.taps_per_phase
+        available = self._offset + len(self._buffer)
+        # Output m needs padded inputs [base, base + taps), base = (m*down + delay) // up
+        ready = -(-((available - taps + 1) * r.up - r.delay) // r.down)
+        stop = max(self._emitted, min(ready, r.output_length(self._pushed)))
+        if stop == self._emitted:
+            return np.zeros(0, np.float32)
+        m = np.arange(self._emitted, stop)
+        j = m * r.down + r.delay
+        windows = sliding_window_view(self._buffer, taps)[j // r.up - self._offset]
+        out = np.einsum("ij,ij->i", windows, r.phases[j % r.up]).astype(np.float32)
+
+        self._emitted = stop
+        drop = (stop * r.down + r.delay) // r.up - self._offset
+        if drop > 0:
+            self._buffer = self._buffer[drop:]
+            self._offset += drop
+        return out
+
+    def push(self, audio: np.ndarray) -> np.ndarray:
+        """Resampled audio for every output sample the input so far fully determines"""
+        audio = np.asarray(audio, dtype=np.float32)
+        if self.passthrough:
+            return audio.copy()
+        self._buffer = np.concatenate([self._buffer, audio])
+        self._pushed += len(audio)
+        return self._emit()
+
+    def flush(self) -> np.ndarray:
+        """End of stream: the remaining output (input zero-padded like the one-shot resampler)"""
+        if self.passthrough:
+            return np.zeros(0, np.float32)
+        self._buffer = np.concatenate([self._buffer, np.zeros(self.resampler.taps_per_phase + 1, np.float32)])
+        return self._emit()
+
+
+# --- Telephony ---
+
+def encode_telephony(audio: np.ndarray, sample_rate: int, codec: str = "ulaw",
+                     target_rate: int = TELEPHONY_RATE) -> bytes:
+    """Float mono waveform at any rate -> 8 kHz G.711 bytes (raw, no header)"""
+    pcm16 = float_to_pcm16(resample(audio, sample_rate, target_rate))
+    encoded = alaw_encode(pcm16) if codec == "alaw" else ulaw_encode(pcm16)
+    return encoded.tobytes()
@@ -0,0 +1,179 @@
+"""
+Silence trimming and loudness normalization
+Chatterbox and XTTS outputs often open with a couple hundred milliseconds of
+near-silence (and trail off with more), which a caller hears as extra latency on every
+turn and which still costs bytes on the Twilio stream. Speech is found from per-frame
+RMS energy (10 ms frames, one reshape + einsum over the whole waveform, no per-sample
+loop); everything outside it, less a little padding, is cut. Loudness is normalized
+from the RMS of the voiced frames only, so pauses don't drag the level down.
+
+A whole utterance is trimmed at both ends (postprocess). A stream (StreamPostprocessor)
+drops audio until the first voiced frame, and holds back each chunk's silent tail until
+the next chunk shows whether it was a pause (sent) or the end (dropped).
+"""
+
+import os
+from typing import NamedTuple, Optional, Tuple
+
+import numpy as np
+
+
+class AudioPostprocess(NamedTuple):
+    trim_silence: bool = True
+    normalize: bool = True
+    threshold_db: float = -50.0  # Frame RMS (dBFS) below which a frame is silence
+    pad_ms: int = 40             # Kept around speech, so onsets and decays aren't clipped
+    target_db: float = -20.0     # RMS of the voiced frames after normalization (dBFS)
+    peak_db: float = -1.0        # Normalization never pushes a peak above this
+    max_gain_db: float = 12.0    # Nor boosts / cuts by more than this
+    frame_ms: int = 10
+
+    @classmethod
+    def from_env(cls) -> "AudioPostprocess":
+        """
+        Service defaults: TRIM_SILENCE, NORMALIZE_LOUDNESS (1/0, both off unless set, so
+        callers that don't ask get the engine's audio unchanged), SILENCE_THRESHOLD_DB,
+        TARGET_LOUDNESS_DB
+        """
+        return cls(
+            trim_silence=os.getenv("TRIM_SILENCE", "0") == "1",
+            normalize=os.getenv("NORMALIZE_LOUDNESS", "0") == "1",
+            threshold_db=float(os.getenv("SILENCE_THRESHOLD_DB", "-50")),
+            pad_ms=int(os.getenv("SILENCE_PAD_MS", "40")),
+            target_db=float(os.getenv("TARGET_LOUDNESS_DB", "-20")),
+        )
+
+    def for_request(self, trim_silence: Optional[bool] = None, normalize: Optional[bool] = None) -> "AudioPostprocess":
+        """These settings with a request's overrides (None keeps the service default)"""
+        return self._replace(
+            trim_silence=self.trim_silence if trim_silence is None else trim_silence,
+            normalize=self.normalize if normalize is None else normalize,
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.trim_silence or self.normalize
+
+
+def frame_power(audio: np.ndarray, frame: int) -> np.ndarray:
+    """Mean square per frame of `frame` samples (the last one zero-padded)"""
+    count = -(-len(audio) // frame)
+    frames = np.zeros(count * frame, np.float32)
+    frames[:len(audio)] = audio
+    frames = frames.reshape(count, frame)
+    return np.einsum("ij,ij->i", frames, frames) / frame
+
+
+def voiced_bounds(audio: np.ndarray, sample_rate: int, settings: AudioPostprocess) -> Optional[Tuple[int, int]]:
+    """(start, end) sample range from the first to the last voiced frame plus padding; None if all silence"""
+    frame = max(1, sample_rate * settings.frame_ms // 1000)
+    voiced = np.flatnonzero(frame_power(audio, frame) > 10 ** (settings.threshold_db / 10))
+    if len(voiced) == 0:
+        return None
+    pad = sample_rate * settings.pad_ms // 1000
+    return max(0, voiced[0] * frame - pad), min(len(audio), (voiced[-1] + 1) * frame + pad)
+
+
+def loudness_gain(audio: np.ndarray, sample_rate: int, settings: AudioPostprocess) -> float:
+    """Linear gain that brings the voiced frames to settings.target_db (1.0 for silence)"""
+    frame = max(1, sample_rate * settings.frame_ms // 1000)
+    power = frame_power(audio, frame)
+    voiced = power[power > 10 ** (settings.threshold_db / 10)]
+    if len(voiced) == 0:
+        return 1.0
+    gain_db = settings.target_db - 10 * np.log10(voiced.mean())
+    gain_db = float(np.clip(gain_db, -settings.max_gain_db, settings.max_gain_db))
+    peak = float(np.max(np.abs(audio)))
+    if peak > 0:
+        gain_db = min(gain_db, settings.peak_db - 20 * np.log10(peak))
+    return 10 ** (gain_db / 20)
+
+
+def postprocess(audio: np.ndarray, sample_rate: int, settings: AudioPostprocess) -> Tuple[np.ndarray, float, float]:
+    """A whole utterance -> (trimmed / normalized audio, leading ms cut, trailing ms cut)"""
+    audio = np.asarray(audio, dtype=np.float32)
+    leading_ms = trailing_ms = 0.0
+    if settings.trim_silence:
+        bounds = voiced_bounds(audio, sample_rate, settings)
+        if bounds is not None:  # All silence is left alone rather than sent as nothing
+            start, end = bounds
+            leading_ms = start * 1000 / sample_rate
+            trailing_ms = (len(audio) - end) * 1000 / sample_rate
+            audio = audio[start:end]
+    if settings.normalize:
+        audio = audio * np.float32(loudness_gain(audio, sample_rate, settings))
+    return audio, leading_ms, trailing_ms
+
+
+class StreamPostprocessor:
+    """
+    postprocess() for contiguous chunks of one stream (e.g. incremental TTS output).
+    The normalization gain is set by the first chunk with speech and then held, so the
+    level doesn't pump from chunk to chunk; it is only ever lowered, when a later chunk
+    would otherwise peak above peak_db. A stream that is all silence sends nothing.
+    """
+
+    def __init__(self, sample_rate: int, settings: AudioPostprocess):
+        self.sample_rate = sample_rate
+        self.settings = settings
+        self.gain: Optional[float] = None
+        self._started = False
+        # Before speech: the last pad_ms of silence dropped so far (lead-in for the onset).
+        # After: a silent tail that is either a pause or the end of the utterance.
+        self._held = np.zeros(0, np.float32)
+        self._pad = sample_rate * settings.pad_ms // 1000
+        self.leading_samples = 0
+        self.trailing_samples = 0
+
+    @property
+    def leading_ms(self) -> float:
+        return self.leading_samples * 1000 / self.sample_rate
+
+    @property
+    def trailing_ms(self) -> float:
+        return self.trailing_samples * 1000 / self.sample_rate
+
+    def push(self, audio: np.ndarray) -> np.ndarray:
+        """The audio that can be sent now (possibly empty)"""
+        audio = np.asarray(audio, dtype=np.float32)
+        if not self.settings.enabled:
+            return audio
+        if self.settings.trim_silence:
+            audio = np.concatenate([self._held, audio])
+            self._held = np.zeros(0, np.float32)
+        bounds = voiced_bounds(audio, self.sample_rate, self.settings)
+        if self.settings.normalize and self.gain is None and bounds is not None:
+            self.gain = loudness_gain(audio[bounds[0]:bounds[1]], self.sample_rate, self.settings)
+
+        if self.settings.trim_silence:
+            if bounds is None:
+                if self._started:
+                    self._held = audio
+                else:
+                    self._held = audio[max(0, len(audio) - self._pad):]
+                    self.leading_samples += len(audio) - len(self._held)
+                return np.zeros(0, np.float32)
+            start, end = bounds
+            if self._started:
+                start = 0  # Silence between two stretches of speech is a pause: keep it
+            else:
+                self.leading_samples += start
+                self._started = True
+            self._held = audio[end:]
+            audio = audio[start:end]
+        if self.gain is None:
+            return audio
+        # The gain came from earlier chunks; a louder one lowers it (never raises it) so its
+        # peak stays under peak_db instead of clipping
+        peak = float(np.max(np.abs(audio))) if len(audio) else 0.0
+        if peak * self.gain > 10 ** (self.settings.peak_db / 20):
+            self.gain = 10 ** (self.settings.peak_db / 20) / peak
+        return audio * np.float32(self.gain)
+
+    def finish(self) -> None:
+        """End of stream: whatever silence is still held back was the trailing silence"""
+        if self._started:
+            self.trailing_samples += len(self._held)
+        else:
+            self.leading_samples += len(self._held)
+        self._held = np.zeros(0, np.float32)
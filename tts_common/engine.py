@@ -0,0 +1,141 @@
+"""
+TTS engine interface
+Chatterbox, XTTS-v2, pyttsx3 and gTTS differ in how they load, condition on a voice and
+produce audio, and in nothing else the services care about. A TTSEngine adapter wraps
+one backend behind three calls:
+  - conditioning(voice_id): per-voice state (speaker latents, cloned-voice conditionals),
+    resolved once per request and handed back to generate
+  - generate(text, conditioning): a whole utterance, float32 mono at engine.sample_rate
+  - generate_stream(text, conditioning): the same utterance in pieces as they are ready
+    (default: one generate per segment of tts_common.segmenter)
+serving.py builds caching, streaming, telephony encoding and cancellation once on top of
+this, so every engine gets them.
+
+Blocking calls run on a worker thread bound to the request's CancellationToken; engines
+that schedule work themselves (e.g. a replica pool, or a bounded inference pool)
+override agenerate / astream, and admit to turn requests away (EngineBusy -> 429) before
+any response is sent. Engine-specific request fields (serving.TTSServer's request_model)
+reach generate as keyword options through request_options.
+"""
+
+import asyncio
+import threading
+from contextlib import nullcontext
+from typing import Any, AsyncIterator, Callable, ContextManager, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from tts_common.cancellation import bind, check_cancelled, run_until_cancelled
+from tts_common.metrics import StageTimer
+from tts_common.segmenter import segment_text
+
+
+async def iterate_in_thread(make_iterator: Callable[[], Iterator], token, timer: Optional[StageTimer] = None,
+                            stage: str = "generate") -> AsyncIterator:
+    """
+    Run a blocking iterator on its own thread and hand each item to the event loop the
+    moment it is produced. The thread is bound to `token`: cancelling it stops the model at
+    its next step (or segment) and ends this iterator with Cancelled.
+    """
+    loop = asyncio.get_running_loop()
+    ready: asyncio.Queue = asyncio.Queue()
+    done = object()
+    timer = timer or StageTimer()
+
+    def put(item):
+        try:
+            loop.call_soon_threadsafe(ready.put_nowait, item)
+        except RuntimeError:
+            pass  # Event loop already closed (shutdown)
+
+    def produce():
+        try:
+            with bind(token):
+                items = make_iterator()
+                while True:
+                    with timer.stage(stage):
+                        item = next(items, done)
+                    put(item)
+                    if item is done:
+                        return
+        except Exception as e:
+            put(e)
+
+    threading.Thread(target=produce, name="tts-generate", daemon=True).start()
+    while True:
+        item = await run_until_cancelled(ready.get(), token)
+        if item is done:
+            return
+        if isinstance(item, Exception):
+            raise item
+        yield item
+
+
+class EngineBusy(Exception):
+    """Raised by TTSEngine.admit when the engine has no capacity left (429 + Retry-After)"""
+
+    def __init__(self, message: str, retry_after_s: int):
+        super().__init__(message)
+        self.retry_after_s = retry_after_s
+
+
+class TTSEngine:
+    name = "tts"
+    sample_rate = 24000
+    version = "unknown"  # Part of rendered-audio cache keys: a new model never serves old audio
+    # Output formats native_audio returns already encoded: served as-is, so /synthesize
+    # leaves trimming / normalization off for them unless the request asks for it
+    native_formats: Tuple[str, ...] = ()
+
+    def load(self) -> None:
+        """Blocking model load (serving.py runs it on a background thread)"""
+
+    def voices(self) -> List[str]:
+        return ["default"]
+
+    def voice_revision(self, voice_id: str) -> str:
+        """Changes whenever the voice's reference audio does (cache keys)"""
+        return voice_id
+
+    def request_options(self, request) -> dict:
+        """Keyword options for generate from a request (part of the rendered-audio cache key)"""
+        return {"language": request.language} if request.language else {}
+
+    def conditioning(self, voice_id: str) -> Any:
+        """Per-voice state for generate; may raise HTTPException for an unknown voice"""
+        return None
+
+    def generate(self, text: str, conditioning: Any, **options) -> np.ndarray:
+        raise NotImplementedError
+
+    def generate_stream(self, text: str, conditioning: Any, **options) -> Iterator[np.ndarray]:
+        """One generate per segment: the first clause is heard while the rest is generated"""
+        for segment in segment_text(text):
+            check_cancelled()
+            yield self.generate(segment, conditioning, **options)
+
+    def native_audio(self, text: str, conditioning: Any, output_format: str, **options) -> Optional[bytes]:
+        """Engines whose backend already produces output_format (see native_formats) return it here"""
+        return None
+
+    def precomputed(self, key: str) -> Optional[bytes]:
+        """Audio rendered ahead of time for a rendered-audio cache key (e.g. campaign packs), or None"""
+        return None
+
+    def admit(self, token, timer: Optional[StageTimer] = None) -> ContextManager:
+        """
+        Reserve capacity for one request before generation (and the response) starts; held
+        until it is done. Raises EngineBusy when full. agenerate / astream run inside it.
+        """
+        return nullcontext()
+
+    async def agenerate(self, text: str, conditioning: Any, token, timer: Optional[StageTimer] = None,
+                        **options) -> np.ndarray:
+        def whole():
+            yield self.generate(text, conditioning, **options)
+
+        return np.concatenate([chunk async for chunk in iterate_in_thread(whole, token, timer)])
+
+    def astream(self, text: str, conditioning: Any, token, timer: Optional[StageTimer] = None,
+                **options) -> AsyncIterator[np.ndarray]:
+        return iterate_in_thread(lambda: self.generate_stream(text, conditioning, **options), token, timer)
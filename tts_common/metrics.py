@@ -0,0 +1,129 @@
+"""
+Per-request latency breakdown and Prometheus metrics
+A StageTimer collects wall time per stage of one request (queue, conditioning,
+generate, resample, encode, ...). The stages go out as a Server-Timing header on the
+response and into TTSMetrics histograms, alongside real-time factor, characters/sec
+and in-flight / queued gauges, exposed on /metrics.
+
+Each service gets its own registry (with process and GC collectors), so several
+services can be loaded in one process (e.g. benchmarks/) without name clashes.
+"""
+
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Optional, Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram,
+    GCCollector, PlatformCollector, ProcessCollector, generate_latest,
+)
+
+# Stage latencies: from a cache lookup (~0.1 ms) to a long generation (~30 s)
+STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+RTF_BUCKETS = (0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1, 1.5, 2, 3, 5)
+# Silence cut from either end of an utterance, in milliseconds
+TRIM_MS_BUCKETS = (0, 10, 25, 50, 100, 150, 200, 300, 500, 750, 1000, 2000)
+
+
+class StageTimer:
+    """Wall time per named stage of one request; a stage entered twice accumulates"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: "OrderedDict[str, float]" = OrderedDict()
+
+    def add(self, stage: str, seconds: float) -> None:
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def server_timing(self) -> str:
+        """Server-Timing header value, e.g. `queue;dur=0.4, generate;dur=812.3, total;dur=815.0`"""
+        parts = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.stages.items()]
+        parts.append(f"total;dur={self.elapsed() * 1000:.1f}")
+        return ", ".join(parts)
+
+
+class TTSMetrics:
+    def __init__(self, service: str):
+        self.service = service
+        self.registry = CollectorRegistry()
+        ProcessCollector(registry=self.registry)
+        PlatformCollector(registry=self.registry)
+        GCCollector(registry=self.registry)
+
+        self.requests = Counter(
+            "tts_requests_total", "TTS requests by endpoint and outcome",
+            ["endpoint", "status"], registry=self.registry)
+        self.request_seconds = Histogram(
+            "tts_request_seconds", "End-to-end request latency",
+            ["endpoint", "cache"], buckets=STAGE_BUCKETS, registry=self.registry)
+        self.stage_seconds = Histogram(
+            "tts_stage_seconds", "Latency per request stage (queue, conditioning, generate, resample, encode, ...)",
+            ["stage"], buckets=STAGE_BUCKETS, registry=self.registry)
+        self.first_audio_seconds = Histogram(
+            "tts_time_to_first_audio_seconds", "Request start to first audio sent (streaming endpoints)",
+            ["endpoint"], buckets=STAGE_BUCKETS, registry=self.registry)
+        self.real_time_factor = Histogram(
+            "tts_real_time_factor", "Generation time / seconds of audio produced",
+            buckets=RTF_BUCKETS, registry=self.registry)
+        self.last_real_time_factor = Gauge(
+            "tts_last_real_time_factor", "Real-time factor of the most recent generation", registry=self.registry)
+        self.chars_per_second = Gauge(
+            "tts_chars_per_second", "Input characters per second of generation, most recent request",
+            registry=self.registry)
+        self.characters = Counter(
+            "tts_characters_total", "Input characters synthesized", registry=self.registry)
+        self.audio_seconds = Counter(
+            "tts_audio_seconds_total", "Seconds of audio generated", registry=self.registry)
+        self.in_flight = Gauge(
+            "tts_requests_in_flight", "Requests admitted and not yet finished", registry=self.registry)
+        self.queued = Gauge(
+            "tts_requests_queued", "Requests waiting for the model", registry=self.registry)
+        self.silence_trimmed_ms = Histogram(
+            "tts_silence_trimmed_ms", "Milliseconds of silence trimmed per utterance, by edge (leading, trailing)",
+            ["edge"], buckets=TRIM_MS_BUCKETS, registry=self.registry)
+
+    def track(self, in_flight: Callable[[], float], queued: Callable[[], float]) -> None:
+        """Read the gauges from the service's own scheduler at scrape time"""
+        self.in_flight.set_function(in_flight)
+        self.queued.set_function(queued)
+
+    def observe(self, endpoint: str, timer: StageTimer, characters: int = 0,
+                audio_seconds: float = 0.0, cache: str = "MISS", status: str = "ok",
+                first_audio_s: Optional[float] = None) -> None:
+        """Record one finished request"""
+        self.requests.labels(endpoint, status).inc()
+        if first_audio_s is not None:
+            self.first_audio_seconds.labels(endpoint).observe(first_audio_s)
+        self.request_seconds.labels(endpoint, cache).observe(timer.elapsed())
+        for stage, seconds in timer.stages.items():
+            self.stage_seconds.labels(stage).observe(seconds)
+
+        generation = timer.stages.get("generate", 0.0)
+        if generation > 0 and audio_seconds > 0:
+            rtf = generation / audio_seconds
+            self.real_time_factor.observe(rtf)
+            self.last_real_time_factor.set(rtf)
+            self.chars_per_second.set(characters / generation)
+            self.characters.inc(characters)
+            self.audio_seconds.inc(audio_seconds)
+
+    def observe_trim(self, leading_ms: float, trailing_ms: float) -> None:
+        """Silence trimmed from one utterance (tts_common/dsp.py)"""
+        self.silence_trimmed_ms.labels("leading").observe(leading_ms)
+        self.silence_trimmed_ms.labels("trailing").observe(trailing_ms)
+
+    def render(self) -> Tuple[bytes, str]:
+        """(body, content type) for the /metrics endpoint"""
+        return generate_latest(self.registry), CONTENT_TYPE_LATEST
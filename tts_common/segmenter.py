@@ -0,0 +1,68 @@
+"""
+Text segmentation for incremental synthesis
+Splits a reply at sentence and clause boundaries so the first segment can be
+generated and played while the rest of the reply is still being synthesized.
+"""
+
+import os
+import re
+from typing import List
+
+# Sentence end: . ! ? … (optionally followed by closing quotes/brackets) + whitespace
+SENTENCE_BOUNDARY = re.compile(r'(?:(?<=[.!?…])|(?<=[.!?…]["\')\]]))\s+')
+# Clause end: , ; : and dashes + whitespace
+CLAUSE_BOUNDARY = re.compile(r'(?<=[,;:—–])\s+')
+
+# The first segment is kept short so the caller hears audio after the first clause
+FIRST_SEGMENT_MAX_CHARS = int(os.getenv("STREAM_FIRST_SEGMENT_CHARS", "60"))
+# Later segments can be longer (fewer generate calls, better prosody)
+MAX_SEGMENT_CHARS = int(os.getenv("STREAM_MAX_SEGMENT_CHARS", "250"))
+
+
+def _split_words(text: str, max_chars: int) -> List[str]:
+    """Last resort for run-on clauses: split at whitespace."""
+    if len(text) <= max_chars:
+        return [text]
+    pieces, current = [], ""
+    for word in text.split():
+        if current and len(current) + 1 + len(word) > max_chars:
+            pieces.append(current)
+            current = word
+        else:
+            current = f"{current} {word}" if current else word
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def segment_text(
+    text: str,
+    first_max_chars: int = FIRST_SEGMENT_MAX_CHARS,
+    max_chars: int = MAX_SEGMENT_CHARS,
+) -> List[str]:
+    """
+    Split text into synthesis segments, in order.
+    Clauses are packed greedily up to the segment limit, so short sentences are
+    merged while long ones are broken at the nearest clause boundary.
+    """
+    pieces = []
+    for sentence in SENTENCE_BOUNDARY.split(text.strip()):
+        for clause in CLAUSE_BOUNDARY.split(sentence):
+            clause = clause.strip()
+            if clause:
+                # A run-on opening clause is cut at the first segment's limit, so it still
+                # starts speaking early; the rest of its words are packed with what follows
+                pieces.extend(_split_words(clause, max_chars if pieces else first_max_chars))
+
+    segments: List[str] = []
+    current = ""
+    for piece in pieces:
+        limit = first_max_chars if not segments else max_chars
+        if current and len(current) + 1 + len(piece) > limit:
+            segments.append(current)
+            current = piece
+        else:
+            current = f"{current} {piece}" if current else piece
+    if current:
+        segments.append(current)
+    return segments
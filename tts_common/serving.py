@@ -0,0 +1,645 @@
+"""
+Shared serving core
+One HTTP API for any TTSEngine (engine.py):
+  POST /synthesize         whole utterance as mp3, wav, pcm or ulaw (Twilio), rendered-audio cache
+  POST /synthesize/stream  audio sent as the engine generates it; μ-law is resampled with
+                           its filter state carried across chunks (no clicks at the seams)
+  WS   /ws/synthesize      Twilio-ready 20 ms μ-law frames or `media` messages, barge-in
+plus /ready, /cancel/{request_id} and /metrics for services that don't have their own.
+Every request can be cancelled (X-Request-ID, client disconnect, {"event": "cancel"}), and
+is turned away with 429 + Retry-After when the engine has no capacity (TTSEngine.admit).
+Audio the engine rendered ahead of time (TTSEngine.precomputed, e.g. campaign packs) is
+served before the rendered-audio cache is even looked at.
+Audio can be silence-trimmed and loudness-normalized before encoding (dsp.py): per request
+(trim_silence / normalize), or for every request where the service turns it on
+(TRIM_SILENCE / NORMALIZE_LOUDNESS, off by default). Whole utterances the engine already
+encodes itself (TTSEngine.native_formats) are passed through unless the request opts in.
+A service keeps only its engine adapter and engine-specific endpoints.
+"""
+
+import io
+import time
+import wave
+import struct
+import asyncio
+import threading
+from contextlib import ExitStack
+from typing import AsyncIterator, Callable, Optional, Tuple, Type
+
+import numpy as np
+from fastapi import APIRouter, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
+from pydantic import BaseModel, ValidationError
+
+from tts_common.audio_cache import RenderedAudioCache
+from tts_common.cancellation import CancellationRegistry, Cancelled, run_until_cancelled, websocket_utterances
+from tts_common.codec import TELEPHONY_RATE, StreamResampler, float_to_pcm16, resample, ulaw_encode
+from tts_common.dsp import AudioPostprocess, StreamPostprocessor, postprocess
+from tts_common.engine import EngineBusy, TTSEngine
+from tts_common.metrics import StageTimer, TTSMetrics
+from tts_common.twilio import MediaFramer, frame_ulaw, media_message, mark_message
+
+try:
+    import lameenc  # MP3 encoded in-process; without it, pydub runs ffmpeg for every encode
+except ImportError:
+    lameenc = None
+
+# Media type and file extension per output format
+OUTPUT_FORMATS = {
+    "ulaw": ("audio/basic", "ulaw"),  # 8 kHz raw μ-law, Twilio-ready
+    "pcm": ("audio/L16", "pcm"),      # 16-bit raw at the engine's sample rate
+    "wav": ("audio/wav", "wav"),
+    "mp3": ("audio/mpeg", "mp3"),
+}
+
+
+class SynthesisRequest(BaseModel):
+    text: str
+    voice_id: Optional[str] = "default"
+    language: Optional[str] = None       # Engines that take one, e.g. "en"
+    output_format: Optional[str] = None  # One of OUTPUT_FORMATS; the service's default if omitted
+    trim_silence: Optional[bool] = None  # Cut leading / trailing silence (service default: TRIM_SILENCE)
+    normalize: Optional[bool] = None     # Normalize loudness (service default: NORMALIZE_LOUDNESS)
+
+
+class BufferResponse(Response):
+    """Sends a bytes-like body as-is, e.g. a memoryview into a pack (Response only passes bytes through)"""
+
+    def render(self, content) -> memoryview:
+        return content
+
+
+# --- Encoding ---
+
+def wav_stream_header(sample_rate: int) -> bytes:
+    """WAV header for 16-bit mono PCM of unknown length (sizes set to the max, as streaming players expect)"""
+    byte_rate = sample_rate * 2
+    return (
+        b"RIFF" + struct.pack("<I", 0xFFFFFFFF) + b"WAVE"
+        + b"fmt " + struct.pack("<IHHIIHH", 16, 1, 1, sample_rate, byte_rate, 2, 16)
+        + b"data" + struct.pack("<I", 0xFFFFFFFF)
+    )
+
+
+def _wav_bytes(audio: np.ndarray, sample_rate: int) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(float_to_pcm16(audio).astype("<i2").tobytes())
+    return buffer.getvalue()
+
+
+class Mp3Encoder:
+    """
+    MP3 for one utterance or stream, fed chunk by chunk: one LAME encoder in-process (lameenc),
+    so a stream has no gaps at chunk seams. Without lameenc each chunk is encoded by its own
+    ffmpeg run (pydub, temp files) and the MP3 frames are concatenated.
+    """
+
+    def __init__(self, sample_rate: int, bitrate_kbps: int = 128):
+        self.sample_rate = sample_rate
+        self.bitrate_kbps = bitrate_kbps
+        self._lame = None
+        if lameenc is not None:
+            self._lame = lameenc.Encoder()
+            self._lame.set_bit_rate(bitrate_kbps)
+            self._lame.set_in_sample_rate(sample_rate)
+            self._lame.set_channels(1)
+            self._lame.set_quality(2)
+
+    def encode(self, audio: np.ndarray) -> bytes:
+        pcm = float_to_pcm16(audio).astype("<i2").tobytes()
+        if self._lame is not None:
+            return bytes(self._lame.encode(pcm))
+        from pydub import AudioSegment
+
+        buffer = io.BytesIO()
+        segment = AudioSegment(data=pcm, sample_width=2, frame_rate=self.sample_rate, channels=1)
+        segment.export(buffer, format="mp3", bitrate=f"{self.bitrate_kbps}k")
+        return buffer.getvalue()
+
+    def flush(self) -> bytes:
+        """The encoder's buffered tail (once, at the end)"""
+        return bytes(self._lame.flush()) if self._lame is not None else b""
+
+
+def _mp3_bytes(audio: np.ndarray, sample_rate: int) -> bytes:
+    encoder = Mp3Encoder(sample_rate)
+    return encoder.encode(audio) + encoder.flush()
+
+
+def encode_audio(audio: np.ndarray, sample_rate: int, output_format: str, timer: Optional[StageTimer] = None) -> bytes:
+    """A whole float32 mono utterance -> output_format bytes"""
+    timer = timer or StageTimer()
+    if output_format == "ulaw":
+        with timer.stage("resample"):
+            audio = resample(audio, sample_rate, TELEPHONY_RATE)
+        with timer.stage("encode"):
+            return ulaw_encode(float_to_pcm16(audio)).tobytes()
+    with timer.stage("encode"):
+        if output_format == "pcm":
+            return float_to_pcm16(audio).astype("<i2").tobytes()
+        if output_format == "wav":
+            return _wav_bytes(audio, sample_rate)
+        return _mp3_bytes(audio, sample_rate)
+
+
+async def encode_stream(chunks: AsyncIterator[np.ndarray], sample_rate: int, output_format: str,
+                        timer: StageTimer) -> AsyncIterator[bytes]:
+    """
+    Float chunks -> output_format bytes, as they arrive. wav is a streaming header + PCM;
+    mp3 goes through one Mp3Encoder for the whole stream.
+    """
+    resampler = StreamResampler(sample_rate, TELEPHONY_RATE) if output_format == "ulaw" else None
+    mp3 = Mp3Encoder(sample_rate) if output_format == "mp3" else None
+    if output_format == "wav":
+        yield wav_stream_header(sample_rate)
+    async for audio in chunks:
+        if resampler is not None:
+            with timer.stage("resample"):
+                audio = resampler.push(audio)
+            with timer.stage("encode"):
+                data = ulaw_encode(float_to_pcm16(audio)).tobytes()
+        elif output_format == "mp3":
+            with timer.stage("encode"):
+                data = await asyncio.to_thread(mp3.encode, audio)
+        else:
+            with timer.stage("encode"):
+                data = float_to_pcm16(audio).astype("<i2").tobytes()
+        if data:
+            yield data
+    if resampler is not None:
+        with timer.stage("resample"):
+            audio = resampler.flush()
+        with timer.stage("encode"):
+            yield ulaw_encode(float_to_pcm16(audio)).tobytes()
+    if mp3 is not None:
+        with timer.stage("encode"):
+            data = mp3.flush()
+        if data:
+            yield data
+
+
+async def postprocess_stream(chunks: AsyncIterator[np.ndarray], processor: StreamPostprocessor, timer: StageTimer,
+                             metrics: Optional[TTSMetrics] = None) -> AsyncIterator[np.ndarray]:
+    """Float chunks, silence-trimmed / normalized on the way to encode_stream (empty chunks are skipped)"""
+    async for audio in chunks:
+        with timer.stage("postprocess"):
+            audio = processor.push(audio)
+        if len(audio):
+            yield audio
+    processor.finish()
+    if metrics is not None and processor.settings.trim_silence:
+        metrics.observe_trim(processor.leading_ms, processor.trailing_ms)
+
+
+# --- Serving ---
+
+class TTSServer:
+    def __init__(
+        self,
+        engine: TTSEngine,
+        metrics: Optional[TTSMetrics] = None,
+        cancellations: Optional[CancellationRegistry] = None,
+        cache: Optional[RenderedAudioCache] = None,
+        default_format: str = "ulaw",
+        require_ready: Optional[Callable[[], None]] = None,
+        postprocess: Optional[AudioPostprocess] = None,
+        request_model: Type[SynthesisRequest] = SynthesisRequest,
+    ):
+        """
+        metrics / cancellations: the service's own, when it has other endpoints too.
+        require_ready: raises HTTPException (503) until the engine can serve; defaults
+        to this server's own background load (start()).
+        postprocess: silence trimming / loudness defaults (requests can override them);
+        defaults to the TRIM_SILENCE / NORMALIZE_LOUDNESS environment.
+        request_model: a SynthesisRequest subclass with the engine's own fields (read by
+        engine.request_options).
+        """
+        self.engine = engine
+        self.request_model = request_model
+        self.postprocess = postprocess or AudioPostprocess.from_env()
+        self.cache = cache
+        self.default_format = default_format
+        self.cancellations = cancellations or CancellationRegistry()
+        self.in_flight = 0
+        self.state = {"status": "loading", "load_seconds": None, "error": None}
+        self._require_ready = require_ready or self._loaded
+        if metrics is None:
+            metrics = TTSMetrics(engine.name)
+            metrics.in_flight.set_function(lambda: self.in_flight)
+        self.metrics = metrics
+
+    # --- Lifecycle ---
+
+    def start(self, wait: bool = False) -> None:
+        """Load the engine (on a background thread unless wait); /ready turns 200 once it has loaded"""
+        if wait:
+            self._load()
+        else:
+            threading.Thread(target=self._load, name=f"{self.engine.name}-load", daemon=True).start()
+
+    def _load(self) -> None:
+        started = time.perf_counter()
+        try:
+            self.engine.load()
+            self.state.update(status="ready", load_seconds=round(time.perf_counter() - started, 2))
+            print(f"✅ {self.engine.name} engine ready in {self.state['load_seconds']}s")
+        except Exception as e:
+            print(f"[TTS] Failed to load {self.engine.name} engine: {e}")
+            self.state.update(status="failed", error=str(e))
+
+    def _loaded(self) -> None:
+        if self.state["status"] == "failed":
+            raise HTTPException(status_code=503, detail=f"TTS engine failed to load: {self.state['error']}")
+        if self.state["status"] != "ready":
+            raise HTTPException(status_code=503, detail="TTS engine loading", headers={"Retry-After": "5"})
+
+    def summary(self) -> dict:
+        return {
+            "engine": self.engine.name,
+            **self.state,
+            "in_flight": self.in_flight,
+            "cache": self.cache.summary() if self.cache else None,
+            "cancellation": self.cancellations.summary(),
+        }
+
+    # --- Helpers ---
+
+    def _prepare(self, request: SynthesisRequest, passthrough: bool = False) -> Tuple[str, str, dict, AudioPostprocess]:
+        """
+        (text, output_format, engine options, postprocess settings), or HTTPException.
+        passthrough: the audio can be served exactly as the engine encoded it (native_formats),
+        so postprocessing, which would mean decoding and re-encoding it, is off by default.
+        """
+        text = (request.text or "").strip()
+        if not text:
+            raise HTTPException(status_code=400, detail="text is required")
+        output_format = (request.output_format or self.default_format).strip()
+        if output_format not in OUTPUT_FORMATS:
+            raise HTTPException(status_code=400, detail=f"output_format must be one of {list(OUTPUT_FORMATS)}")
+        self._require_ready()
+        options = self.engine.request_options(request)
+        defaults = self.postprocess
+        if passthrough and output_format in self.engine.native_formats:
+            defaults = defaults._replace(trim_silence=False, normalize=False)
+        post = defaults.for_request(request.trim_silence, request.normalize)
+        return text, output_format, options, post
+
+    def _cache_key(self, text: str, voice_id: str, options: dict, post: AudioPostprocess, output_format: str) -> str:
+        return RenderedAudioCache.make_key(
+            text=text,
+            voice=self.engine.voice_revision(voice_id),
+            options=options,
+            postprocess=post._asdict(),
+            output_format=output_format,
+            engine=self.engine.name,
+            model_version=self.engine.version,
+        )
+
+    async def _cached(self, key: str, timer: StageTimer) -> Optional[bytes]:
+        if self.cache is None:
+            return None
+        with timer.stage("cache"):
+            return await self.cache.aget(key)
+
+    async def _store(self, key: str, data: bytes) -> None:
+        if self.cache is not None:
+            await self.cache.aput(key, data)
+
+    def _busy(self, e: EngineBusy, endpoint: str) -> HTTPException:
+        self.metrics.requests.labels(endpoint, "rejected").inc()
+        print(f"[TTS] Rejected: {e}")
+        return HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after_s)})
+
+    async def _render(self, text: str, conditioning, output_format: str, options: dict, post: AudioPostprocess,
+                      token, timer: StageTimer) -> Tuple[bytes, float]:
+        """(encoded utterance, seconds of audio generated)"""
+        if not post.enabled:
+            # Audio the backend already encoded can only be served as-is
+            with timer.stage("generate"):
+                native = await asyncio.to_thread(self.engine.native_audio, text, conditioning, output_format, **options)
+            if native is not None:
+                return native, 0.0
+        audio = await self.engine.agenerate(text, conditioning, token, timer, **options)
+        audio_seconds = len(audio) / self.engine.sample_rate
+        with timer.stage("postprocess"):
+            audio, leading_ms, trailing_ms = postprocess(audio, self.engine.sample_rate, post)
+        if post.trim_silence:
+            self.metrics.observe_trim(leading_ms, trailing_ms)
+        if output_format == "mp3":
+            data = await asyncio.to_thread(encode_audio, audio, self.engine.sample_rate, output_format, timer)
+        else:
+            data = encode_audio(audio, self.engine.sample_rate, output_format, timer)
+        return data, audio_seconds
+
+    async def _counted(self, chunks: AsyncIterator[np.ndarray], counter: dict) -> AsyncIterator[np.ndarray]:
+        async for chunk in chunks:
+            counter["samples"] += len(chunk)
+            yield chunk
+
+    async def render_cached(self, text: str, voice_id: str, output_format: str, options: dict, token) -> Tuple[str, bytes]:
+        """
+        (cache key, encoded utterance) with the service's postprocess defaults, from the cache
+        or rendered and stored - for work outside a request, e.g. pre-rendering. The caller
+        holds an engine.admit slot for the token.
+        """
+        timer = StageTimer()
+        conditioning = await asyncio.to_thread(self.engine.conditioning, voice_id)
+        key = self._cache_key(text, voice_id, options, self.postprocess, output_format)
+        data = await self._cached(key, timer)
+        if data is None:
+            data, _ = await self._render(text, conditioning, output_format, options, self.postprocess, token, timer)
+            await self._store(key, data)
+        return key, data
+
+    # --- Endpoints ---
+
+    async def synthesize(self, request: SynthesisRequest, http_request: Request) -> Response:
+        """
+        Synthesize a whole utterance in the requested format (mp3, wav, pcm, or ulaw for Twilio)
+        Send X-Request-ID to be able to cancel the request (POST /cancel/{request_id})
+        """
+        text, output_format, options, post = self._prepare(request, passthrough=True)
+        voice_id = request.voice_id or "default"
+        timer = StageTimer()
+        with timer.stage("conditioning"):
+            conditioning = await asyncio.to_thread(self.engine.conditioning, voice_id)
+        key = self._cache_key(text, voice_id, options, post, output_format)
+        media_type, extension = OUTPUT_FORMATS[output_format]
+        request_id = http_request.headers.get("X-Request-ID")
+        with timer.stage("cache"):
+            packed = self.engine.precomputed(key)
+        if packed is not None:
+            self.metrics.observe("/synthesize", timer, cache="PACK")
+            headers = {
+                "Content-Disposition": f"inline; filename=speech.{extension}",
+                "X-Cache": "PACK",
+                "Server-Timing": timer.server_timing(),
+            }
+            if request_id:
+                headers["X-Request-ID"] = request_id
+            return BufferResponse(content=packed, media_type=media_type, headers=headers)
+        audio_data = await self._cached(key, timer)
+        cache_status = "HIT" if audio_data is not None else "MISS"
+        audio_seconds = 0.0
+
+        if audio_data is None:
+            print(f"[TTS] Synthesizing: {text[:50]}...")
+            self.in_flight += 1
+            try:
+                with self.cancellations.track(request_id) as token, self.engine.admit(token, timer):
+                    request_id = token.request_id
+                    audio_data, audio_seconds = await run_until_cancelled(
+                        self._render(text, conditioning, output_format, options, post, token, timer), token, http_request
+                    )
+                with timer.stage("cache"):
+                    await self._store(key, audio_data)
+            except EngineBusy as e:
+                raise self._busy(e, "/synthesize")
+            except Cancelled as e:
+                self.metrics.requests.labels("/synthesize", "cancelled").inc()
+                print(f"[TTS] {e}")
+                # 499 Client Closed Request: nobody is usually left to read it
+                raise HTTPException(status_code=499, detail=str(e))
+            except HTTPException:
+                raise
+            except Exception as e:
+                self.metrics.requests.labels("/synthesize", "error").inc()
+                print(f"[TTS] Error: {str(e)}")
+                raise HTTPException(status_code=500, detail=f"TTS generation failed: {str(e)}")
+            finally:
+                self.in_flight -= 1
+
+        self.metrics.observe("/synthesize", timer, len(text), audio_seconds, cache=cache_status)
+        headers = {
+            "Content-Disposition": f"inline; filename=speech.{extension}",
+            "X-Cache": cache_status,
+            "Server-Timing": timer.server_timing(),
+        }
+        if request_id:
+            headers["X-Request-ID"] = request_id
+        return Response(content=audio_data, media_type=media_type, headers=headers)
+
+    async def synthesize_stream(self, request: SynthesisRequest, http_request: Request) -> Response:
+        """
+        Stream synthesized speech as the engine generates it
+        Formats: ulaw (8kHz raw μ-law), pcm (16-bit raw at the engine rate), wav, mp3
+        Closing the connection or POST /cancel/{X-Request-ID} ends the stream early.
+        """
+        text, output_format, options, post = self._prepare(request)
+        voice_id = request.voice_id or "default"
+        media_type = OUTPUT_FORMATS[output_format][0]
+        timer = StageTimer()
+        with timer.stage("conditioning"):
+            conditioning = await asyncio.to_thread(self.engine.conditioning, voice_id)
+        key = self._cache_key(text, voice_id, options, post, f"stream/{output_format}")
+        cached = await self._cached(key, timer)
+        if cached is not None:
+            print(f"[TTS] Cache hit (stream): {text[:50]}...")
+            self.metrics.observe("/synthesize/stream", timer, cache="HIT")
+            return Response(content=cached, media_type=media_type,
+                            headers={"X-Cache": "HIT", "Server-Timing": timer.server_timing()})
+
+        token = self.cancellations.register(http_request.headers.get("X-Request-ID"))
+        # Admitted before the response starts, so no capacity is a 429 rather than a stalled stream
+        admission = ExitStack()
+        try:
+            admission.enter_context(self.engine.admit(token, timer))
+        except EngineBusy as e:
+            self.cancellations.release(token)
+            raise self._busy(e, "/synthesize/stream")
+        self.in_flight += 1
+        released = False
+
+        async def release():
+            # From the body's finally, or - if the client left before the body started, so the
+            # generator never ran - from the response's background task; whichever comes first
+            nonlocal released
+            if not released:
+                released = True
+                admission.close()
+                self.cancellations.release(token)
+                self.in_flight -= 1
+
+        # Sent before generation: the full stage breakdown is recorded in /metrics
+        headers = {"X-Cache": "MISS", "X-Request-ID": token.request_id, "Server-Timing": timer.server_timing()}
+
+        async def audio_chunks():
+            finished = False
+            rendered = []
+            counter = {"samples": 0}
+            first_audio_s = None
+            try:
+                chunks = self._counted(self.engine.astream(text, conditioning, token, timer, **options), counter)
+                chunks = postprocess_stream(
+                    chunks, StreamPostprocessor(self.engine.sample_rate, post), timer, self.metrics
+                )
+                async for data in encode_stream(chunks, self.engine.sample_rate, output_format, timer):
+                    if first_audio_s is None:
+                        first_audio_s = timer.elapsed()
+                    rendered.append(data)
+                    yield data
+                finished = True
+                # Only reached when the whole reply was generated and sent
+                await self._store(key, b"".join(rendered))
+                self.metrics.observe("/synthesize/stream", timer, len(text),
+                                     counter["samples"] / self.engine.sample_rate, first_audio_s=first_audio_s)
+            except Cancelled as e:
+                self.metrics.requests.labels("/synthesize/stream", "cancelled").inc()
+                print(f"[TTS] {e}")
+            except Exception as e:
+                # Headers are already out: the stream just ends early
+                self.metrics.requests.labels("/synthesize/stream", "error").inc()
+                print(f"[TTS] Synthesis failed mid-stream: {e}")
+            finally:
+                if not finished and token.cancel("client disconnected"):
+                    self.metrics.requests.labels("/synthesize/stream", "cancelled").inc()
+                await release()
+
+        return StreamingResponse(audio_chunks(), media_type=media_type, headers=headers,
+                                 background=BackgroundTask(release))
+
+    async def websocket(self, websocket: WebSocket, field_aliases: Optional[dict] = None) -> None:
+        """
+        Twilio-ready μ-law over a WebSocket, one utterance per client message
+        Client sends JSON: {"text", "voice_id", "language", "trim_silence", "normalize",
+                            "mode": "binary" | "json", "stream_sid", "mark"}
+        Server sends 20 ms / 160-byte μ-law frames as the engine generates them (binary, or
+        Twilio `media` messages with mode=json), then a `mark` message. {"event": "cancel"}
+        (barge-in) stops the current utterance and is answered with {"event": "cancelled"}.
+        Errors are sent as {"event": "error", ...} and the connection stays open.
+        field_aliases: a service's own message field names, e.g. {"speaker": "voice_id"}.
+        """
+        await websocket.accept()
+        try:
+            async for message, token in websocket_utterances(websocket, self.cancellations):
+                if field_aliases:
+                    message = {field_aliases.get(k, k): v for k, v in message.items()}
+                self.in_flight += 1
+                try:
+                    await self._stream_frames(websocket, message, token)
+                except WebSocketDisconnect:
+                    raise
+                except Cancelled as e:
+                    self.metrics.requests.labels("/ws/synthesize", "cancelled").inc()
+                    print(f"[TTS] {e}")
+                    if token.reason != "client disconnected":
+                        await websocket.send_json({"event": "cancelled", "request_id": token.request_id})
+                except EngineBusy as e:
+                    self.metrics.requests.labels("/ws/synthesize", "rejected").inc()
+                    await websocket.send_json({"event": "error", "status": 429, "message": str(e),
+                                               "retry_after": e.retry_after_s})
+                except HTTPException as e:
+                    self.metrics.requests.labels("/ws/synthesize", "error").inc()
+                    await websocket.send_json({"event": "error", "status": e.status_code, "message": e.detail})
+                except Exception as e:
+                    self.metrics.requests.labels("/ws/synthesize", "error").inc()
+                    print(f"[TTS] WebSocket error: {str(e)}")
+                    await websocket.send_json({"event": "error", "status": 500, "message": str(e)})
+                finally:
+                    self.in_flight -= 1
+        except WebSocketDisconnect:
+            pass
+
+    async def _stream_frames(self, websocket: WebSocket, message: dict, token) -> None:
+        """One /ws/synthesize utterance: cache hit or incremental generation, framed for Twilio"""
+        try:
+            fields = {k: v for k, v in message.items() if k in self.request_model.model_fields}
+            request = self.request_model(**{**fields, "output_format": "ulaw"})
+        except (TypeError, ValidationError) as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        text, _, options, post = self._prepare(request)
+        voice_id = request.voice_id or "default"
+        json_mode = message.get("mode") == "json"
+        stream_sid = message.get("stream_sid")
+        timer = StageTimer()
+        first_audio_s = None
+
+        async def send_frames(frames):
+            nonlocal first_audio_s
+            if frames and first_audio_s is None:
+                first_audio_s = timer.elapsed()
+            for frame in frames:
+                if json_mode:
+                    await websocket.send_text(media_message(frame, stream_sid))
+                else:
+                    await websocket.send_bytes(frame)
+
+        with timer.stage("conditioning"):
+            conditioning = await asyncio.to_thread(self.engine.conditioning, voice_id)
+        key = self._cache_key(text, voice_id, options, post, "stream/ulaw")
+        with timer.stage("cache"):
+            cached = self.engine.precomputed(self._cache_key(text, voice_id, options, post, "ulaw"))
+        cache_status = "PACK" if cached is not None else "HIT"
+        if cached is None:
+            cached = await self._cached(key, timer)
+        if cached is not None:
+            await send_frames(frame_ulaw(cached))
+            self.metrics.observe("/ws/synthesize", timer, cache=cache_status, first_audio_s=first_audio_s)
+        else:
+            framer = MediaFramer()
+            rendered = []
+            counter = {"samples": 0}
+            with self.engine.admit(token, timer):
+                chunks = self._counted(self.engine.astream(text, conditioning, token, timer, **options), counter)
+                chunks = postprocess_stream(chunks, StreamPostprocessor(self.engine.sample_rate, post), timer, self.metrics)
+                async for data in encode_stream(chunks, self.engine.sample_rate, "ulaw", timer):
+                    rendered.append(data)
+                    await send_frames(framer.push(data))
+            await send_frames(framer.flush())
+            await self._store(key, b"".join(rendered))
+            self.metrics.observe("/ws/synthesize", timer, len(text), counter["samples"] / self.engine.sample_rate,
+                                 first_audio_s=first_audio_s)
+
+        await websocket.send_text(mark_message(message.get("mark") or "audio_complete", stream_sid))
+
+    async def cancel(self, request_id: str) -> dict:
+        """Stop an in-flight synthesis (e.g. the prospect barged in)"""
+        if not self.cancellations.cancel(request_id, "cancelled"):
+            raise HTTPException(status_code=404, detail="No in-flight request with this id")
+        print(f"[TTS] Cancel requested: {request_id}")
+        return {"status": "cancelled", "request_id": request_id}
+
+    async def ready(self):
+        """Readiness: 200 once the engine has loaded, 503 before that or if loading failed"""
+        try:
+            self._require_ready()
+        except HTTPException as e:
+            return JSONResponse(status_code=503, content={"ready": False, "detail": e.detail, **self.state})
+        return {"ready": True, **self.state}
+
+    async def prometheus_metrics(self) -> Response:
+        """Prometheus metrics: per-stage latency, real-time factor, chars/sec, in-flight requests"""
+        body, content_type = self.metrics.render()
+        return Response(content=body, media_type=content_type)
+
+    def router(self, service_routes: bool = True) -> APIRouter:
+        """
+        The synthesis endpoints; service_routes=False leaves out /ready, /cancel and /metrics
+        for services that already serve them (sharing their registry and metrics).
+        """
+        request_model = self.request_model
+
+        # Typed with request_model, so engine-specific fields are validated and documented
+        async def synthesize(request: request_model, http_request: Request) -> Response:
+            return await self.synthesize(request, http_request)
+
+        async def synthesize_stream(request: request_model, http_request: Request) -> Response:
+            return await self.synthesize_stream(request, http_request)
+
+        synthesize.__doc__ = self.synthesize.__doc__
+        synthesize_stream.__doc__ = self.synthesize_stream.__doc__
+
+        router = APIRouter()
+        router.add_api_route("/synthesize", synthesize, methods=["POST"])
+        router.add_api_route("/synthesize/stream", synthesize_stream, methods=["POST"])
+        router.add_api_websocket_route("/ws/synthesize", self.websocket)
+        if service_routes:
+            router.add_api_route("/ready", self.ready, methods=["GET"])
+            router.add_api_route("/cancel/{request_id}", self.cancel, methods=["POST"])
+            router.add_api_route("/metrics", self.prometheus_metrics, methods=["GET"])
+        return router
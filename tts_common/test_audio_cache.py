@@ -0,0 +1,63 @@
+import os
+import asyncio
+import shutil
+import tempfile
+import unittest
+
+from tts_common.audio_cache import RenderedAudioCache
+
+
+class TestRenderedAudioCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _disk_keys(self, cache):
+        return {name for _, _, names in os.walk(cache.cache_dir) for name in names}
+
+    def test_memory_lru_is_bounded_by_bytes(self):
+        cache = RenderedAudioCache(cache_dir=None, memory_bytes=250)
+        cache.put("a", b"a" * 100)
+        cache.put("b", b"b" * 100)
+        cache.get("a")                  # "a" is now the most recently used
+        cache.put("c", b"c" * 100)      # 300 bytes > 250: evicts "b"
+        cache.put("huge", b"h" * 300)   # Larger than the whole tier: never stored
+
+        self.assertEqual(cache.get("a"), b"a" * 100)
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNone(cache.get("huge"))
+        self.assertEqual(cache.summary()["memory_bytes"], 200)
+
+    def test_disk_tier_survives_memory_and_is_bounded(self):
+        cache = RenderedAudioCache(self.tmp_dir, memory_bytes=0, max_disk_bytes=1000)
+        keys = [RenderedAudioCache.make_key(text=f"line {i}") for i in range(5)]
+        for i, key in enumerate(keys[:4]):
+            cache.put(key, bytes([i]) * 240)
+            os.utime(cache._disk_path(key), (i, i))  # Deterministic recency
+        self.assertEqual(cache.get(keys[0]), bytes([0]) * 240)  # Disk hit refreshes "line 0"
+
+        cache.put(keys[4], b"x" * 240)  # 1200 bytes > 1000: evict down to 900
+
+        self.assertEqual(self._disk_keys(cache), {keys[0], keys[3], keys[4]})
+        summary = cache.summary()
+        self.assertEqual((summary["disk_bytes"], summary["disk_evictions"]), (720, 2))
+
+    def test_async_api_round_trip(self):
+        cache = RenderedAudioCache(self.tmp_dir, memory_bytes=1024)
+
+        async def scenario():
+            self.assertIsNone(await cache.aget("k"))
+            await cache.aput("k", b"audio")
+            return await cache.aget("k")
+
+        self.assertEqual(asyncio.run(scenario()), b"audio")
+        self.assertEqual(RenderedAudioCache(self.tmp_dir).get("k"), b"audio")
+        stats = cache.summary()
+        self.assertEqual((stats["memory_hits"], stats["misses"], stats["stores"]), (1, 1, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+
+import numpy as np
+
+from tts_common.codec import (
+    StreamResampler, alaw_decode, alaw_encode, resample, ulaw_decode, ulaw_encode,
+)
+
+
+class TestG711(unittest.TestCase):
+
+    def setUp(self):
+        self.pcm = np.array([0, 32767, -32768, 1000, -1000], dtype=np.int16)
+
+    def test_ulaw_known_values(self):
+        # Reference values from the CCITT g711.c tables (identical to audioop.lin2ulaw / ulaw2lin)
+        encoded = ulaw_encode(self.pcm)
+        self.assertEqual(encoded.tolist(), [0xFF, 0x80, 0x00, 0xCE, 0x4E])
+        self.assertEqual(ulaw_decode(encoded.tobytes()).tolist(), [0, 32124, -32124, 988, -988])
+
+    def test_alaw_known_values(self):
+        encoded = alaw_encode(self.pcm)
+        self.assertEqual(encoded.tolist(), [0xD5, 0xAA, 0x2A, 0xFA, 0x7A])
+        self.assertEqual(alaw_decode(encoded.tobytes()).tolist(), [8, 32256, -32256, 1008, -1008])
+
+    def test_round_trip_is_idempotent_for_every_code(self):
+        # decode -> encode gives back every one of the 256 codes (except μ-law's duplicate zero)
+        codes = np.arange(256, dtype=np.uint8)
+        ulaw = ulaw_encode(ulaw_decode(codes))
+        self.assertEqual(int((ulaw != codes).sum()), 1)  # 0x7F decodes to 0, which encodes as 0xFF
+        np.testing.assert_array_equal(alaw_encode(alaw_decode(codes)), codes)
+
+
+class TestResampler(unittest.TestCase):
+
+    def test_downsample_preserves_a_tone(self):
+        tone = np.sin(2 * np.pi * 440 * np.arange(24000) / 24000).astype(np.float32)
+        out = resample(tone, 24000, 8000)
+
+        self.assertEqual(len(out), 8000)
+        expected = np.sin(2 * np.pi * 440 * np.arange(8000) / 8000)
+        self.assertLess(np.abs(out[100:-100] - expected[100:-100]).max(), 1e-3)
+
+    def test_stream_resampler_matches_one_shot(self):
+        audio = np.random.default_rng(0).standard_normal(10007).astype(np.float32)
+        stream = StreamResampler(24000, 8000)
+        pieces = [stream.push(audio[i:i + 997]) for i in range(0, len(audio), 997)]
+        pieces.append(stream.flush())
+
+        np.testing.assert_allclose(np.concatenate(pieces), resample(audio, 24000, 8000), atol=1e-5)
+
+
+if __name__ == '__main__':
+    unittest.main()
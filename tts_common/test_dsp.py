@@ -0,0 +1,80 @@
+import os
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+from tts_common.dsp import AudioPostprocess, StreamPostprocessor, postprocess, voiced_bounds
+
+RATE = 8000
+
+
+def tone(seconds: float, amplitude: float) -> np.ndarray:
+    return (amplitude * np.sin(2 * np.pi * 440 * np.arange(int(seconds * RATE)) / RATE)).astype(np.float32)
+
+
+def silence(seconds: float) -> np.ndarray:
+    return np.zeros(int(seconds * RATE), np.float32)
+
+
+class TestPostprocess(unittest.TestCase):
+
+    def test_trim_keeps_speech_plus_padding(self):
+        settings = AudioPostprocess(normalize=False)  # 40 ms pad = 320 samples, 10 ms frames
+        audio = np.concatenate([silence(0.3), tone(0.5, 0.1), silence(0.2)])
+
+        self.assertEqual(voiced_bounds(audio, RATE, settings), (2400 - 320, 6400 + 320))
+        trimmed, leading_ms, trailing_ms = postprocess(audio, RATE, settings)
+        self.assertEqual(len(trimmed), 4000 + 2 * 320)
+        self.assertEqual((leading_ms, trailing_ms), (260.0, 160.0))
+
+    def test_all_silence_is_left_alone(self):
+        audio = silence(0.2)
+        out, leading_ms, trailing_ms = postprocess(audio, RATE, AudioPostprocess())
+        self.assertEqual((len(out), leading_ms, trailing_ms), (len(audio), 0.0, 0.0))
+        self.assertIsNone(voiced_bounds(audio, RATE, AudioPostprocess()))
+
+    def test_normalization_respects_peak_limit(self):
+        out, _, _ = postprocess(tone(0.5, 0.9), RATE, AudioPostprocess(trim_silence=False))
+        self.assertLessEqual(np.abs(out).max(), 10 ** (-1 / 20) + 1e-6)
+
+    def test_service_defaults_leave_audio_alone_unless_enabled(self):
+        with patch.dict(os.environ, clear=True):
+            self.assertFalse(AudioPostprocess.from_env().enabled)
+        with patch.dict(os.environ, {"TRIM_SILENCE": "1"}, clear=True):
+            settings = AudioPostprocess.from_env()
+            self.assertEqual((settings.trim_silence, settings.normalize), (True, False))
+        self.assertTrue(AudioPostprocess.from_env().for_request(normalize=True).normalize)
+
+
+class TestStreamPostprocessor(unittest.TestCase):
+
+    def test_stream_trims_only_the_outer_silence(self):
+        stream = StreamPostprocessor(RATE, AudioPostprocess(normalize=False))
+        chunks = [silence(0.3), tone(0.2, 0.1), silence(0.1), tone(0.2, 0.1), silence(0.3)]
+        out = np.concatenate([stream.push(chunk) for chunk in chunks])
+        stream.finish()
+
+        # The pause between the two tones is kept; the lead-in is cut to the padding and the
+        # held-back tail, once finish() shows it was the end, is dropped
+        self.assertEqual(len(out), 320 + 1600 + 800 + 1600)
+        self.assertEqual((stream.leading_ms, stream.trailing_ms), (260.0, 300.0))
+
+    def test_louder_later_chunk_lowers_the_gain_instead_of_clipping(self):
+        stream = StreamPostprocessor(RATE, AudioPostprocess(trim_silence=False))
+        quiet = stream.push(tone(0.2, 0.03))
+        first_gain = stream.gain
+        loud = stream.push(tone(0.2, 0.8))
+
+        limit = 10 ** (-1 / 20)
+        self.assertGreater(first_gain, 3.0)  # Quiet opening gets boosted
+        self.assertLessEqual(np.abs(loud).max(), limit + 1e-6)
+        self.assertLess(stream.gain, first_gain)
+        self.assertAlmostEqual(float(np.abs(quiet).max()), 0.03 * first_gain, places=4)
+
+        stream.push(tone(0.2, 0.03))
+        self.assertEqual(stream.gain, limit / float(np.abs(tone(0.2, 0.8)).max()))  # Never raised again
+
+
+if __name__ == '__main__':
+    unittest.main()
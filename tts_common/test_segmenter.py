@@ -0,0 +1,39 @@
+import unittest
+
+from tts_common.segmenter import segment_text
+
+
+class TestSegmenter(unittest.TestCase):
+
+    def test_first_segment_is_short_and_later_ones_are_packed(self):
+        text = ("Hi, this is Alex from Acme. I was hoping to grab two minutes. "
+                "Is now a good time? We help IT teams cut ticket volume.")
+        segments = segment_text(text, first_max_chars=30, max_chars=120)
+
+        self.assertEqual(segments[0], "Hi, this is Alex from Acme.")
+        self.assertEqual(len(segments), 2)
+        self.assertTrue(all(len(s) <= 120 for s in segments))
+        # Nothing is lost or reordered
+        self.assertEqual(" ".join(segments), text)
+
+    def test_long_sentence_breaks_at_clause_then_words(self):
+        clause = "word " * 30
+        segments = segment_text(f"{clause.strip()}; short tail.", first_max_chars=50, max_chars=50)
+
+        self.assertTrue(all(len(s) <= 50 for s in segments), segments)
+        self.assertEqual(segments[-1], "short tail.")
+
+    def test_run_on_first_clause_still_gives_a_short_first_segment(self):
+        text = "so I was hoping to catch you for a couple of minutes about how your service desk handles " * 2
+        segments = segment_text(text.strip() + ". Thanks.", first_max_chars=40, max_chars=250)
+
+        self.assertLessEqual(len(segments[0]), 40)
+        self.assertEqual(len(segments), 2)
+        self.assertEqual(" ".join(segments), " ".join(text.split()) + ". Thanks.")
+
+    def test_empty_text(self):
+        self.assertEqual(segment_text("   "), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+import asyncio
+import unittest
+from contextlib import contextmanager
+
+import numpy as np
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from tts_common.cancellation import CancellationToken
+from tts_common.dsp import AudioPostprocess
+from tts_common.engine import EngineBusy, TTSEngine
+from tts_common.metrics import StageTimer, TTSMetrics
+from tts_common import serving
+from tts_common.serving import SynthesisRequest, TTSServer, encode_stream
+
+
+class NativeMp3Engine(TTSEngine):
+    name = "native-test"
+    sample_rate = 8000
+    native_formats = ("mp3",)
+
+    def native_audio(self, text, conditioning, output_format, **options):
+        return b"ID3 as the backend encoded it" if output_format == "mp3" else None
+
+    def generate(self, text, conditioning, **options):
+        return np.zeros(800, np.float32)
+
+
+class TestNativePassthrough(unittest.TestCase):
+
+    def setUp(self):
+        self.server = TTSServer(NativeMp3Engine(), metrics=TTSMetrics("native_test"),
+                                postprocess=AudioPostprocess())
+        self.server.start(wait=True)
+
+    def prepare(self, **fields):
+        return self.server._prepare(SynthesisRequest(text="hi", **fields), passthrough=True)
+
+    def render(self, **fields):
+        text, output_format, options, post = self.prepare(**fields)
+        token = CancellationToken("test")
+        data, _ = asyncio.run(self.server._render(text, None, output_format, options, post, token, StageTimer()))
+        return data, post
+
+    def test_native_format_is_served_as_encoded_by_default(self):
+        data, post = self.render(output_format="mp3")
+        self.assertEqual(data, b"ID3 as the backend encoded it")
+        self.assertFalse(post.enabled)
+
+    def test_request_can_still_opt_into_postprocessing(self):
+        *_, post = self.prepare(output_format="mp3", trim_silence=True)
+        self.assertTrue(post.trim_silence)
+        self.assertFalse(post.normalize)
+
+    def test_other_formats_keep_the_service_defaults(self):
+        data, post = self.render(output_format="pcm")
+        self.assertTrue(post.trim_silence and post.normalize)
+        self.assertEqual(len(data), 800 * 2)
+
+
+class BusyEngine(NativeMp3Engine):
+    name = "busy-test"
+
+    def admit(self, token, timer):
+        raise EngineBusy("no capacity", 3)
+
+
+class TestAdmission(unittest.TestCase):
+
+    def setUp(self):
+        server = TTSServer(BusyEngine(), metrics=TTSMetrics("busy_test"))
+        server.start(wait=True)
+        app = FastAPI()
+        app.include_router(server.router())
+        self.client = TestClient(app)
+
+    def test_busy_engine_is_turned_away_with_retry_after(self):
+        for path in ("/synthesize", "/synthesize/stream"):
+            response = self.client.post(path, json={"text": "hi", "output_format": "pcm"})
+            self.assertEqual(response.status_code, 429)
+            self.assertEqual(response.headers["Retry-After"], "3")
+
+    def test_busy_engine_reports_an_error_event_on_the_websocket(self):
+        with self.client.websocket_connect("/ws/synthesize") as websocket:
+            websocket.send_json({"text": "hi"})
+            self.assertEqual(websocket.receive_json(),
+                             {"event": "error", "status": 429, "message": "no capacity", "retry_after": 3})
+
+
+class CountingEngine(NativeMp3Engine):
+    name = "counting-test"
+
+    def __init__(self):
+        self.admitted = 0
+
+    @contextmanager
+    def admit(self, token, timer):
+        self.admitted += 1
+        try:
+            yield
+        finally:
+            self.admitted -= 1
+
+
+class TestStreamRelease(unittest.TestCase):
+
+    def test_stream_abandoned_before_its_body_starts_gives_its_slot_back(self):
+        engine = CountingEngine()
+        server = TTSServer(engine, metrics=TTSMetrics("release_test"))
+        server.start(wait=True)
+        http_request = Request({"type": "http", "headers": [(b"x-request-id", b"gone")]})
+
+        async def abandon():
+            response = await server.synthesize_stream(SynthesisRequest(text="hi", output_format="pcm"), http_request)
+            self.assertEqual((engine.admitted, server.in_flight), (1, 1))
+            await response.background()  # What Starlette runs when the client is already gone
+            await response.background()  # Released only once
+
+        asyncio.run(abandon())
+        self.assertEqual((engine.admitted, server.in_flight), (0, 0))
+        self.assertEqual(server.cancellations.summary()["in_flight"], 0)
+
+
+@unittest.skipIf(serving.lameenc is None, "lameenc not installed")
+class TestMp3Encoding(unittest.TestCase):
+
+    def test_whole_utterance_is_encoded_in_process(self):
+        data = serving._mp3_bytes(np.zeros(24000, np.float32), 24000)
+        self.assertEqual((data[0], data[1] & 0xE0), (0xFF, 0xE0))  # MP3 frame sync
+
+    def test_stream_is_flushed_once_at_the_end(self):
+        async def chunks():
+            for _ in range(4):
+                yield np.zeros(2400, np.float32)
+
+        async def collect():
+            return [data async for data in encode_stream(chunks(), 24000, "mp3", StageTimer())]
+
+        streamed = b"".join(asyncio.run(collect()))
+        self.assertGreater(len(streamed), 0)
+        self.assertEqual((streamed[0], streamed[1] & 0xE0), (0xFF, 0xE0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+import json
+import base64
+import unittest
+
+from tts_common.twilio import FRAME_BYTES, ULAW_SILENCE, MediaFramer, frame_ulaw, mark_message, media_message
+
+
+class TestMediaFramer(unittest.TestCase):
+
+    def test_frames_span_segment_boundaries_and_only_the_last_is_padded(self):
+        audio = bytes(i % 200 for i in range(500))
+        framer = MediaFramer()
+        frames = []
+        for segment in (audio[:100], audio[100:250], audio[250:]):  # Not aligned to frames
+            frames += framer.push(segment)
+
+        self.assertEqual(len(frames), 3)  # 480 bytes of whole frames; 20 still pending
+        frames += framer.flush()
+
+        self.assertTrue(all(len(frame) == FRAME_BYTES for frame in frames))
+        self.assertEqual(b"".join(frames)[:500], audio)  # Nothing padded mid-stream
+        self.assertEqual(frames[-1][20:], bytes([ULAW_SILENCE]) * (FRAME_BYTES - 20))
+        self.assertEqual(framer.flush(), [])
+
+    def test_aligned_audio_needs_no_padding(self):
+        audio = bytes(range(160)) * 2
+        self.assertEqual(frame_ulaw(audio), [audio[:160], audio[160:]])
+        self.assertEqual(frame_ulaw(b""), [])
+
+    def test_messages(self):
+        media = json.loads(media_message(b"\x01\x02", stream_sid="MZ1"))
+        self.assertEqual(base64.b64decode(media["media"]["payload"]), b"\x01\x02")
+        self.assertEqual(media["streamSid"], "MZ1")
+        self.assertEqual(json.loads(mark_message("end")), {"event": "mark", "mark": {"name": "end"}})
+
+
+if __name__ == '__main__':
+    unittest.main()
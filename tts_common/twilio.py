@@ -0,0 +1,60 @@
+"""
+Twilio Media Streams framing
+Twilio plays outbound audio sent as `media` messages of 8 kHz μ-law, conventionally
+20 ms (160 bytes) per message, and echoes back `mark` messages once everything sent
+before them has been played. TTS services emit audio in arbitrary-sized segments, so
+MediaFramer re-chunks them into exact frames across segment boundaries and pads only
+the very last frame (with μ-law silence) at the end of an utterance.
+"""
+
+import json
+import base64
+from typing import List, Optional
+
+FRAME_MS = 20
+FRAME_BYTES = 160  # 20 ms of 8 kHz μ-law, 1 byte per sample
+ULAW_SILENCE = 0xFF
+
+
+class MediaFramer:
+    def __init__(self, frame_bytes: int = FRAME_BYTES):
+        self.frame_bytes = frame_bytes
+        self._pending = bytearray()
+
+    def push(self, data: bytes) -> List[bytes]:
+        """Add μ-law bytes; returns every complete frame now available"""
+        self._pending += data
+        whole = len(self._pending) - len(self._pending) % self.frame_bytes
+        frames = [bytes(self._pending[i:i + self.frame_bytes]) for i in range(0, whole, self.frame_bytes)]
+        del self._pending[:whole]
+        return frames
+
+    def flush(self) -> List[bytes]:
+        """End of utterance: the remainder, padded with silence to a full frame"""
+        if not self._pending:
+            return []
+        frame = bytes(self._pending) + bytes([ULAW_SILENCE]) * (self.frame_bytes - len(self._pending))
+        self._pending.clear()
+        return [frame]
+
+
+def frame_ulaw(data: bytes, frame_bytes: int = FRAME_BYTES) -> List[bytes]:
+    """A complete utterance -> frames (last one padded)"""
+    framer = MediaFramer(frame_bytes)
+    return framer.push(data) + framer.flush()
+
+
+def media_message(frame: bytes, stream_sid: Optional[str] = None) -> str:
+    """Twilio `media` message, ready to forward on the call's Media Stream"""
+    message = {"event": "media", "media": {"payload": base64.b64encode(frame).decode("ascii")}}
+    if stream_sid:
+        message["streamSid"] = stream_sid
+    return json.dumps(message)
+
+
+def mark_message(name: str, stream_sid: Optional[str] = None) -> str:
+    """Twilio `mark` message; Twilio echoes it back when playback reaches this point"""
+    message = {"event": "mark", "mark": {"name": name}}
+    if stream_sid:
+        message["streamSid"] = stream_sid
+    return json.dumps(message)
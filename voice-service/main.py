@@ -1,13 +1,25 @@
 import os
-from typing import Dict, Generator
+import sys
+import time
+import asyncio
+import threading
+from typing import AsyncIterator, Dict, Generator
 
 import numpy as np
-import torch
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import StreamingResponse
+from fastapi import FastAPI, File, HTTPException, Request, UploadFile, WebSocket
+from fastapi.responses import JSONResponse, Response
 from pydantic import BaseModel
 
-from TTS.api import TTS  # from coqui-tts / TTS package
+# Shared TTS helpers live in ../tts_common
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tts_common.audio_cache import RenderedAudioCache
+from tts_common.cancellation import CancellationRegistry, check_cancelled, install_step_hooks
+from tts_common.engine import TTSEngine, iterate_in_thread
+from tts_common.metrics import StageTimer, TTSMetrics
+from tts_common.serving import SynthesisRequest, TTSServer
+
+from replica_pool import ReplicaPool
+from speaker_latents import SpeakerLatents
 
 # ---------- Config ----------
 
@@ -16,50 +28,188 @@ from TTS.api import TTS  # from coqui-tts / TTS package
 # https://coqui.ai and https://huggingface.co/coqui/XTTS-v2
 MODEL_NAME = "tts_models/multilingual/multi-dataset/xtts_v2"
 
+# Reference wavs (and their precomputed <id>.latents.pt) live here
+SPEAKERS_DIR = os.environ.get("SPEAKERS_DIR", "speakers")
+
 # Map logical speaker IDs to reference wav paths
 SPEAKERS: Dict[str, str] = {
-    "alex": os.path.join("speakers", "alex.wav"),
+    "alex": os.path.join(SPEAKERS_DIR, "alex.wav"),
     # Add more, e.g. "emma": "speakers/emma.wav"
 }
+# Speakers registered through POST /speakers/{speaker_id} are <SPEAKERS_DIR>/<id>.wav
+if os.path.isdir(SPEAKERS_DIR):
+    for name in sorted(os.listdir(SPEAKERS_DIR)):
+        if name.endswith(".wav"):
+            SPEAKERS.setdefault(name[: -len(".wav")], os.path.join(SPEAKERS_DIR, name))
 
 DEFAULT_SPEAKER = "alex"
 DEFAULT_LANG = "en"
 
-# Chunk size of PCM bytes we stream back.
-# Each sample = 2 bytes (int16). 24kHz * 0.1s * 2 bytes ≈ 4800 bytes → ~100 ms chunks.
-PCM_CHUNK_BYTES = 4800
+# XTTS-v2 output sample rate
+SAMPLE_RATE = 24000
+
+# Incremental inference: GPT tokens per generated audio chunk (~21.5 tokens per second of
+# audio). Smaller chunks reach the caller sooner, at some cost in throughput.
+STREAM_CHUNK_SIZE = int(os.environ.get("XTTS_STREAM_CHUNK_SIZE", "20"))
+
 
+# Warmup synthesis once the model is loaded (first-call kernel selection / compilation),
+# so the first real caller doesn't pay for it
+WARMUP = os.environ.get("XTTS_WARMUP", "1") == "1"
+WARMUP_TEXT = os.environ.get("XTTS_WARMUP_TEXT", "Hi, this is Alex. Do you have a quick minute?")
 
-# ---------- Model Load (on startup) ----------
+# CPU nodes: one utterance doesn't use 32 cores well, so XTTS_REPLICAS > 1 runs that many
+# model replicas in worker processes, each pinned to its own slice of cores (replica_pool.py).
+# 1 = a single in-process model.
+REPLICAS = int(os.environ.get("XTTS_REPLICAS", "1"))
+# torch threads per replica; 0 = its share of the cores
+THREADS_PER_REPLICA = int(os.environ.get("XTTS_THREADS_PER_REPLICA", "0"))
+
+
+# ---------- Model Load (background, on startup) ----------
 
-print("Loading XTTS-v2 model… this may take a bit on first run.")
 # .to("cuda") if you run with a GPU, .to("cpu") is fine but slower.
 # We check for generic env var or default to cpu for safety in this demo
 device = "cuda" if os.environ.get("USE_CUDA") == "1" else "cpu"
-print(f"Using device: {device}")
 
-try:
-    tts = TTS(MODEL_NAME).to(device)
-    print("XTTS-v2 loaded.")
-except Exception as e:
-    print(f"Warning: Failed to load XTTS model. Make sure coqui-tts is installed. Error: {e}")
-    tts = None
+# Set by _load_model; importing this module never loads the model
+tts = None
+xtts_model = None
+speaker_latents = None
+replica_pool = None  # Set by _start_replicas instead, when XTTS_REPLICAS > 1
+
+# One generation at a time; requests queue on the lock, off the event loop
+_model_lock = threading.Lock()
+
+# loading → warming_up → ready (or failed). /health = liveness, /ready = readiness.
+model_state = {"status": "loading", "load_seconds": None, "warmup_seconds": None, "error": None}
+
+
+def _load_model() -> None:
+    """Load XTTS-v2, build speaker latents and (optionally) warm up. Runs on a background thread."""
+    global tts, xtts_model, speaker_latents
+    print(f"Loading XTTS-v2 model on {device}… this may take a bit on first run.")
+    started = time.perf_counter()
+    try:
+        from TTS.api import TTS  # from coqui-tts / TTS package (slow import: torch, transformers)
+
+        model = TTS(MODEL_NAME).to(device)
+        # The GPT runs once per generated audio token, the HiFi-GAN decoder once per sentence:
+        # a cancelled request stops at the next of either
+        hooked = install_step_hooks(model, "synthesizer.tts_model.gpt.gpt", "synthesizer.tts_model.hifigan_decoder")
+        print(f"XTTS-v2 loaded. Cancellation checked at: {', '.join(hooked) or 'request start only'}")
+
+        # Speaker conditioning computed once per reference wav, not on every request
+        xtts_model = getattr(getattr(model, "synthesizer", None), "tts_model", None)
+        if hasattr(xtts_model, "get_conditioning_latents"):
+            speaker_latents = SpeakerLatents(xtts_model, MODEL_NAME, device, _model_lock)
+            print(f"Speaker latents ready for {speaker_latents.warm(SPEAKERS)} speakers.")
+        tts = model
+        model_state["load_seconds"] = round(time.perf_counter() - started, 2)
+
+        if WARMUP and DEFAULT_SPEAKER in SPEAKERS:
+            model_state["status"] = "warming_up"
+            warmup_started = time.perf_counter()
+            for _ in _synthesize_stream(WARMUP_TEXT, DEFAULT_SPEAKER, DEFAULT_LANG):
+                pass
+            model_state["warmup_seconds"] = round(time.perf_counter() - warmup_started, 2)
+        model_state["status"] = "ready"
+        print(f"XTTS-v2 ready: load {model_state['load_seconds']}s, warmup {model_state['warmup_seconds']}s")
+    except Exception as e:
+        print(f"Warning: Failed to load XTTS model. Make sure coqui-tts is installed. Error: {e}")
+        model_state.update(status="failed", error=str(e))
+
+
+def _start_replicas() -> None:
+    """XTTS_REPLICAS > 1: start the replica processes (each runs _load_model) and wait for them."""
+    global replica_pool
+    started = time.perf_counter()
+    try:
+        pool = ReplicaPool(REPLICAS, _ReplicaEngine, THREADS_PER_REPLICA or None)
+        print(f"Starting {REPLICAS} XTTS-v2 replicas on {device}, {pool.threads} threads each…")
+        ready = pool.start()
+        replica_pool = pool
+        model_state["load_seconds"] = round(time.perf_counter() - started, 2)
+        model_state["status"] = "ready"
+        print(f"XTTS-v2 ready: {ready}/{REPLICAS} replicas in {model_state['load_seconds']}s")
+    except Exception as e:
+        print(f"Warning: Failed to start XTTS replicas. Error: {e}")
+        model_state.update(status="failed", error=str(e))
+
+
+class _ReplicaEngine:
+    """Entry points of a replica process (see replica_pool._serve): this module, with its own model."""
+
+    def __init__(self):
+        _load_model()
+        if model_state["status"] != "ready":
+            raise RuntimeError(model_state["error"])
+
+    def stream(self, text: str, speaker_id: str, wav_path: str, language: str, timer: StageTimer):
+        SPEAKERS[speaker_id] = wav_path  # May have been registered after this replica started
+        return _synthesize_stream(text, speaker_id, language, timer)
+
+    def register_speaker(self, speaker_id: str, wav_path: str) -> None:
+        SPEAKERS[speaker_id] = wav_path
+        if speaker_latents is not None:
+            speaker_latents.register(speaker_id, wav_path)
+
+    def forget_speaker(self, speaker_id: str) -> None:
+        if speaker_latents is not None:
+            speaker_latents.forget(speaker_id)
 
 
 # ---------- FastAPI app ----------
 
 app = FastAPI(title="XTTS-v2 Voice Service", version="0.1.0")
 
+# Per-stage latency, RTF and in-flight requests on /metrics (Prometheus)
+metrics = TTSMetrics("xtts")
+_generating = 0
+# Requests that have been received but are not generating yet
+metrics.track(
+    in_flight=lambda: engine_server.in_flight,
+    queued=lambda: engine_server.in_flight - (replica_pool.running if replica_pool is not None else _generating),
+)
+
+# In-flight requests by X-Request-ID, for POST /cancel/{request_id} and client disconnects
+cancellations = CancellationRegistry()
+
+
+@app.on_event("startup")
+async def startup_event():
+    # Not awaited: the server answers /health right away and turns /ready once loaded
+    loader = _start_replicas if REPLICAS > 1 else _load_model
+    threading.Thread(target=loader, name="xtts-load", daemon=True).start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    if replica_pool is not None:
+        replica_pool.shutdown()
+
 
 class TTSRequest(BaseModel):
     text: str
     speaker: str | None = None   # logical speaker id
     language: str | None = None  # e.g. "en"
+    output_format: str | None = None  # "pcm" (24kHz int16, default) or "ulaw" (8kHz, Twilio-ready)
+    trim_silence: bool | None = None  # Cut XTTS's leading / trailing silence (default: TRIM_SILENCE env)
+    normalize: bool | None = None     # Normalize loudness (default: NORMALIZE_LOUDNESS env)
+
 
+def _require_ready() -> None:
+    """503 (+ Retry-After while still loading) until the model has loaded and warmed up."""
+    if model_state["status"] == "ready":
+        return
+    if model_state["status"] == "failed":
+        raise HTTPException(status_code=503, detail=f"TTS model failed to load: {model_state['error']}")
+    raise HTTPException(status_code=503, detail=f"TTS model {model_state['status']}", headers={"Retry-After": "5"})
 
-def _synthesize_to_pcm(text: str, speaker_id: str, language: str) -> bytes:
-    """Run XTTS-v2 and return 16-bit PCM bytes at 24 kHz."""
-    if tts is None:
+
+def _speaker_wav(speaker_id: str) -> str:
+    """Reference wav for a logical speaker id (HTTPException if unknown or missing)."""
+    if tts is None and replica_pool is None:
          raise HTTPException(status_code=500, detail="TTS model not loaded")
 
     if speaker_id not in SPEAKERS:
@@ -74,65 +224,262 @@ def _synthesize_to_pcm(text: str, speaker_id: str, language: str) -> bytes:
             status_code=500,
             detail=f"Speaker reference wav not found: {speaker_wav}",
         )
+    return speaker_wav
+
+
+def _synthesize(text: str, speaker_id: str, language: str, timer: StageTimer | None = None) -> np.ndarray:
+    """Run XTTS-v2 and return the float32 waveform at 24 kHz."""
+    global _generating
+    speaker_wav = _speaker_wav(speaker_id)
 
     # XTTS-v2 inference – returns float32 numpy array, typically in [-1, 1]
     # API per Coqui TTS docs: tts.tts(text=..., speaker_wav=..., language=...) 
-    audio = tts.tts(text=text, speaker_wav=speaker_wav, language=language)
+    # (speaker conditioning happens inside this call, so it is part of "generate")
+    with _model_lock:
+        # Cancelled while waiting for the model: never start
+        check_cancelled()
+        _generating += 1
+        try:
+            with (timer or StageTimer()).stage("generate"):
+                audio = tts.tts(text=text, speaker_wav=speaker_wav, language=language)
+        finally:
+            _generating -= 1
+    return np.asarray(audio, dtype=np.float32)
+
+
+def _synthesize_stream(text: str, speaker_id: str, language: str, timer: StageTimer | None = None) -> Generator[np.ndarray, None, None]:
+    """
+    XTTS-v2 incremental inference: yield float32 24 kHz chunks as the GPT produces them
+    (every XTTS_STREAM_CHUNK_SIZE tokens), instead of one waveform at the end.
+    Models without inference_stream fall back to a single chunk from tts.tts.
+    """
+    global _generating
+    if speaker_latents is None or not hasattr(xtts_model, "inference_stream"):
+        yield _synthesize(text, speaker_id, language, timer)
+        return
+
+    speaker_wav = _speaker_wav(speaker_id)
+    timer = timer or StageTimer()
+    # Precomputed at startup / registration: a dictionary lookup
+    with timer.stage("conditioning"):
+        gpt_cond_latent, speaker_embedding = speaker_latents.get(speaker_id, speaker_wav)
+    with _model_lock:
+        check_cancelled()
+        _generating += 1
+        try:
+            chunks = xtts_model.inference_stream(
+                text,
+                language,
+                gpt_cond_latent,
+                speaker_embedding,
+                stream_chunk_size=STREAM_CHUNK_SIZE,
+                enable_text_splitting=True,
+            )
+            while True:
+                check_cancelled()
+                with timer.stage("generate"):
+                    chunk = next(chunks, None)
+                if chunk is None:
+                    return
+                yield chunk.squeeze().detach().cpu().numpy().astype(np.float32)
+        finally:
+            _generating -= 1
+
+
+async def _generate_chunks(text: str, speaker_id: str, language: str, timer: StageTimer, token) -> AsyncIterator[np.ndarray]:
+    """
+    Float chunks as XTTS generates them: _synthesize_stream on its own thread, bound to
+    `token` (cancelling it stops the GPT at its next step and raises Cancelled here).
+    With replicas, the least-loaded replica process generates and streams the chunks instead.
+    """
+    if replica_pool is not None:
+        chunks = replica_pool.stream(text, speaker_id, _speaker_wav(speaker_id), language, token, timer)
+    else:
+        # _synthesize_stream records its own stages on `timer`
+        chunks = iterate_in_thread(lambda: _synthesize_stream(text, speaker_id, language, timer), token)
+    async for chunk in chunks:
+        yield chunk
 
-    # Convert float [-1, 1] to 16-bit PCM
-    audio = np.asarray(audio, dtype=np.float32)
-    audio = np.clip(audio, -1.0, 1.0)
-    pcm16 = (audio * 32767.0).astype(np.int16)
 
-    return pcm16.tobytes()
+class XTTSEngine(TTSEngine):
+    """XTTS-v2 behind the shared serving core: /synthesize, /synthesize/stream, /ws/synthesize"""
 
+    name = "xtts"
+    sample_rate = SAMPLE_RATE
+    version = MODEL_NAME
 
-def _iter_pcm_chunks(pcm_bytes: bytes, chunk_size: int = PCM_CHUNK_BYTES) -> Generator[bytes, None, None]:
-    """Yield PCM data in fixed-size chunks for streaming."""
-    total = len(pcm_bytes)
-    pos = 0
-    while pos < total:
-        chunk = pcm_bytes[pos : pos + chunk_size]
-        if not chunk:
-            break
-        yield chunk
-        pos += chunk_size
+    @staticmethod
+    def _speaker(voice_id: str) -> str:
+        return DEFAULT_SPEAKER if voice_id in (None, "", "default") else voice_id
+
+    def voices(self):
+        return sorted(SPEAKERS)
+
+    def voice_revision(self, voice_id: str) -> str:
+        speaker_wav = SPEAKERS.get(self._speaker(voice_id))
+        mtime = os.path.getmtime(speaker_wav) if speaker_wav and os.path.exists(speaker_wav) else 0
+        return f"{self._speaker(voice_id)}:{mtime}"
+
+    def conditioning(self, voice_id: str) -> str:
+        """The speaker id (latents are looked up at generation time, possibly in a replica)"""
+        speaker_id = self._speaker(voice_id)
+        _speaker_wav(speaker_id)
+        return speaker_id
+
+    def generate(self, text: str, speaker_id: str, language: str = DEFAULT_LANG) -> np.ndarray:
+        return np.concatenate(list(_synthesize_stream(text, speaker_id, language)))
+
+    def generate_stream(self, text: str, speaker_id: str, language: str = DEFAULT_LANG):
+        return _synthesize_stream(text, speaker_id, language)
+
+    async def agenerate(self, text: str, speaker_id: str, token, timer: StageTimer | None = None,
+                        language: str = DEFAULT_LANG) -> np.ndarray:
+        return np.concatenate([chunk async for chunk in self.astream(text, speaker_id, token, timer, language=language)])
+
+    def astream(self, text: str, speaker_id: str, token, timer: StageTimer | None = None,
+                language: str = DEFAULT_LANG) -> AsyncIterator[np.ndarray]:
+        return _generate_chunks(text, speaker_id, language, timer or StageTimer(), token)
+
+
+# The shared API on top of XTTS (rendered-audio cache included); /tts and /ws/tts below are aliases onto it
+engine_server = TTSServer(
+    XTTSEngine(),
+    metrics=metrics,
+    cancellations=cancellations,
+    cache=RenderedAudioCache(
+        cache_dir=os.environ.get("AUDIO_CACHE_DIR") or None,
+        memory_bytes=int(os.environ.get("AUDIO_CACHE_MEMORY_MB", "64")) * 1024 * 1024,
+        max_disk_bytes=int(os.environ.get("AUDIO_CACHE_DISK_MB", "2048")) * 1024 * 1024,
+    ),
+    require_ready=_require_ready,
+)
+app.include_router(engine_server.router(service_routes=False))
 
 
 @app.post("/tts")
-async def tts_stream(req: TTSRequest):
+async def tts_stream(req: TTSRequest, http_request: Request):
+    """
+    POST /tts – POST /synthesize/stream under this service's original name and fields
+    JSON body: { "text": "...", "speaker": "alex", "language": "en", "output_format": "pcm",
+                 "trim_silence": true, "normalize": true }
+
+    Response: streaming 16-bit PCM at 24kHz (no WAV header), Content-Type: audio/L16
+    With output_format="ulaw": raw 8kHz μ-law, Content-Type: audio/basic
+    Audio is sent as XTTS generates it, so the first bytes arrive after the first chunk.
+    Closing the connection or POST /cancel/{X-Request-ID} stops generation.
     """
-    POST /tts
-    JSON body: { "text": "...", "speaker": "alex", "language": "en" }
+    output_format = (req.output_format or "pcm").strip()
+    if output_format not in ("pcm", "ulaw"):
+        raise HTTPException(status_code=400, detail="output_format must be 'pcm' or 'ulaw'")
+    request = SynthesisRequest(
+        text=req.text,
+        voice_id=req.speaker,
+        language=req.language,
+        output_format=output_format,
+        trim_silence=req.trim_silence,
+        normalize=req.normalize,
+    )
+    return await engine_server.synthesize_stream(request, http_request)
+
 
-    Response: streaming 16-bit PCM at 24kHz (no WAV header),
-    Content-Type: application/octet-stream
+@app.websocket("/ws/tts")
+async def tts_websocket(websocket: WebSocket):
+    """
+    WS /ws/tts – WS /ws/synthesize, with "speaker" accepted for the voice
+    Client sends JSON: { "text": "...", "speaker": "alex", "language": "en",
+                         "trim_silence": true, "normalize": true,
+                         "mode": "binary" | "json", "stream_sid": "MZ...", "mark": "turn-1" }
+
+    Server sends 20 ms / 160-byte μ-law frames as XTTS generates them: binary messages, or
+    with mode="json" Twilio `media` messages (base64 payload + streamSid) the bridge can
+    forward as-is. Each utterance ends with a `mark` message; errors are {"event": "error", ...}.
+    Barge-in: {"event": "cancel"} (or POST /cancel/{request_id} for a message that carried a
+    "request_id") stops the utterance being generated; answered with {"event": "cancelled"}.
     """
-    text = (req.text or "").strip()
-    if not text:
-        raise HTTPException(status_code=400, detail="text is required")
+    await engine_server.websocket(websocket, field_aliases={"speaker": "voice_id"})
 
-    speaker_id = (req.speaker or DEFAULT_SPEAKER).strip()
-    language = (req.language or DEFAULT_LANG).strip()
 
-    try:
-        pcm_bytes = _synthesize_to_pcm(text, speaker_id, language)
-    except HTTPException:
-        # bubble up HTTP errors from _synthesize_to_pcm
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"TTS synthesis failed: {e}")
-
-    # Stream as raw PCM – your Node bridge will:
-    # 1) read these chunks,
-    # 2) treat as 24kHz int16 PCM,
-    # 3) downsample + mu-law encode for Twilio.
-    return StreamingResponse(
-        _iter_pcm_chunks(pcm_bytes),
-        media_type="application/octet-stream",
-    )
+@app.get("/speakers")
+async def list_speakers():
+    """Known speaker ids and whether their latents are precomputed."""
+    return {
+        "speakers": sorted(SPEAKERS),
+        "default_speaker": DEFAULT_SPEAKER,
+        "latents": sorted(
+            speaker_id for speaker_id, wav_path in SPEAKERS.items()
+            if os.path.exists(SpeakerLatents.latents_path(wav_path))
+        ),
+    }
+
+
+@app.post("/speakers/{speaker_id}")
+async def register_speaker(speaker_id: str, audio_file: UploadFile = File(...)):
+    """
+    POST /speakers/{speaker_id} (multipart, field "audio_file": reference wav)
+    Stores the wav under SPEAKERS_DIR and computes its XTTS latents once; every later
+    utterance for this speaker reuses them. Re-posting replaces the speaker.
+    """
+    if not speaker_id.replace("-", "").replace("_", "").isalnum():
+        raise HTTPException(status_code=400, detail="speaker_id may only contain letters, digits, - and _")
+    _require_ready()
+
+    os.makedirs(SPEAKERS_DIR, exist_ok=True)
+    wav_path = os.path.join(SPEAKERS_DIR, f"{speaker_id}.wav")
+    with open(wav_path, "wb") as f:
+        f.write(await audio_file.read())
+
+    if replica_pool is not None or speaker_latents is not None:
+        try:
+            if replica_pool is not None:
+                # Computed and saved by one replica; the others reload it from disk
+                await replica_pool.register_speaker(speaker_id, wav_path)
+            else:
+                # Off the event loop: waits for the model like any request
+                await asyncio.to_thread(speaker_latents.register, speaker_id, wav_path)
+        except Exception as e:
+            if speaker_latents is not None:
+                speaker_latents.forget(speaker_id)
+            if speaker_id not in SPEAKERS:
+                os.remove(wav_path)
+            raise HTTPException(status_code=400, detail=f"Could not compute speaker latents: {e}")
+    SPEAKERS[speaker_id] = wav_path
+    print(f"Speaker registered: {speaker_id} -> {wav_path}")
+    return {"status": "success", "speaker": speaker_id, "wav_path": wav_path}
+
+
+@app.post("/cancel/{request_id}")
+async def cancel_request(request_id: str):
+    """Stop an in-flight synthesis, e.g. because the prospect barged in."""
+    if not cancellations.cancel(request_id, "cancelled"):
+        raise HTTPException(status_code=404, detail="No in-flight request with this id")
+    return {"status": "cancelled", "request_id": request_id}
+
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Prometheus metrics: per-stage latency, real-time factor, chars/sec, in-flight requests"""
+    body, content_type = metrics.render()
+    return Response(content=body, media_type=content_type)
 
 
 @app.get("/health")
 async def health_check():
-    return {"ok": True, "model": MODEL_NAME, "loaded": tts is not None}
+    """Liveness: the process is serving, whether or not the model has loaded yet."""
+    return {
+        "ok": True,
+        "model": MODEL_NAME,
+        "device": device,
+        "loaded": model_state["status"] == "ready",
+        **model_state,
+        "cancellation": cancellations.summary(),
+        "cache": engine_server.cache.summary(),
+        "replicas": replica_pool.summary() if replica_pool is not None else None,
+    }
+
+
+@app.get("/ready")
+async def readiness_check():
+    """Readiness: 200 once the model is loaded (and warmed up), 503 before that or if loading failed."""
+    if model_state["status"] != "ready":
+        return JSONResponse(status_code=503, content={"ready": False, **model_state})
+    return {"ready": True, **model_state}
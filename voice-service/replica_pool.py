@@ -0,0 +1,299 @@
+"""
+XTTS replica pool
+One XTTS-v2 utterance does not scale across a large CPU node: past a handful of
+threads, extra cores mostly add synchronization. Instead, XTTS_REPLICAS worker
+processes each load their own model copy, pinned to their own slice of the process's
+cores with torch running XTTS_THREADS_PER_REPLICA threads. Each request goes to the
+replica with the fewest requests in flight, and audio chunks stream back over a queue
+as the replica generates them, so utterances/sec grows with the number of replicas.
+
+Cancellation is forwarded to the replica over a control queue; the replica's step
+hooks (tts_common/cancellation.py) stop the job at its next GPT step, and a job that
+is still queued never starts.
+"""
+
+import os
+import time
+import asyncio
+import itertools
+import threading
+import multiprocessing as mp
+from queue import Empty
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from tts_common.cancellation import Cancelled, CancellationToken, bind, run_until_cancelled
+from tts_common.metrics import StageTimer
+
+
+class _JobToken:
+    """Cancellation token of one job inside a replica (cancelled ids arrive over the control queue)"""
+
+    reason = "cancelled"
+
+    def __init__(self, job_id: int, cancelled: set):
+        self.request_id = job_id
+        self._cancelled = cancelled
+
+    @property
+    def cancelled(self) -> bool:
+        return self.request_id in self._cancelled
+
+    def raise_if_cancelled(self) -> None:
+        if self.cancelled:
+            raise Cancelled(f"Job {self.request_id} cancelled")
+
+
+def _serve(index: int, cpus: List[int], threads: int, engine_factory: Callable,
+           requests: mp.Queue, control: mp.Queue, responses: mp.Queue) -> None:
+    """
+    Replica process main loop. engine_factory() loads the model and returns an object with
+    stream(text, speaker_id, wav_path, language, timer) -> iterator of float32 chunks,
+    register_speaker(speaker_id, wav_path) and forget_speaker(speaker_id).
+    """
+    if cpus and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+    import torch
+
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass
+
+    started = time.perf_counter()
+    try:
+        engine = engine_factory()
+    except Exception as e:
+        responses.put((None, "failed", str(e)))
+        return
+    responses.put((None, "ready", {"load_seconds": round(time.perf_counter() - started, 2), "pid": os.getpid()}))
+
+    cancelled: set = set()
+    # Jobs reach a replica in increasing id order, so a cancel for an id at or below the last
+    # finished one is for a job that is already over: remembering it would never be undone
+    finished = {"last_id": -1}
+    finished_lock = threading.Lock()
+
+    def listen():
+        while True:
+            kind, value = control.get()
+            if kind == "cancel":
+                with finished_lock:
+                    if value > finished["last_id"]:
+                        cancelled.add(value)
+            elif kind == "forget":
+                engine.forget_speaker(value)
+
+    threading.Thread(target=listen, name=f"xtts-replica-{index}-control", daemon=True).start()
+
+    while True:
+        job = requests.get()
+        if job is None:
+            return
+        job_id, kind, args = job
+        timer = StageTimer()
+        try:
+            with bind(_JobToken(job_id, cancelled)):
+                if kind == "register":
+                    engine.register_speaker(*args)
+                else:
+                    for chunk in engine.stream(*args, timer):
+                        responses.put((job_id, "chunk", chunk))
+            responses.put((job_id, "done", dict(timer.stages)))
+        except Cancelled:
+            responses.put((job_id, "cancelled", None))
+        except Exception as e:
+            responses.put((job_id, "error", getattr(e, "detail", None) or str(e)))
+        finally:
+            with finished_lock:
+                finished["last_id"] = job_id
+                cancelled.discard(job_id)
+
+
+class _Replica:
+    def __init__(self, index: int, cpus: List[int], ctx):
+        self.index = index
+        self.cpus = cpus
+        self.requests = ctx.Queue()
+        self.control = ctx.Queue()
+        self.responses = ctx.Queue()
+        self.process = None
+        self.state = "starting"  # starting -> ready | failed | dead
+        self.started = threading.Event()
+        self.info: dict = {}
+        self.in_flight = 0
+        self.completed = 0
+
+
+class ReplicaPool:
+    def __init__(self, replicas: int, engine_factory: Callable, threads_per_replica: Optional[int] = None):
+        # spawn: each replica starts clean (no forked torch threads or CUDA state)
+        self._ctx = mp.get_context("spawn")
+        available = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else list(range(os.cpu_count() or 1))
+        per_replica = max(1, len(available) // replicas)
+        self.threads = threads_per_replica or per_replica
+        self.engine_factory = engine_factory
+        self.replicas = [
+            _Replica(i, available[i * per_replica:(i + 1) * per_replica] or available, self._ctx)
+            for i in range(replicas)
+        ]
+        self._jobs: Dict[int, Tuple[asyncio.AbstractEventLoop, asyncio.Queue, _Replica]] = {}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+
+    # --- Lifecycle ---
+
+    def start(self) -> int:
+        """Start every replica and block until each has loaded (or failed); returns how many are ready"""
+        for replica in self.replicas:
+            replica.process = self._ctx.Process(
+                target=_serve,
+                args=(replica.index, replica.cpus, self.threads, self.engine_factory,
+                      replica.requests, replica.control, replica.responses),
+                name=f"xtts-replica-{replica.index}",
+                daemon=True,
+            )
+            replica.process.start()
+            threading.Thread(target=self._read, args=(replica,), name=f"xtts-replica-{replica.index}-reader",
+                             daemon=True).start()
+        for replica in self.replicas:
+            replica.started.wait()
+        ready = sum(replica.state == "ready" for replica in self.replicas)
+        if not ready:
+            raise RuntimeError(f"No XTTS replica started: {[r.info.get('error') for r in self.replicas]}")
+        return ready
+
+    def shutdown(self) -> None:
+        for replica in self.replicas:
+            if replica.process is not None and replica.process.is_alive():
+                replica.requests.put(None)
+        for replica in self.replicas:
+            if replica.process is not None:
+                replica.process.join(timeout=5)
+                if replica.process.is_alive():
+                    replica.process.terminate()
+
+    # --- Responses ---
+
+    def _read(self, replica: _Replica) -> None:
+        """Route a replica's messages to the waiting requests; notice if the process dies"""
+        while True:
+            try:
+                job_id, kind, payload = replica.responses.get(timeout=1.0)
+            except Empty:
+                if replica.process.is_alive():
+                    continue
+                self._fail_replica(replica, f"replica {replica.index} exited with code {replica.process.exitcode}")
+                return
+            if job_id is None:
+                replica.state = "ready" if kind == "ready" else "failed"
+                replica.info.update(payload if kind == "ready" else {"error": payload})
+                replica.started.set()
+                if kind == "failed":
+                    return
+                continue
+            with self._lock:
+                job = self._jobs.get(job_id)
+                if kind in ("done", "cancelled", "error"):
+                    self._jobs.pop(job_id, None)
+                    replica.in_flight -= 1
+                    replica.completed += 1
+            if job is not None:
+                loop, queue, _ = job
+                loop.call_soon_threadsafe(queue.put_nowait, (kind, payload))
+
+    def _fail_replica(self, replica: _Replica, error: str) -> None:
+        with self._lock:
+            replica.state = "dead" if replica.started.is_set() else "failed"
+            replica.info["error"] = error
+            replica.in_flight = 0
+            jobs = [(job_id, job) for job_id, job in self._jobs.items() if job[2] is replica]
+            for job_id, _ in jobs:
+                self._jobs.pop(job_id)
+        replica.started.set()
+        print(f"Warning: XTTS {error}")
+        for _, (loop, queue, _) in jobs:
+            loop.call_soon_threadsafe(queue.put_nowait, ("error", error))
+
+    # --- Dispatch ---
+
+    def _pick(self) -> _Replica:
+        """Least-loaded ready replica (lowest index on ties)"""
+        ready = [replica for replica in self.replicas if replica.state == "ready"]
+        if not ready:
+            raise RuntimeError("No XTTS replica available")
+        return min(ready, key=lambda replica: replica.in_flight)
+
+    async def _submit(self, kind: str, args: tuple, token, timer: Optional[StageTimer] = None,
+                      replica: Optional[_Replica] = None) -> AsyncIterator[object]:
+        queue: asyncio.Queue = asyncio.Queue()
+        with self._lock:
+            # Ids reach each replica in increasing order (its stale-cancel check relies on it)
+            job_id = next(self._ids)
+            replica = replica or self._pick()
+            replica.in_flight += 1
+            self._jobs[job_id] = (asyncio.get_running_loop(), queue, replica)
+            replica.requests.put((job_id, kind, args))
+
+        finished = False
+        try:
+            while True:
+                message, payload = await run_until_cancelled(queue.get(), token)
+                if message == "chunk":
+                    yield payload
+                elif message == "done":
+                    finished = True
+                    if timer is not None:
+                        for stage, seconds in payload.items():
+                            timer.add(stage, seconds)
+                    return
+                elif message == "cancelled":
+                    finished = True
+                    raise Cancelled(f"Request {token.request_id} {token.reason or 'cancelled'}")
+                else:
+                    finished = True
+                    raise RuntimeError(payload)
+        finally:
+            if not finished:
+                # Cancelled, or the caller stopped reading: stop the replica at its next step
+                replica.control.put(("cancel", job_id))
+
+    def stream(self, text: str, speaker_id: str, wav_path: str, language: str,
+               token: CancellationToken, timer: Optional[StageTimer] = None) -> AsyncIterator:
+        """Float32 chunks of one utterance, as the least-loaded replica generates them"""
+        return self._submit("stream", (text, speaker_id, wav_path, language), token, timer)
+
+    async def register_speaker(self, speaker_id: str, wav_path: str) -> None:
+        """Compute + persist latents on one replica; the others reload them from disk on next use"""
+        token = CancellationToken(f"register-{speaker_id}")
+        try:
+            async for _ in self._submit("register", (speaker_id, wav_path), token):
+                pass
+        finally:
+            # The wav was replaced either way: nobody keeps the old latents in memory
+            for replica in self.replicas:
+                replica.control.put(("forget", speaker_id))
+
+    # --- Stats ---
+
+    @property
+    def running(self) -> int:
+        return sum(min(replica.in_flight, 1) for replica in self.replicas)
+
+    @property
+    def queued(self) -> int:
+        return sum(max(replica.in_flight - 1, 0) for replica in self.replicas)
+
+    def summary(self) -> List[dict]:
+        return [
+            {
+                "replica": replica.index,
+                "state": replica.state,
+                "cpus": replica.cpus,
+                "threads": self.threads,
+                "in_flight": replica.in_flight,
+                "completed": replica.completed,
+                **replica.info,
+            }
+            for replica in self.replicas
+        ]
@@ -0,0 +1,104 @@
+"""
+Speaker latents
+XTTS-v2 conditions every utterance on the speaker's reference clip: GPT conditioning
+latents plus a speaker embedding. Building them means loading, resampling and encoding
+the WAV, so it is done once per speaker: at registration (or at startup for speakers
+that have none yet), serialized next to the WAV as <speaker>.latents.pt, and kept in
+memory for synthesis.
+"""
+
+import os
+import threading
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+if TYPE_CHECKING:
+    import torch
+
+LATENTS_SUFFIX = ".latents.pt"
+
+Latents = Tuple["torch.Tensor", "torch.Tensor"]  # (gpt_cond_latent, speaker_embedding)
+
+
+class SpeakerLatents:
+    def __init__(self, model, model_name: str, device: str, lock: threading.Lock):
+        self.model = model            # Xtts (tts.synthesizer.tts_model)
+        self.model_name = model_name  # Stored with the latents: another checkpoint means recompute
+        self.device = device
+        self.lock = lock              # Same lock that guards generation
+        self._latents: Dict[str, Latents] = {}
+
+    @staticmethod
+    def latents_path(wav_path: str) -> str:
+        return os.path.splitext(wav_path)[0] + LATENTS_SUFFIX
+
+    def _compute(self, wav_path: str) -> Latents:
+        """Same conditioning settings tts.tts() would use"""
+        config = self.model.config
+        with self.lock:
+            return self.model.get_conditioning_latents(
+                audio_path=[wav_path],
+                gpt_cond_len=config.gpt_cond_len,
+                gpt_cond_chunk_len=config.gpt_cond_chunk_len,
+                max_ref_length=config.max_ref_len,
+                sound_norm_refs=config.sound_norm_refs,
+            )
+
+    def register(self, speaker_id: str, wav_path: str) -> Latents:
+        """Compute and persist latents for a (new or replaced) reference WAV"""
+        import torch
+
+        gpt_cond_latent, speaker_embedding = self._compute(wav_path)
+        path = self.latents_path(wav_path)
+        tmp_path = f"{path}.{os.getpid()}.tmp"  # Replica processes may save the same speaker at once
+        torch.save(
+            {
+                "model": self.model_name,
+                "gpt_cond_latent": gpt_cond_latent.cpu(),
+                "speaker_embedding": speaker_embedding.cpu(),
+            },
+            tmp_path,
+        )
+        os.replace(tmp_path, path)
+        self._latents[speaker_id] = (gpt_cond_latent, speaker_embedding)
+        return self._latents[speaker_id]
+
+    def _load(self, wav_path: str) -> Optional[Latents]:
+        """Latents from disk, or None if missing, older than the WAV, or from another model"""
+        import torch
+
+        path = self.latents_path(wav_path)
+        if not os.path.exists(path):
+            return None
+        if os.path.exists(wav_path) and os.path.getmtime(wav_path) > os.path.getmtime(path):
+            return None
+        saved = torch.load(path, map_location=self.device, weights_only=True)
+        if saved.get("model") != self.model_name:
+            return None
+        return saved["gpt_cond_latent"], saved["speaker_embedding"]
+
+    def get(self, speaker_id: str, wav_path: str) -> Latents:
+        """Memory -> disk -> compute from the WAV (first use of a speaker added by hand)"""
+        latents = self._latents.get(speaker_id)
+        if latents is None:
+            latents = self._load(wav_path)
+            if latents is None:
+                return self.register(speaker_id, wav_path)
+            self._latents[speaker_id] = latents
+        return latents
+
+    def forget(self, speaker_id: str) -> None:
+        self._latents.pop(speaker_id, None)
+
+    def warm(self, speakers: Dict[str, str]) -> int:
+        """Startup: load (or build) latents for every speaker with a reference WAV"""
+        loaded = 0
+        for speaker_id, wav_path in speakers.items():
+            if not os.path.exists(wav_path):
+                print(f"Warning: no reference wav for speaker '{speaker_id}': {wav_path}")
+                continue
+            try:
+                self.get(speaker_id, wav_path)
+                loaded += 1
+            except Exception as e:
+                print(f"Warning: could not compute latents for speaker '{speaker_id}': {e}")
+        return loaded